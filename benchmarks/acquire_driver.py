@@ -0,0 +1,129 @@
+"""
+Runs ``doiget_tdm.acquire.run`` over a set of synthetic DOIs and prints the
+per-DOI durations (and, optionally, the peak traced memory) in JSON format; the
+duration of a DOI includes its full-text acquisition even if it is acquired as
+part of a group.
+
+This is run in a fresh process by ``test_acquire.py``, with the settings for the
+local publisher simulator provided through the environment.
+"""
+
+import argparse
+import collections.abc
+import json
+import time
+import tracemalloc
+
+import pyrate_limiter
+
+import doiget_tdm.acquire
+import doiget_tdm.doi
+import doiget_tdm.fulltext
+import doiget_tdm.web
+
+import benchmarks.simulator
+
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--n-dois", type=int, required=True)
+    parser.add_argument("--start", type=int, default=0)
+    parser.add_argument("--trace-memory", action="store_true")
+
+    args = parser.parse_args()
+
+    # the simulator applies its own rate limits (if any), so the client-side
+    # default limiter would otherwise dominate the measurement; note that the
+    # limiter bucket is filled on a 429 response, so the limit cannot be huge
+    doiget_tdm.web.DEFAULT_LIMITER = pyrate_limiter.Limiter(
+        pyrate_limiter.RequestRate(limit=1_000, interval=1),
+    )
+
+    dois = [
+        doiget_tdm.doi.DOI(doi=doi)
+        for doi in benchmarks.simulator.make_dois(n_dois=args.n_dois, start=args.start)
+    ]
+
+    # the duration for each DOI, keyed by the DOI; DOIs that are acquired as part of
+    # a group have their full-text content acquired after ``process_doi`` returns
+    # (see ``doiget_tdm.acquire.acquire_batch``), so their duration also includes
+    # their full-text acquisition and a share of the prefetch for their batch
+    durations_s: dict[str, float] = {}
+
+    in_process_doi = False
+
+    process_doi = doiget_tdm.acquire.process_doi
+
+    def timed_process_doi(**kwargs: object) -> str | None:
+        nonlocal in_process_doi
+        start = time.perf_counter()
+        in_process_doi = True
+        try:
+            group = process_doi(**kwargs)  # type: ignore[arg-type]
+        finally:
+            in_process_doi = False
+        durations_s[str(kwargs["doi"])] = time.perf_counter() - start
+        return group
+
+    fulltext_acquire = doiget_tdm.fulltext.FullText.acquire
+
+    def timed_fulltext_acquire(
+        self: doiget_tdm.fulltext.FullText,
+        skip_existing: bool = True,
+    ) -> None:
+        # the acquisition within ``process_doi`` is already timed
+        if in_process_doi:
+            fulltext_acquire(self, skip_existing=skip_existing)
+            return
+        start = time.perf_counter()
+        fulltext_acquire(self, skip_existing=skip_existing)
+        durations_s[str(self.doi)] += time.perf_counter() - start
+
+    prefetch = doiget_tdm.fulltext.prefetch
+
+    def timed_prefetch(
+        fulltexts: collections.abc.Sequence[doiget_tdm.fulltext.FullText],
+    ) -> None:
+        start = time.perf_counter()
+        prefetch(fulltexts=fulltexts)
+        share_s = (time.perf_counter() - start) / max(len(fulltexts), 1)
+        for fulltext in fulltexts:
+            durations_s[str(fulltext.doi)] += share_s
+
+    doiget_tdm.acquire.process_doi = timed_process_doi  # type: ignore[assignment]
+    doiget_tdm.fulltext.FullText.acquire = (  # type: ignore[method-assign]
+        timed_fulltext_acquire
+    )
+    doiget_tdm.fulltext.prefetch = timed_prefetch
+
+    if args.trace_memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+
+    doiget_tdm.acquire.run(
+        dois=dois,
+        only_metadata=False,
+        show_progress_bar=False,
+        show_timings=False,
+    )
+
+    total_s = time.perf_counter() - start
+
+    peak_memory_bytes = tracemalloc.get_traced_memory()[1] if args.trace_memory else 0
+
+    print(
+        json.dumps(
+            {
+                "total_s": total_s,
+                "durations_s": list(durations_s.values()),
+                "peak_memory_bytes": peak_memory_bytes,
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
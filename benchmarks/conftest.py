@@ -0,0 +1,165 @@
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import time
+import typing
+
+import pytest
+
+
+RESULTS: dict[str, dict[str, float]] = {}
+
+# units of any categories of results that are not durations (in seconds)
+UNITS: dict[str, str] = {}
+
+#: Types of the functions provided by the ``run_repeated``, ``record_timing``, and
+#: ``record_metric`` fixtures.
+RunRepeated = typing.Callable[
+    [list[str]],
+    list[tuple[float, subprocess.CompletedProcess[str]]],
+]
+RecordTiming = typing.Callable[[str, str, float], None]
+RecordMetric = typing.Callable[[str, str, float, str], None]
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+
+    group = parser.getgroup("doiget-tdm benchmarks")
+
+    group.addoption(
+        "--benchmark-repeats",
+        type=int,
+        default=3,
+        help="Number of times to repeat each measurement (the minimum is reported)",
+    )
+
+    group.addoption(
+        "--benchmark-n-dois",
+        type=int,
+        default=60,
+        help="Number of synthetic DOIs used in each acquisition benchmark",
+    )
+
+    group.addoption(
+        "--benchmark-json",
+        type=pathlib.Path,
+        default=None,
+        help="Path to write the benchmark results, in JSON format",
+    )
+
+
+@pytest.fixture(scope="session")
+def repeats(request: pytest.FixtureRequest) -> int:
+    value: int = request.config.getoption("--benchmark-repeats")
+    return value
+
+
+@pytest.fixture(scope="session")
+def n_dois(request: pytest.FixtureRequest) -> int:
+    value: int = request.config.getoption("--benchmark-n-dois")
+    return value
+
+
+@pytest.fixture(scope="session")
+def offline_env(tmp_path_factory: pytest.TempPathFactory) -> dict[str, str]:
+    """
+    Environment for the subprocesses, with empty data and cache directories and
+    with any (accidental) web requests directed to an unused local port.
+    """
+
+    base_dir = tmp_path_factory.mktemp("benchmark")
+
+    data_dir = base_dir / "data"
+    cache_dir = base_dir / "cache"
+
+    for path in (data_dir, cache_dir):
+        path.mkdir()
+
+    return os.environ | {
+        "DOIGET_TDM_DATA_DIR": str(data_dir),
+        "DOIGET_TDM_CACHE_DIR": str(cache_dir),
+        "HTTP_PROXY": "http://127.0.0.1:9",
+        "HTTPS_PROXY": "http://127.0.0.1:9",
+        "NO_PROXY": "",
+    }
+
+
+@pytest.fixture(scope="session")
+def run_repeated(offline_env: dict[str, str], repeats: int) -> RunRepeated:
+    """
+    Run a command in a fresh subprocess multiple times, returning the wall-clock
+    duration (in seconds) and the completed process for each run.
+    """
+
+    def run(
+        cmd: list[str],
+    ) -> list[tuple[float, subprocess.CompletedProcess[str]]]:
+
+        runs: list[tuple[float, subprocess.CompletedProcess[str]]] = []
+
+        for _ in range(repeats):
+
+            start = time.perf_counter()
+
+            completed = subprocess.run(
+                [sys.executable, *cmd],
+                env=offline_env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+
+            runs.append((time.perf_counter() - start, completed))
+
+        return runs
+
+    return run
+
+
+@pytest.fixture(scope="session")
+def record_timing() -> RecordTiming:
+
+    def record(category: str, name: str, duration_s: float) -> None:
+        RESULTS.setdefault(category, {})[name] = duration_s
+
+    return record
+
+
+@pytest.fixture(scope="session")
+def record_metric() -> RecordMetric:
+
+    def record(category: str, name: str, value: float, unit: str) -> None:
+        RESULTS.setdefault(category, {})[name] = value
+        UNITS[category] = unit
+
+    return record
+
+
+def pytest_terminal_summary(
+    terminalreporter: pytest.TerminalReporter,
+    config: pytest.Config,
+) -> None:
+
+    if not RESULTS:
+        return
+
+    for category, values in RESULTS.items():
+
+        (unit, scale) = (UNITS[category], 1) if category in UNITS else ("ms", 1000)
+
+        terminalreporter.write_sep("-", f"{category} ({unit})")
+
+        name_width = max(len(name) for name in values)
+
+        for name, value in sorted(
+            values.items(),
+            key=lambda item: item[1],
+            reverse=True,
+        ):
+            terminalreporter.write_line(f"{name:<{name_width}}  {value * scale:>9.1f}")
+
+    if (json_path := config.getoption("--benchmark-json")) is not None:
+        json_path.write_text(json.dumps(RESULTS, indent=2))
+        terminalreporter.write_line(f"Wrote benchmark results to {json_path}")
@@ -0,0 +1,395 @@
+"""
+Local stand-in servers for the Crossref API and publisher full-text endpoints,
+for benchmarking acquisition without network access.
+
+A single threaded HTTP server provides:
+
+``/works/{doi}``
+    Crossref-style metadata, with the member ID determined by the DOI prefix.
+``/api.elsevier.com/content/article/doi/{doi}``
+    Elsevier-style XML that requires the ``X-ELS-APIKey`` and ``X-ELS-Insttoken``
+    headers.
+``/wiley/{quoted doi}``
+    Wiley-style PDF that requires the ``Wiley-TDM-Client-Token`` header.
+``/springer?q=doi:{doi}&api_key=...``
+    Springer-style XML, with the article wrapped within a response envelope.
+"""
+
+import dataclasses
+import http
+import http.server
+import json
+import random
+import threading
+import time
+import urllib.parse
+
+
+# the simulator only listens locally
+HOST = "127.0.0.1"
+
+ELSEVIER_PREFIX = "10.1016"
+WILEY_PREFIX = "10.1002"
+SPRINGER_PREFIX = "10.1007"
+
+MEMBER_IDS = {
+    ELSEVIER_PREFIX: ("78", "Elsevier BV"),
+    WILEY_PREFIX: ("311", "Wiley"),
+    SPRINGER_PREFIX: ("297", "Springer Science and Business Media LLC"),
+}
+
+ELSEVIER_API_KEY = "bench-api-key"
+ELSEVIER_INST_TOKEN = "bench-inst-token"
+WILEY_TOKEN = "bench-wiley-token"
+SPRINGER_API_KEY = "bench-springer-key"
+SPRINGER_API_SUFFIX = "jats"
+
+ARTICLE_XML = (
+    "<article><front><article-meta><title-group><article-title>{doi}"
+    + "</article-title></title-group></article-meta></front>"
+    + "<body><sec><p>{text}</p></sec></body></article>"
+)
+
+INVALID_ARTICLE_XML = "<article><front><p>Abstract only</p></front></article>"
+
+PDF = b"%PDF-1.4\n" + b"1 0 obj << /Type /Catalog >> endobj\n" * 200 + b"%%EOF\n"
+
+
+@dataclasses.dataclass
+class SimulatorConfig:
+    """
+    Behaviour of the stand-in servers.
+
+    Parameters
+    ----------
+    latency_s
+        Delay added before each response.
+    rate_limit_per_s
+        Maximum number of requests per second for each endpoint, beyond which a
+        429 response (with a ``Retry-After`` header) is returned; ``None`` for no
+        limit.
+    error_rate
+        Proportion of full-text requests that receive a 503 response.
+    invalid_rate
+        Proportion of full-text XML requests that receive content without a body.
+    body_size
+        Approximate size, in characters, of the full-text XML body.
+    seed
+        Seed for the random error injection.
+    """
+
+    latency_s: float = 0.0
+    rate_limit_per_s: float | None = None
+    error_rate: float = 0.0
+    invalid_rate: float = 0.0
+    body_size: int = 20_000
+    seed: int = 0
+
+
+class _RateLimiter:
+
+    def __init__(self, rate_per_s: float | None) -> None:
+        self.rate_per_s = rate_per_s
+        self.lock = threading.Lock()
+        self.allowance = rate_per_s or 0.0
+        self.last_check = time.monotonic()
+
+    def allow(self) -> bool:
+
+        if self.rate_per_s is None:
+            return True
+
+        with self.lock:
+            now = time.monotonic()
+            self.allowance = min(
+                self.rate_per_s,
+                self.allowance + (now - self.last_check) * self.rate_per_s,
+            )
+            self.last_check = now
+
+            if self.allowance < 1:
+                return False
+
+            self.allowance -= 1
+
+        return True
+
+
+class PublisherSimulator:
+
+    def __init__(self, config: SimulatorConfig | None = None) -> None:
+        """
+        Stand-in for the Crossref API and several publisher endpoints, served from
+        a local port.
+
+        Parameters
+        ----------
+        config
+            Server behaviour.
+        """
+
+        self.config = config or SimulatorConfig()
+
+        self.random = random.Random(self.config.seed)
+        self.random_lock = threading.Lock()
+
+        self.limiters = {
+            endpoint: _RateLimiter(rate_per_s=self.config.rate_limit_per_s)
+            for endpoint in ("works", "elsevier", "wiley", "springer")
+        }
+
+        self.stats_lock = threading.Lock()
+        self.stats: dict[str, int] = {}
+
+        simulator = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+
+            def do_GET(self) -> None:
+                simulator.handle(request=self)
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        self.server = http.server.ThreadingHTTPServer((HOST, 0), Handler)
+        self.server.daemon_threads = True
+
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{HOST}:{self.server.server_port}/"
+
+    def __enter__(self) -> "PublisherSimulator":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def count(self, key: str) -> None:
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def chance(self, rate: float) -> bool:
+        with self.random_lock:
+            return self.random.random() < rate
+
+    def handle(self, request: http.server.BaseHTTPRequestHandler) -> None:
+
+        url = urllib.parse.urlsplit(request.path)
+        path = urllib.parse.unquote(url.path)
+        query = urllib.parse.parse_qs(url.query)
+
+        if self.config.latency_s > 0:
+            time.sleep(self.config.latency_s)
+
+        if path.startswith("/works/"):
+            endpoint = "works"
+        elif path.startswith("/api.elsevier.com/"):
+            endpoint = "elsevier"
+        elif path.startswith("/wiley/"):
+            endpoint = "wiley"
+        elif path.startswith("/springer"):
+            endpoint = "springer"
+        else:
+            self.respond(request=request, status=http.HTTPStatus.NOT_FOUND)
+            return
+
+        self.count(key=f"{endpoint}_requests")
+
+        if not self.limiters[endpoint].allow():
+            self.count(key=f"{endpoint}_rate_limited")
+            self.respond(
+                request=request,
+                status=http.HTTPStatus.TOO_MANY_REQUESTS,
+                headers={"Retry-After": "1"},
+            )
+            return
+
+        if endpoint == "works":
+            self.handle_works(request=request, doi=path.removeprefix("/works/"))
+            return
+
+        if self.chance(rate=self.config.error_rate):
+            self.count(key=f"{endpoint}_errors")
+            self.respond(request=request, status=http.HTTPStatus.SERVICE_UNAVAILABLE)
+            return
+
+        if endpoint == "elsevier":
+            self.handle_elsevier(request=request, path=path)
+        elif endpoint == "wiley":
+            self.handle_wiley(request=request)
+        else:
+            self.handle_springer(request=request, query=query)
+
+    def handle_works(
+        self,
+        request: http.server.BaseHTTPRequestHandler,
+        doi: str,
+    ) -> None:
+
+        (prefix, _, _) = doi.partition("/")
+
+        if prefix not in MEMBER_IDS:
+            self.respond(request=request, status=http.HTTPStatus.NOT_FOUND)
+            return
+
+        (member_id, publisher_name) = MEMBER_IDS[prefix]
+
+        links = (
+            [
+                {
+                    "URL": (
+                        f"{self.base_url}api.elsevier.com/content/article/doi/{doi}"
+                        + "?httpAccept=text/xml"
+                    ),
+                    "content-type": "text/xml",
+                    "content-version": "vor",
+                    "intended-application": "text-mining",
+                },
+            ]
+            if prefix == ELSEVIER_PREFIX
+            else []
+        )
+
+        message = {
+            "DOI": doi,
+            "member": member_id,
+            "publisher": publisher_name,
+            "title": [f"Synthetic work {doi}"],
+            "container-title": ["Journal of Benchmarks"],
+            "published": {"date-parts": [[2024, 1, 1]]},
+            "ISSN": ["1234-5678"],
+            "issn-type": [{"type": "electronic", "value": "1234-5678"}],
+            "link": links,
+        }
+
+        self.respond(
+            request=request,
+            body=json.dumps({"status": "ok", "message": message}).encode(),
+            content_type="application/json",
+        )
+
+    def handle_elsevier(
+        self,
+        request: http.server.BaseHTTPRequestHandler,
+        path: str,
+    ) -> None:
+
+        if (
+            request.headers.get("X-ELS-APIKey") != ELSEVIER_API_KEY
+            or request.headers.get("X-ELS-Insttoken") != ELSEVIER_INST_TOKEN
+        ):
+            self.respond(
+                request=request,
+                status=http.HTTPStatus.UNAUTHORIZED,
+                body=json.dumps({"error-message": "Invalid API key"}).encode(),
+                content_type="application/json",
+            )
+            return
+
+        doi = path.removeprefix("/api.elsevier.com/content/article/doi/")
+
+        self.respond(
+            request=request,
+            body=self.article_xml(doi=doi).encode(),
+            content_type="text/xml",
+        )
+
+    def handle_wiley(self, request: http.server.BaseHTTPRequestHandler) -> None:
+
+        if request.headers.get("Wiley-TDM-Client-Token") != WILEY_TOKEN:
+            self.respond(request=request, status=http.HTTPStatus.FORBIDDEN)
+            return
+
+        self.respond(request=request, body=PDF, content_type="application/pdf")
+
+    def handle_springer(
+        self,
+        request: http.server.BaseHTTPRequestHandler,
+        query: dict[str, list[str]],
+    ) -> None:
+
+        (api_key,) = query.get("api_key", [""])
+
+        if api_key != f"{SPRINGER_API_KEY}/{SPRINGER_API_SUFFIX}":
+            self.respond(request=request, status=http.HTTPStatus.UNAUTHORIZED)
+            return
+
+        (raw_query,) = query.get("q", [""])
+
+        dois = [
+            term.strip().removeprefix("doi:")
+            for term in raw_query.split(" OR ")
+            if term.strip().startswith("doi:")
+        ]
+
+        records = "".join(self.article_xml(doi=doi) for doi in dois)
+
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?><response>'
+            + f"<query>{raw_query}</query>"
+            + f"<result><total>{len(dois)}</total></result>"
+            + f"<records>{records}</records></response>"
+        )
+
+        self.respond(request=request, body=body.encode(), content_type="text/xml")
+
+    def article_xml(self, doi: str) -> str:
+
+        if self.chance(rate=self.config.invalid_rate):
+            self.count(key="invalid_articles")
+            return INVALID_ARTICLE_XML
+
+        text = ("Lorem ipsum dolor sit amet. " * (self.config.body_size // 28))[
+            : self.config.body_size
+        ]
+
+        return ARTICLE_XML.format(doi=doi, text=text)
+
+    @staticmethod
+    def respond(
+        request: http.server.BaseHTTPRequestHandler,
+        status: http.HTTPStatus = http.HTTPStatus.OK,
+        body: bytes = b"",
+        content_type: str = "text/plain",
+        headers: dict[str, str] | None = None,
+    ) -> None:
+
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(body)))
+
+        for header_name, header_value in (headers or {}).items():
+            request.send_header(header_name, header_value)
+
+        request.end_headers()
+        request.wfile.write(body)
+
+
+def make_dois(n_dois: int, start: int = 0) -> list[str]:
+    """
+    Form synthetic DOIs that are spread evenly across the simulated publishers.
+
+    Parameters
+    ----------
+    n_dois
+        Number of DOIs.
+    start
+        Number from which to begin the DOI suffixes, so that distinct sets of
+        DOIs can be formed.
+
+    Returns
+    -------
+        The DOIs, as strings.
+    """
+
+    prefixes = list(MEMBER_IDS)
+
+    return [
+        f"{prefixes[i_doi % len(prefixes)]}/bench.{i_doi}"
+        for i_doi in range(start, start + n_dois)
+    ]
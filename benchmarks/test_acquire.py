@@ -0,0 +1,162 @@
+"""
+End-to-end acquisition benchmarks, against a local publisher simulator.
+
+Each scenario runs ``doiget_tdm.acquire.run`` in a fresh process over a set of
+synthetic DOIs, with the CrossRef API and the Elsevier, Wiley, and Springer-Nature
+endpoints served from a local port (so that no network access is required). The
+throughput and the median and 99th percentile per-DOI durations are reported, with
+the peak memory measured in a separate run (as tracing the memory allocations
+slows the acquisition).
+"""
+
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+import typing
+
+import pytest
+
+import benchmarks.conftest
+import benchmarks.simulator
+
+
+# the driver is run as a module from the root of the repository, so that it can
+# import the simulator in the same way as the benchmarks
+ROOT_DIR = pathlib.Path(__file__).parent.parent
+
+SCENARIOS = {
+    "baseline": benchmarks.simulator.SimulatorConfig(),
+    "latency": benchmarks.simulator.SimulatorConfig(latency_s=0.02),
+    "rate limited": benchmarks.simulator.SimulatorConfig(rate_limit_per_s=20),
+    "errors": benchmarks.simulator.SimulatorConfig(error_rate=0.05, invalid_rate=0.1),
+}
+
+
+def run_driver(
+    env: dict[str, str],
+    data_dir: pathlib.Path,
+    n_dois: int,
+    start: int,
+    trace_memory: bool = False,
+) -> dict[str, typing.Any]:
+
+    data_dir.mkdir(parents=True)
+
+    cmd = [
+        sys.executable,
+        "-m",
+        "benchmarks.acquire_driver",
+        "--n-dois",
+        str(n_dois),
+        "--start",
+        str(start),
+    ]
+
+    if trace_memory:
+        cmd.append("--trace-memory")
+
+    completed = subprocess.run(
+        cmd,
+        env=env | {"DOIGET_TDM_DATA_DIR": str(data_dir)},
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    result: dict[str, typing.Any] = json.loads(completed.stdout.splitlines()[-1])
+
+    return result
+
+
+def simulator_env(
+    base_env: dict[str, str],
+    base_url: str,
+) -> dict[str, str]:
+    """
+    Environment that directs the CrossRef API and handlers to the simulator.
+    """
+
+    return base_env | {
+        # the simulator is local, so must bypass the (unused) proxy
+        "NO_PROXY": "127.0.0.1,localhost",
+        "DOIGET_TDM_CROSSREF_API_URL": base_url,
+        "DOIGET_TDM_ELSEVIER_API_KEY": benchmarks.simulator.ELSEVIER_API_KEY,
+        "DOIGET_TDM_ELSEVIER_INSTITUTION_TOKEN": (
+            benchmarks.simulator.ELSEVIER_INST_TOKEN
+        ),
+        "DOIGET_TDM_WILEY_TDM_CLIENT_TOKEN": benchmarks.simulator.WILEY_TOKEN,
+        "DOIGET_TDM_WILEY_API_BASE_URL": f"{base_url}wiley/",
+        "DOIGET_TDM_WILEY_N_REQUESTS_PER_TEN_MINUTES": "100000",
+        "DOIGET_TDM_SPRINGER_NATURE_API_BASE_URL": f"{base_url}springer",
+        "DOIGET_TDM_SPRINGER_NATURE_API_KEY": benchmarks.simulator.SPRINGER_API_KEY,
+        "DOIGET_TDM_SPRINGER_NATURE_API_SUFFIX": (
+            benchmarks.simulator.SPRINGER_API_SUFFIX
+        ),
+        "DOIGET_TDM_SPRINGER_NATURE_N_REQUESTS_PER_DAY": "100000",
+    }
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS)
+def test_acquire(
+    scenario: str,
+    offline_env: dict[str, str],
+    tmp_path: pathlib.Path,
+    n_dois: int,
+    record_timing: benchmarks.conftest.RecordTiming,
+    record_metric: benchmarks.conftest.RecordMetric,
+) -> None:
+    """
+    Throughput, per-DOI duration, and peak memory of acquiring metadata and
+    full-text content.
+    """
+
+    with benchmarks.simulator.PublisherSimulator(
+        config=SCENARIOS[scenario]
+    ) as simulator:
+
+        env = simulator_env(base_env=offline_env, base_url=simulator.base_url)
+
+        result = run_driver(
+            env=env,
+            data_dir=tmp_path / "timing",
+            n_dois=n_dois,
+            start=0,
+        )
+
+        # use a distinct set of DOIs, so that nothing is already acquired
+        memory_result = run_driver(
+            env=env,
+            data_dir=tmp_path / "memory",
+            n_dois=n_dois,
+            start=n_dois,
+            trace_memory=True,
+        )
+
+        stats = dict(simulator.stats)
+
+    durations_s = result["durations_s"]
+
+    assert len(durations_s) == n_dois
+
+    # every DOI should reach the simulator for its metadata
+    assert stats["works_requests"] >= 2 * n_dois
+
+    quantiles = statistics.quantiles(durations_s, n=100, method="inclusive")
+
+    record_metric(
+        "Acquisition throughput",
+        scenario,
+        n_dois / result["total_s"],
+        "DOIs/s",
+    )
+    record_timing("Acquisition per-DOI duration (p50)", scenario, quantiles[49])
+    record_timing("Acquisition per-DOI duration (p99)", scenario, quantiles[98])
+    record_metric(
+        "Acquisition peak traced memory",
+        scenario,
+        memory_result["peak_memory_bytes"] / 2**20,
+        "MiB",
+    )
@@ -0,0 +1,139 @@
+"""
+Import-time and startup benchmarks.
+
+These are run separately from the tests (``pytest benchmarks``), with each
+measurement made in a fresh Python process so that nothing is already imported.
+The minimum across repeats is reported in a summary at the end of the run.
+"""
+
+import pkgutil
+
+import pytest
+
+import doiget_tdm
+import doiget_tdm.publishers
+
+import benchmarks.conftest
+
+
+MODULES = [
+    "doiget_tdm",
+    *sorted(
+        f"doiget_tdm.{module_info.name}"
+        for module_info in pkgutil.iter_modules(doiget_tdm.__path__)
+    ),
+]
+
+COMMANDS = [
+    ["--help"],
+    ["show-config"],
+    ["status"],
+    ["show-doi-data-path", "10.3758/s13414-023-02718-0"],
+    ["acquire", "--help"],
+    ["revalidate", "--n-workers", "1"],
+]
+
+MEMBER_IDS = sorted(doiget_tdm.publishers.MANIFEST, key=int)
+
+#: Showing the help is the floor for every command, so it is held to a fixed target
+#: (in seconds) rather than only being reported.
+HELP_STARTUP_TARGET_S = 0.2
+
+
+def parse_import_time(stderr: str, module: str) -> float:
+    """
+    Extract the cumulative import time, in seconds, of a module from the output of
+    ``python -X importtime``.
+    """
+
+    for line in stderr.splitlines():
+
+        if not line.startswith("import time:"):
+            continue
+
+        (_, cumulative, name) = (
+            part.strip() for part in line.removeprefix("import time:").split("|")
+        )
+
+        if name == module:
+            return int(cumulative) / 1e6
+
+    raise ValueError(f"No import time found for {module}")
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import_time(
+    module: str,
+    run_repeated: benchmarks.conftest.RunRepeated,
+    record_timing: benchmarks.conftest.RecordTiming,
+) -> None:
+    """
+    The cumulative time attributed to each module by ``python -X importtime``.
+
+    Because the ``doiget_tdm`` package is imported first, the time for a submodule
+    that the package itself imports is part of the package import, while the time
+    for any other submodule is in addition to the package import.
+    """
+
+    runs = run_repeated(["-X", "importtime", "-c", f"import {module}"])
+
+    duration_s = min(
+        parse_import_time(stderr=completed.stderr, module=module)
+        for (_, completed) in runs
+    )
+
+    record_timing("Import time per module", module, duration_s)
+
+
+@pytest.mark.parametrize("args", COMMANDS, ids=" ".join)
+def test_command_startup(
+    args: list[str],
+    run_repeated: benchmarks.conftest.RunRepeated,
+    record_timing: benchmarks.conftest.RecordTiming,
+) -> None:
+    """
+    The wall-clock time to run each (offline) command.
+    """
+
+    runs = run_repeated(
+        ["-c", "import doiget_tdm.cli; doiget_tdm.cli.main()", *args],
+    )
+
+    duration_s = min(duration_s for (duration_s, _) in runs)
+
+    record_timing("Startup time per command", " ".join(args), duration_s)
+
+    if args == ["--help"]:
+        assert duration_s < HELP_STARTUP_TARGET_S
+
+
+@pytest.mark.parametrize("member_id", MEMBER_IDS)
+def test_handler_load(
+    member_id: str,
+    run_repeated: benchmarks.conftest.RunRepeated,
+    record_timing: benchmarks.conftest.RecordTiming,
+) -> None:
+    """
+    The time to import and initialise each publisher handler, after the
+    ``doiget_tdm.publishers`` package has been imported.
+    """
+
+    code = (
+        "import time; import doiget_tdm.metadata; import doiget_tdm.publishers; "
+        + "start = time.perf_counter(); "
+        + "doiget_tdm.publishers.load_handler("
+        + f"member_id=doiget_tdm.metadata.MemberID(id_='{member_id}')); "
+        + "print(time.perf_counter() - start)"
+    )
+
+    runs = run_repeated(["-c", code])
+
+    duration_s = min(float(completed.stdout.split()[-1]) for (_, completed) in runs)
+
+    module_name = doiget_tdm.publishers.MANIFEST[member_id]
+
+    record_timing(
+        "Handler load time per publisher",
+        f"{module_name} ({member_id})",
+        duration_s,
+    )
@@ -1,24 +1,29 @@
-import sys
+"""
+Download metadata and full-text for articles given their DOIs.
 
-try:
-    import doiget_tdm.config
-except Exception as err:
-    print(err)
-    sys.exit(1)
+Notes
+-----
+* The settings and the commonly-used classes are only imported when they are first
+  accessed, so that importing the package (such as by the command-line interface,
+  to show its help) does not load the settings and their dependencies.
 
-import doiget_tdm.log
+"""
 
-__version__ = "0.1.0"
-_project_url = "https://github.com/unimelbmdap/doiget-tdm"
+from __future__ import annotations
+
+import importlib
+import typing
 
-doiget_tdm.log.setup_logging()
+if typing.TYPE_CHECKING:
+    from doiget_tdm.config import Settings
+    from doiget_tdm.data import iter_unsorted_works
+    from doiget_tdm.doi import DOI
+    from doiget_tdm.work import Work
 
-SETTINGS = doiget_tdm.config.SETTINGS
+    SETTINGS: Settings
 
-from doiget_tdm.doi import DOI  # noqa: E402
-from doiget_tdm.work import Work  # noqa: E402
-from doiget_tdm.data import iter_unsorted_works  # noqa: E402
-import doiget_tdm.publishers  # noqa: E402
+__version__ = "0.1.0"
+_project_url = "https://github.com/unimelbmdap/doiget-tdm"
 
 __all__ = (
     "DOI",
@@ -26,3 +31,26 @@ __all__ = (
     "Work",
     "iter_unsorted_works",
 )
+
+# the module that provides each of the lazily-imported attributes
+_LAZY_ATTRIBUTES = {
+    "DOI": "doiget_tdm.doi",
+    "SETTINGS": "doiget_tdm.config",
+    "Work": "doiget_tdm.work",
+    "iter_unsorted_works": "doiget_tdm.data",
+}
+
+
+def __getattr__(name: str) -> typing.Any:  # noqa: ANN401
+
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg) from None
+
+    value = getattr(importlib.import_module(module_name), name)
+
+    globals()[name] = value
+
+    return value
@@ -1,48 +1,232 @@
 from __future__ import annotations
 
-import typing
 import collections.abc
+import logging
+import pathlib
+import typing
 
 import alive_progress
 
 import doiget_tdm.doi
+import doiget_tdm.fulltext
 import doiget_tdm.work
 import doiget_tdm.metadata
+import doiget_tdm.metrics
+import doiget_tdm.quota
+import doiget_tdm.timing
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+
+#: Number of grouped works that are passed to their publisher handler to prefetch at
+#: a time.
+PREFETCH_BATCH_SIZE = 40
 
 
 def run(
-    dois: typing.Sequence[doiget_tdm.doi.DOI],
+    dois: collections.abc.Iterable[doiget_tdm.doi.DOI],
     only_metadata: bool,
     start_from: int = 1,
     only_member_ids: (
         collections.abc.Container[doiget_tdm.metadata.MemberID] | None
     ) = None,
     show_progress_bar: bool = True,
+    show_timings: bool = True,
+    timings_path: pathlib.Path | None = None,
+    metrics_port: int | None = None,
+) -> None:
+
+    # only report on the timings and metrics from this run
+    doiget_tdm.timing.TIMINGS.reset()
+    doiget_tdm.metrics.METRICS.reset()
+
+    metrics_server = (
+        doiget_tdm.metrics.serve(port=metrics_port)
+        if metrics_port is not None
+        else None
+    )
+
+    try:
+        _run(
+            dois=dois,
+            only_metadata=only_metadata,
+            start_from=start_from,
+            only_member_ids=only_member_ids,
+            show_progress_bar=show_progress_bar,
+        )
+    finally:
+        if metrics_server is not None:
+            metrics_server.shutdown()
+            metrics_server.server_close()
+
+    if show_timings:
+        doiget_tdm.timing.TIMINGS.print_summary()
+
+    if timings_path is not None:
+        doiget_tdm.timing.TIMINGS.write(output_path=timings_path)
+
+
+def _run(
+    dois: collections.abc.Iterable[doiget_tdm.doi.DOI],
+    only_metadata: bool,
+    start_from: int,
+    only_member_ids: collections.abc.Container[doiget_tdm.metadata.MemberID] | None,
+    show_progress_bar: bool,
 ) -> None:
 
-    n_dois = len(dois)
+    # `dois` can be a lazy iterator, in which case the total is unknown
+    n_dois = len(dois) if isinstance(dois, collections.abc.Sized) else None
 
     progress_bar_disabled = not show_progress_bar or n_dois == 1
 
+    # the DOIs (and their number within the input) for which the acquisition of
+    # full-text content is pending, keyed by their acquisition group; each group is
+    # acquired once it has a full batch, so that only a few DOIs are ever pending
+    pending: dict[str, list[tuple[int, doiget_tdm.doi.DOI]]] = {}
+
+    # the number of DOIs that were skipped because a quota was exhausted
+    n_skipped: collections.Counter[doiget_tdm.quota.Quota] = collections.Counter()
+
+    doi_num = start_from
+
     with alive_progress.alive_bar(
         total=n_dois,
         disable=progress_bar_disabled,
     ) as progress_bar:
 
-        for doi_num, doi in enumerate(dois, 1):
+        try:
+
+            for doi_num, doi in enumerate(dois, 1):
+
+                if doi_num < start_from:
+                    progress_bar()
+                    continue
+
+                group = process_doi(
+                    doi=doi,
+                    only_metadata=only_metadata,
+                    only_member_ids=only_member_ids,
+                    group_works=True,
+                )
+
+                if group is None:
+                    doiget_tdm.metrics.METRICS.add_doi_processed()
+                    progress_bar()
+                    continue
+
+                group_pending = pending.setdefault(group, [])
 
-            if doi_num < start_from:
-                progress_bar()
-                continue
+                group_pending.append((doi_num, doi))
 
-            process_doi(
-                doi=doi,
-                only_metadata=only_metadata,
-                only_member_ids=only_member_ids,
+                if len(group_pending) >= PREFETCH_BATCH_SIZE:
+                    acquire_batch(
+                        dois=[doi for (_, doi) in group_pending],
+                        progress_bar=progress_bar,
+                        n_skipped=n_skipped,
+                    )
+                    del pending[group]
+
+            for group, group_pending in list(pending.items()):
+                acquire_batch(
+                    dois=[doi for (_, doi) in group_pending],
+                    progress_bar=progress_bar,
+                    n_skipped=n_skipped,
+                )
+                del pending[group]
+
+        except BaseException:
+            # the pending DOIs have not been acquired, so a resumed run needs to
+            # start from the earliest of them
+            n_resume = min(
+                [doi_num]
+                + [
+                    num
+                    for group_pending in pending.values()
+                    for (num, _) in group_pending
+                ]
             )
+            LOGGER.warning(
+                "Acquisition was interrupted; it can be resumed by starting from "
+                + f"DOI number {n_resume} (such as with `--start-from {n_resume}`)"
+            )
+            raise
+
+    for quota, n_quota_skipped in n_skipped.items():
+        LOGGER.warning(
+            f"The quota for {quota.name} was exhausted; skipped {n_quota_skipped} "
+            + "DOIs, which can be acquired after "
+            + f"{doiget_tdm.quota.get_reset_time(quota=quota)}"
+        )
+
+
+def acquire_batch(
+    dois: collections.abc.Sequence[doiget_tdm.doi.DOI],
+    progress_bar: typing.Callable[[], typing.Any],
+    n_skipped: collections.Counter[doiget_tdm.quota.Quota],
+) -> None:
+    """
+    Acquire the full-text content for a batch of DOIs from the same acquisition
+    group, allowing their publisher handler to begin acquiring them ahead of time.
 
+    Parameters
+    ----------
+    dois
+        The DOIs.
+    progress_bar
+        Called for each DOI, once it has been processed.
+    n_skipped
+        Counts of the DOIs that are skipped because the quota of their publisher
+        handler is exhausted; this is updated in place.
+    """
+
+    quota = doiget_tdm.work.Work(doi=dois[0]).fulltext.get_quota()
+
+    if quota is not None:
+
+        dois = prioritise_dois(dois=dois)
+
+        n_allowed = int(min(len(dois), doiget_tdm.quota.get_n_works_allowed(quota)))
+
+        for _ in dois[n_allowed:]:
+            doiget_tdm.metrics.METRICS.add_doi_processed()
             progress_bar()
 
+        n_skipped[quota] += len(dois) - n_allowed
+
+        dois = dois[:n_allowed]
+
+    works = [doiget_tdm.work.Work(doi=doi) for doi in dois]
+
+    doiget_tdm.fulltext.prefetch(fulltexts=[work.fulltext for work in works])
+
+    for work in works:
+
+        work.fulltext.acquire()
+
+        doiget_tdm.metrics.METRICS.add_doi_processed()
+
+        progress_bar()
+
+
+def prioritise_dois(
+    dois: collections.abc.Sequence[doiget_tdm.doi.DOI],
+) -> list[doiget_tdm.doi.DOI]:
+    """
+    Order DOIs so that those without any full-text content are acquired first.
+
+    Parameters
+    ----------
+    dois
+        The DOIs.
+
+    Returns
+    -------
+        The DOIs, in their original order within the two sets of DOIs.
+    """
+    return sorted(dois, key=lambda doi: doiget_tdm.work.Work(doi=doi).fulltext.exists)
+
 
 def process_doi(
     doi: doiget_tdm.doi.DOI,
@@ -50,15 +234,68 @@ def process_doi(
     only_member_ids: (
         collections.abc.Container[doiget_tdm.metadata.MemberID] | None
     ) = None,
-) -> None:
+    group_works: bool = False,
+) -> str | None:
+    """
+    Acquire the metadata and full-text content for a DOI.
+
+    Parameters
+    ----------
+    doi
+        The DOI.
+    only_metadata
+        Whether to only acquire the metadata.
+    only_member_ids
+        If provided, full-text content is only acquired for DOIs with these member
+        IDs.
+    group_works
+        Whether the acquisition of full-text content for a DOI that is part of an
+        acquisition group (see ``Publisher.get_acquire_group``) is left to the
+        caller, so that it can be acquired along with the rest of its group.
+
+    Returns
+    -------
+        The acquisition group, if the acquisition of full-text content was left to
+        the caller; otherwise, ``None``.
+    """
 
     work = doiget_tdm.work.Work(doi=doi)
 
     if not work.metadata.exists:
         work.metadata.acquire()
 
+    else:
+
+        # a metadata file that cannot be read only affects its own DOI
+        try:
+            is_placeholder = work.metadata.is_placeholder
+        except Exception as err:
+            LOGGER.error(f"Unable to read the metadata for {doi} ({err}); skipping")
+            return None
+
+        # placeholder metadata (such as from ingesting the PLoS corpus) is replaced
+        # with the CrossRef metadata, if it can be acquired
+        if is_placeholder:
+            try:
+                work.metadata.acquire()
+            except ValueError as err:
+                LOGGER.warning(
+                    f"Unable to replace the placeholder metadata for {doi} ({err})"
+                )
+
     if only_member_ids is not None and work.metadata.member_id not in only_member_ids:
-        return
+        return None
 
-    if not only_metadata:
-        work.fulltext.acquire()
+    if only_metadata:
+        return None
+
+    if group_works:
+
+        group = work.fulltext.get_acquire_group()
+
+        if group is not None:
+            return group
+
+    work.fulltext.acquire()
+
+    return None
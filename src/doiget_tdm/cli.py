@@ -5,15 +5,19 @@ Handles the command-line interface (CLI).
 from __future__ import annotations
 
 import argparse
+import itertools
 import pathlib
 import logging
 import sys
 
 import doiget_tdm
-import doiget_tdm.acquire
-import doiget_tdm.status
-import doiget_tdm.paths
-import doiget_tdm.publisher
+
+# the modules that implement the commands (such as `doiget_tdm.acquire`,
+# `doiget_tdm.status`, `doiget_tdm.revalidate`, and, for `ingest`, the
+# `doiget_tdm.publishers._apa` or `doiget_tdm.publishers._plos` handler), and the
+# settings themselves, are imported when the command is run, so that showing the
+# help doesn't need to load them and their dependencies don't slow down the other
+# commands
 
 
 LOGGER = logging.getLogger(__name__)
@@ -27,7 +31,10 @@ def main() -> None:
     parsed_args = parser.parse_args()
 
     try:
-        run(args=parsed_args)
+        if parsed_args.profile:
+            run_profiled(args=parsed_args)
+        else:
+            run(args=parsed_args)
     except Exception as err:
         print(err)
         if parsed_args.debug:
@@ -49,6 +56,24 @@ def setup_parser() -> argparse.ArgumentParser:
         help="Print error tracebacks",
     )
 
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=False,
+        help="Profile the command, writing the report(s) to the cache directory",
+    )
+
+    parser.add_argument(
+        "--profiler",
+        default="cprofile",
+        choices=["cprofile", "sampling"],
+        help=(
+            "Profiler used with '--profile'; 'cprofile' writes a pstats file and "
+            + "sampled call stacks (in collapsed format), while 'sampling' has "
+            + "lower overhead and only writes the sampled call stacks"
+        ),
+    )
+
     subparsers = parser.add_subparsers(dest="command")
 
     _ = subparsers.add_parser(
@@ -70,6 +95,23 @@ def setup_parser() -> argparse.ArgumentParser:
         help="Path to write output, in CSV format.",
     )
 
+    status_parser.add_argument(
+        "--full",
+        action="store_true",
+        default=False,
+        help=(
+            "Rebuild the status of every work, rather than only those with "
+            + "directories that have changed since the previous run"
+        ),
+    )
+
+    status_parser.add_argument(
+        "--n-workers",
+        type=int,
+        required=False,
+        help="Number of worker processes; defaults to the number of CPUs",
+    )
+
     status_parser.add_argument(
         "dois",
         nargs="*",  # zero or more
@@ -106,6 +148,27 @@ def setup_parser() -> argparse.ArgumentParser:
         type=int,
     )
 
+    acquire_parser.add_argument(
+        "--timings-path",
+        type=pathlib.Path,
+        required=False,
+        help=(
+            "Path to write the time spent in each acquisition stage, in "
+            + "Prometheus textfile format if the suffix is '.prom' and in JSON "
+            + "format otherwise"
+        ),
+    )
+
+    acquire_parser.add_argument(
+        "--metrics-port",
+        type=int,
+        required=False,
+        help=(
+            "Serve live acquisition metrics, in Prometheus format, on this local "
+            + "port (at the '/metrics' path)"
+        ),
+    )
+
     acquire_parser.add_argument(
         "dois",
         nargs="+",  # one or more
@@ -124,6 +187,107 @@ def setup_parser() -> argparse.ArgumentParser:
         help="Either a sequence of DOIs or the path to a file containing DOIs",
     )
 
+    revalidate_parser = subparsers.add_parser(
+        "revalidate",
+        help="Re-validate the full-text content in the data directory",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+
+    revalidate_parser.add_argument(
+        "--output-path",
+        type=pathlib.Path,
+        required=False,
+        help=(
+            "Path to write the report of validation failures, in Parquet format; "
+            + "defaults to a timestamped file in the cache directory."
+        ),
+    )
+
+    revalidate_parser.add_argument(
+        "--quarantine-dir",
+        type=pathlib.Path,
+        required=False,
+        help="Move full-text files that fail validation into this directory",
+    )
+
+    revalidate_parser.add_argument(
+        "--n-workers",
+        type=int,
+        required=False,
+        help="Number of worker processes; defaults to the number of CPUs",
+    )
+
+    revalidate_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=64,
+        help="Number of works sent to a worker process at a time",
+    )
+
+    ingest_parser = subparsers.add_parser(
+        "ingest",
+        help=(
+            "Write the full-text content for DOIs into the data directory by "
+            + "unpacking a local publisher archive in bulk"
+        ),
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+
+    ingest_parser.add_argument(
+        "publisher",
+        choices=["apa", "plos"],
+        help="Publisher whose archive is ingested",
+    )
+
+    ingest_parser.add_argument(
+        "--n-workers",
+        type=int,
+        required=False,
+        help="Number of worker processes; defaults to the number of CPUs",
+    )
+
+    ingest_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=256,
+        help="Number of files sent to a worker process at a time (only for 'plos')",
+    )
+
+    ingest_parser.add_argument(
+        "dois",
+        nargs="*",  # zero or more
+        help=(
+            "Either a sequence of DOIs or the path to a file containing DOIs. If not "
+            + "provided: for 'plos', all the DOIs in the corpus file are ingested; for "
+            + "'apa', the files in the data archive are ingested for the APA works "
+            + "whose metadata is in the data directory (as the files are only named "
+            + "by their APA IDs, which are matched via the metadata)"
+        ),
+    )
+
+    train_parser = subparsers.add_parser(
+        "train-metadata-dictionary",
+        help=(
+            "Train a dictionary for compressing metadata with the 'zstd' codec, "
+            + "from the metadata in the data directory"
+        ),
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+
+    train_parser.add_argument(
+        "--output-path",
+        type=pathlib.Path,
+        required=True,
+        help="Path to write the dictionary",
+    )
+
+    train_parser.add_argument(
+        "--n-samples",
+        type=int,
+        default=10_000,
+        help="Maximum number of metadata files to train on",
+    )
+
     return parser
 
 
@@ -148,17 +312,43 @@ def run(args: argparse.Namespace) -> None:
     elif args.command == "show-doi-data-path":
         run_show_doi_data_path(args=args)
 
+    elif args.command == "revalidate":
+        run_revalidate(args=args)
+
+    elif args.command == "ingest":
+        run_ingest(args=args)
+
+    elif args.command == "train-metadata-dictionary":
+        run_train_metadata_dictionary(args=args)
+
     else:
         raise ValueError(f"Unexpected command: {args.command}")
 
 
+def run_profiled(args: argparse.Namespace) -> None:
+
+    import doiget_tdm.profiling
+
+    with doiget_tdm.profiling.profile(
+        name=args.command or "help",
+        profiler_name=doiget_tdm.profiling.ProfilerName(args.profiler),
+    ):
+        run(args=args)
+
+
 def run_show_config() -> None:
+
+    import doiget_tdm.publisher
+
     doiget_tdm.SETTINGS.print()
     doiget_tdm.publisher.print_publisher_settings()
 
 
 def run_status(args: argparse.Namespace) -> None:
 
+    import doiget_tdm.doi
+    import doiget_tdm.status
+
     dois = (
         None
         if len(args.dois) == 0
@@ -168,12 +358,18 @@ def run_status(args: argparse.Namespace) -> None:
     doiget_tdm.status.run(
         dois=dois,
         output_path=args.output_path,
+        full=args.full,
+        n_workers=args.n_workers,
     )
 
 
 def run_acquire(args: argparse.Namespace) -> None:
 
-    dois = doiget_tdm.doi.form_dois_from_input(raw_input=args.dois)
+    import doiget_tdm.acquire
+    import doiget_tdm.doi
+    import doiget_tdm.metadata
+
+    dois = doiget_tdm.doi.iter_dois_from_input(raw_input=args.dois)
 
     only_member_ids: list[doiget_tdm.metadata.MemberID] | None
 
@@ -190,11 +386,69 @@ def run_acquire(args: argparse.Namespace) -> None:
         only_metadata=args.only_metadata,
         start_from=args.start_from,
         only_member_ids=only_member_ids,
+        timings_path=args.timings_path,
+        metrics_port=args.metrics_port,
     )
 
 
 def run_show_doi_data_path(args: argparse.Namespace) -> None:
 
-    dois = doiget_tdm.doi.form_dois_from_input(raw_input=args.dois)
+    import doiget_tdm.doi
+    import doiget_tdm.paths
+
+    dois = doiget_tdm.doi.iter_dois_from_input(raw_input=args.dois)
 
     doiget_tdm.paths.run_show_doi_data_path(dois=dois)
+
+
+def run_revalidate(args: argparse.Namespace) -> None:
+
+    import doiget_tdm.revalidate
+
+    doiget_tdm.revalidate.run(
+        output_path=args.output_path,
+        quarantine_dir=args.quarantine_dir,
+        n_workers=args.n_workers,
+        chunk_size=args.chunk_size,
+    )
+
+
+def run_ingest(args: argparse.Namespace) -> None:
+
+    import doiget_tdm.doi
+
+    dois = (
+        doiget_tdm.doi.iter_dois_from_input(raw_input=args.dois) if args.dois else None
+    )
+
+    if args.publisher == "apa":
+        import doiget_tdm.publishers._apa
+
+        doiget_tdm.publishers._apa.ingest(dois=dois, n_workers=args.n_workers)
+    elif args.publisher == "plos":
+        import doiget_tdm.publishers._plos
+
+        doiget_tdm.publishers._plos.ingest(
+            dois=dois,
+            n_workers=args.n_workers,
+            chunk_size=args.chunk_size,
+        )
+    else:
+        raise ValueError(f"Unexpected publisher: {args.publisher}")
+
+
+def run_train_metadata_dictionary(args: argparse.Namespace) -> None:
+
+    import doiget_tdm.codec
+    import doiget_tdm.data
+
+    works = doiget_tdm.data.iter_unsorted_works(
+        test_if_valid_work=lambda work: work.metadata.exists,
+    )
+
+    doiget_tdm.codec.train_zstd_dictionary(
+        samples=(
+            work.metadata.read() for work in itertools.islice(works, args.n_samples)
+        ),
+        output_path=args.output_path,
+    )
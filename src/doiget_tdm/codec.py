@@ -0,0 +1,320 @@
+"""
+Codecs for compressing the metadata that is stored in the data directory.
+"""
+
+from __future__ import annotations
+
+import collections.abc
+import abc
+import functools
+import logging
+import pathlib
+import zlib
+
+try:
+    import zstandard  # type: ignore[import-not-found, import-untyped]
+except ImportError:
+    HAS_ZSTD = False
+else:
+    HAS_ZSTD = True
+
+try:
+    import lz4.frame  # type: ignore[import-not-found, import-untyped]
+except ImportError:
+    HAS_LZ4 = False
+else:
+    HAS_LZ4 = True
+
+import doiget_tdm.config
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+
+class Codec(abc.ABC):
+    """
+    Abstract base class for compression codecs.
+    """
+
+    #: The codec name.
+    name: doiget_tdm.config.CodecName
+    #: Suffix for files compressed with the codec.
+    suffix: str
+
+    @abc.abstractmethod
+    def compress(self, data: bytes, level: int = -1) -> bytes:
+        """
+        Compress data.
+
+        Parameters
+        ----------
+        data
+            The uncompressed data.
+        level
+            Compression level; ``-1`` uses the default level of the codec.
+
+        Returns
+        -------
+            The compressed data.
+        """
+        pass
+
+    @abc.abstractmethod
+    def decompress(self, data: bytes) -> bytes:
+        """
+        Decompress data.
+
+        Parameters
+        ----------
+        data
+            The compressed data.
+
+        Returns
+        -------
+            The uncompressed data.
+        """
+        pass
+
+    @classmethod
+    @abc.abstractmethod
+    def is_compressed(cls, data: bytes) -> bool:
+        """
+        Whether the header of some data indicates that it was compressed with
+        this codec.
+
+        Parameters
+        ----------
+        data
+            The data, or at least its first few bytes.
+        """
+        pass
+
+
+class ZlibCodec(Codec):
+
+    name = doiget_tdm.config.CodecName.ZLIB
+    suffix = ".gz"
+
+    def compress(self, data: bytes, level: int = -1) -> bytes:
+        return zlib.compress(data, level=level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+    @classmethod
+    def is_compressed(cls, data: bytes) -> bool:
+        # compression method of 'deflate' with a 32K window, and a valid checksum
+        # across the first two bytes
+        return (
+            len(data) >= 2
+            and data[0] == 0x78
+            and int.from_bytes(data[:2], byteorder="big") % 31 == 0
+        )
+
+
+class ZstdCodec(Codec):
+
+    name = doiget_tdm.config.CodecName.ZSTD
+    suffix = ".zst"
+
+    _MAGIC = b"\x28\xb5\x2f\xfd"
+
+    def __init__(self, dictionary_path: pathlib.Path | None = None) -> None:
+        """
+        The Zstandard codec.
+
+        Parameters
+        ----------
+        dictionary_path
+            Path to a compression dictionary (see ``train_zstd_dictionary``). The
+            same dictionary is required to decompress the data.
+        """
+
+        if not HAS_ZSTD:
+            raise ValueError("The package `zstandard` is required for the 'zstd' codec")
+
+        self._dictionary = (
+            zstandard.ZstdCompressionDict(dictionary_path.read_bytes())
+            if dictionary_path is not None
+            else None
+        )
+
+        self._decompressor = zstandard.ZstdDecompressor(dict_data=self._dictionary)
+
+    def compress(self, data: bytes, level: int = -1) -> bytes:
+
+        # 3 is the default level of the Zstandard library
+        compressor = zstandard.ZstdCompressor(
+            level=3 if level == -1 else level,
+            dict_data=self._dictionary,
+        )
+
+        compressed: bytes = compressor.compress(data)
+
+        return compressed
+
+    def decompress(self, data: bytes) -> bytes:
+        decompressed: bytes = self._decompressor.decompress(data)
+        return decompressed
+
+    @classmethod
+    def is_compressed(cls, data: bytes) -> bool:
+        return data.startswith(cls._MAGIC)
+
+
+class Lz4Codec(Codec):
+
+    name = doiget_tdm.config.CodecName.LZ4
+    suffix = ".lz4"
+
+    _MAGIC = b"\x04\x22\x4d\x18"
+
+    def __init__(self) -> None:
+        """
+        The LZ4 (frame format) codec.
+        """
+
+        if not HAS_LZ4:
+            raise ValueError("The package `lz4` is required for the 'lz4' codec")
+
+    def compress(self, data: bytes, level: int = -1) -> bytes:
+
+        compressed: bytes = lz4.frame.compress(
+            data,
+            compression_level=0 if level == -1 else level,
+        )
+
+        return compressed
+
+    def decompress(self, data: bytes) -> bytes:
+        decompressed: bytes = lz4.frame.decompress(data)
+        return decompressed
+
+    @classmethod
+    def is_compressed(cls, data: bytes) -> bool:
+        return data.startswith(cls._MAGIC)
+
+
+#: Suffixes of the files written by each codec.
+SUFFIXES: dict[doiget_tdm.config.CodecName, str] = {
+    doiget_tdm.config.CodecName.ZLIB: ZlibCodec.suffix,
+    doiget_tdm.config.CodecName.ZSTD: ZstdCodec.suffix,
+    doiget_tdm.config.CodecName.LZ4: Lz4Codec.suffix,
+}
+
+
+@functools.cache
+def get_codec(name: doiget_tdm.config.CodecName) -> Codec:
+    """
+    Form a codec.
+
+    Parameters
+    ----------
+    name
+        The codec name.
+
+    Returns
+    -------
+        The codec; it is only formed on the first call with a given name.
+    """
+
+    if name == doiget_tdm.config.CodecName.ZLIB:
+        return ZlibCodec()
+
+    if name == doiget_tdm.config.CodecName.ZSTD:
+        return ZstdCodec(
+            dictionary_path=doiget_tdm.config.SETTINGS.metadata_zstd_dictionary_path
+        )
+
+    if name == doiget_tdm.config.CodecName.LZ4:
+        return Lz4Codec()
+
+    raise ValueError(f"Unknown codec: {name}")
+
+
+def detect_codec(data: bytes) -> doiget_tdm.config.CodecName | None:
+    """
+    Identify the codec that was used to compress some data, from its header.
+
+    Parameters
+    ----------
+    data
+        The data, or at least its first few bytes.
+
+    Returns
+    -------
+        The codec name, or ``None`` if the data does not seem to be compressed.
+    """
+
+    # the codec classes are used (rather than instances), so that the detection
+    # does not depend on their optional packages being available
+    codec_classes: tuple[type[Codec], ...] = (ZstdCodec, Lz4Codec, ZlibCodec)
+
+    for codec_class in codec_classes:
+        if codec_class.is_compressed(data=data):
+            return codec_class.name
+
+    return None
+
+
+def decompress(data: bytes) -> bytes:
+    """
+    Decompress data with the codec identified from its header.
+
+    Parameters
+    ----------
+    data
+        The (possibly) compressed data.
+
+    Returns
+    -------
+        The uncompressed data; if the data does not seem to be compressed, it is
+        returned unchanged.
+    """
+
+    name = detect_codec(data=data)
+
+    return data if name is None else get_codec(name=name).decompress(data=data)
+
+
+def train_zstd_dictionary(
+    samples: collections.abc.Iterable[bytes],
+    output_path: pathlib.Path,
+    dictionary_size: int = 112_640,
+) -> None:
+    """
+    Train a Zstandard compression dictionary on examples of (uncompressed) metadata.
+
+    Parameters
+    ----------
+    samples
+        The training examples.
+    output_path
+        File to write the dictionary.
+    dictionary_size
+        Size of the dictionary, in bytes.
+
+    Notes
+    -----
+    * Metadata that has been compressed with a dictionary can only be read with
+      that same dictionary, so the ``metadata_zstd_dictionary_path`` setting should
+      not be changed once metadata has been written with it.
+
+    """
+
+    if not HAS_ZSTD:
+        raise ValueError("The package `zstandard` is required to train a dictionary")
+
+    sample_list: list[bytes | bytearray | memoryview] = list(samples)
+
+    LOGGER.info(f"Training a dictionary on {len(sample_list)} samples")
+
+    dictionary = zstandard.train_dictionary(
+        dict_size=dictionary_size,
+        samples=sample_list,
+    )
+
+    output_path.write_bytes(dictionary.as_bytes())
+
+    LOGGER.info(f"Wrote dictionary to {output_path}")
@@ -14,11 +14,60 @@ import pydantic_settings
 
 import platformdirs
 
-import rich
+NAME = "doiget_tdm"
 
-import doiget_tdm.format
 
-NAME = "doiget_tdm"
+class CodecName(enum.Enum):
+    """
+    Available codecs for compressing the metadata (see ``doiget_tdm.codec``).
+    """
+
+    #: Compatible with metadata written by earlier versions.
+    ZLIB = "zlib"
+    #: Good compression and fast decompression, particularly with a dictionary that
+    #: has been trained on CrossRef metadata; requires the ``zstandard`` package.
+    ZSTD = "zstd"
+    #: Fastest compression and decompression, with lower compression ratios;
+    #: requires the ``lz4`` package.
+    LZ4 = "lz4"
+
+
+class FormatName(enum.Enum):
+    """
+    Possible full-text content formats (see ``doiget_tdm.format``).
+    """
+
+    XML = "xml"
+    PDF = "pdf"
+    HTML = "html"
+    TXT = "txt"
+    TIFF = "tiff"
+
+    @classmethod
+    def from_content_type(
+        cls: type[FormatName],
+        content_type: str,
+    ) -> FormatName:
+        """
+        Return the format name from a content type.
+
+        Parameters
+        ----------
+        content_type
+            The MIME type of the content.
+
+        """
+
+        lut = {
+            "application/pdf": "pdf",
+            "text/html": "html",
+            "text/plain": "txt",
+            "application/xml": "xml",
+            "text/xml": "xml",
+            "image/tiff": "tiff",
+        }
+
+        return cls(lut[content_type])
 
 
 class Platform(enum.Enum):
@@ -87,9 +136,9 @@ class Settings(pydantic_settings.BaseSettings):
 
     crossref_lmdb_path: pathlib.Path | None = None
 
-    format_preference_order: tuple[doiget_tdm.format.FormatName, ...] = tuple(
-        doiget_tdm.format.FormatName
-    )
+    crossref_api_url: str = "https://api.crossref.org/"
+
+    format_preference_order: tuple[FormatName, ...] = tuple(FormatName)
 
     skip_remaining_formats: bool = True
 
@@ -97,10 +146,15 @@ class Settings(pydantic_settings.BaseSettings):
 
     hostname: str = socket.gethostname()
 
-    # level of metadata compression; -1 is default, 0 is no compression,
-    # 9 is highest compression (slowest)
+    # level of metadata compression; -1 is the default level of the codec, 0 stores
+    # the metadata without using the codec, and a positive number is a level whose
+    # meaning is specific to the codec (see the configuration docs)
     metadata_compression_level: int = 0
 
+    metadata_codec: CodecName = CodecName.ZLIB
+
+    metadata_zstd_dictionary_path: pydantic.FilePath | None = None
+
     model_config = pydantic_settings.SettingsConfigDict(
         env_file=".env",
         env_prefix=f"{NAME.upper()}_",
@@ -130,6 +184,9 @@ class Settings(pydantic_settings.BaseSettings):
 
     def print(self) -> None:
 
+        # deferred import, as it is only needed when showing the settings
+        import rich
+
         rich.print("\n[bold underline]Global settings[/bold underline]\n")
 
         settings_dict = {"config_dir": BASE_CONFIG_DIR} | self.dict()
@@ -146,4 +203,34 @@ class Settings(pydantic_settings.BaseSettings):
             rich.print(f"\t{key}: {value}")
 
 
-SETTINGS = Settings()
+try:
+    SETTINGS = Settings()
+except Exception as err:
+    print(err)
+    sys.exit(1)
+
+# imported here, as the logging is configured from the settings
+import doiget_tdm.log  # noqa: E402
+
+doiget_tdm.log.setup_logging(settings=SETTINGS)
+
+
+def init_worker_settings(settings: dict[str, typing.Any]) -> None:
+    """
+    Apply the settings of a parent process within a worker process.
+
+    Parameters
+    ----------
+    settings
+        The settings of the parent process (from ``SETTINGS.model_dump()``).
+
+    Notes
+    -----
+    * This is intended to be used as the initialiser for worker processes that are
+      spawned (rather than forked), which would otherwise only have the settings
+      from the environment and configuration directory.
+
+    """
+
+    for name, value in settings.items():
+        setattr(SETTINGS, name, value)
@@ -19,7 +19,7 @@ class CrossRefWebAPI:
 
         self.polite_pool_warned = False
 
-        self.base_url = "https://api.crossref.org/"
+        self.base_url = doiget_tdm.config.SETTINGS.crossref_api_url
 
         self._session = doiget_tdm.web.WebRequester(
             headers={"User-Agent": self.user_agent},
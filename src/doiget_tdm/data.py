@@ -70,4 +70,4 @@ def _iter_paths() -> typing.Iterable[os.DirEntry[str]]:
                 if not inner_path.is_dir():
                     continue
 
-            yield inner_path
+                yield inner_path
@@ -11,8 +11,9 @@ import typing
 import logging
 import pathlib
 import csv
-
-import more_itertools
+import gzip
+import sqlite3
+import collections.abc
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.addHandler(logging.NullHandler())
@@ -32,7 +33,9 @@ class DOIParts(typing.NamedTuple):
 
 class DOI:
 
-    __slots__ = ("_doi",)
+    # the quoted form and the hash value are computed on first access and then
+    # cached, since they are used repeatedly when forming data directory paths
+    __slots__ = ("_doi", "_hash_value", "_quoted")
 
     def __init__(
         self,
@@ -65,6 +68,9 @@ class DOI:
         if unquote:
             self._doi = urllib.parse.unquote(string=self._doi)
 
+        self._quoted: str | None = None
+        self._hash_value: int | None = None
+
     def __str__(self) -> str:
         return self._doi
 
@@ -100,10 +106,12 @@ class DOI:
         """
         A 'quoted' version of the DOI in which special characters are replaced.
         """
-        return urllib.parse.quote(
-            string=self._doi,
-            safe="",
-        )
+        if self._quoted is None:
+            self._quoted = urllib.parse.quote(
+                string=self._doi,
+                safe="",
+            )
+        return self._quoted
 
     @staticmethod
     def from_url(url: str, unquote: bool = True) -> DOI:
@@ -159,12 +167,156 @@ class DOI:
         if n_groups is None or n_groups == 0:
             return ""
 
-        hashed = hashlib.sha256(self._doi.encode())
-        hash_value = int.from_bytes(hashed.digest(), "big")
-        group = str(hash_value % n_groups)
+        if self._hash_value is None:
+            hashed = hashlib.sha256(self._doi.encode())
+            self._hash_value = int.from_bytes(hashed.digest(), "big")
+
+        group = str(self._hash_value % n_groups)
 
         return group
 
+    @staticmethod
+    def get_group_of_each(
+        dois: typing.Iterable[DOI],
+        n_groups: int | None,
+    ) -> list[str]:
+        """
+        Determine the 'group' to which each of a collection of DOIs belongs.
+
+        Parameters
+        ----------
+        dois
+            The DOIs to assign to groups.
+        n_groups
+            The total number of groups that can be assigned.
+
+        Returns
+        -------
+            The group of each DOI, in the same order as ``dois``, as per
+            ``get_group``.
+
+        Notes
+        -----
+        * This is not a vectorised calculation: the group is the SHA-256 hash of
+          each DOI (cached on the DOI) modulo ``n_groups``, which is beyond the
+          integer types and hash functions of ``polars``, and the groups cannot
+          change without moving the existing content of the data directory.
+
+        """
+
+        if n_groups is None or n_groups == 0:
+            return ["" for _ in dois]
+
+        return [doi.get_group(n_groups=n_groups) for doi in dois]
+
+
+class SeenDOIs:
+
+    __slots__ = ("_db", "_digests", "_max_in_memory")
+
+    #: Number of digests held in memory before they are moved to a database.
+    MAX_IN_MEMORY = 2_000_000
+
+    def __init__(
+        self,
+        path: pathlib.Path | None = None,
+        max_in_memory: int = MAX_IN_MEMORY,
+    ) -> None:
+        """
+        A record of the DOIs that have been encountered, for removing duplicates.
+
+        Only a fixed-size digest of each DOI is stored, which keeps the memory
+        usage bounded irrespective of the length of the DOIs.
+
+        Parameters
+        ----------
+        path
+            If provided, the digests are stored in a SQLite database at this path
+            rather than in memory.
+        max_in_memory
+            If ``path`` is not provided, the digests are held in memory until there
+            are this many of them, after which they are moved to a temporary SQLite
+            database that is removed when the record is closed.
+        """
+
+        self._digests: set[bytes] = set()
+        self._db: sqlite3.Connection | None = None
+        self._max_in_memory = max_in_memory
+
+        if path is not None:
+            self._open_db(path=str(path))
+
+    def _open_db(self, path: str) -> None:
+
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode = OFF")
+        self._db.execute("PRAGMA synchronous = OFF")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seen (digest BLOB PRIMARY KEY) "
+            + "WITHOUT ROWID"
+        )
+
+    def _spill(self) -> None:
+
+        LOGGER.info(
+            f"More than {self._max_in_memory} DOIs have been encountered; moving "
+            + "the record of them to a temporary database"
+        )
+
+        # an empty path gives a private on-disk database, which is deleted when
+        # the connection is closed
+        self._open_db(path="")
+
+        assert self._db is not None
+
+        self._db.executemany(
+            "INSERT OR IGNORE INTO seen (digest) VALUES (?)",
+            ((digest,) for digest in self._digests),
+        )
+
+        self._digests.clear()
+
+    def add(self, doi: DOI) -> bool:
+        """
+        Record a DOI as having been seen.
+
+        Parameters
+        ----------
+        doi
+            The DOI.
+
+        Returns
+        -------
+            Whether the DOI had not been seen previously.
+        """
+
+        digest = hashlib.blake2b(str(doi).encode(), digest_size=16).digest()
+
+        if self._db is not None:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO seen (digest) VALUES (?)",
+                (digest,),
+            )
+            return cursor.rowcount == 1
+
+        if digest in self._digests:
+            return False
+
+        self._digests.add(digest)
+
+        if len(self._digests) > self._max_in_memory:
+            self._spill()
+
+        return True
+
+    def close(self) -> None:
+        """
+        Release any database connection.
+        """
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
 
 def form_dois_from_input(
     raw_input: typing.Sequence[str],
@@ -188,9 +340,38 @@ def form_dois_from_input(
         A list of DOI objects, with any duplicate entries removed.
     """
 
+    return list(iter_dois_from_input(raw_input=raw_input, unquote=unquote))
+
+
+def iter_dois_from_input(
+    raw_input: typing.Sequence[str],
+    unquote: bool = True,
+    seen_path: pathlib.Path | None = None,
+) -> typing.Iterator[DOI]:
+    """
+    Lazily form DOI objects from a sequence of strings or a path
+    to a file containing DOIs as strings.
+
+    Parameters
+    ----------
+    raw_input
+        Sequence of either strings containing DOIs or a path to a file
+        containing DOIs as strings (see ``iter_raw_dois_from_path``).
+    unquote
+        Converts special characters in ``doi`` from 'quoted' form (e.g., where the
+        '/' character is represented by '%2F') into 'unquoted'.
+    seen_path
+        Path to a scratch database used to track the DOIs that have been
+        encountered; if not provided, this tracking is performed in memory.
+
+    Returns
+    -------
+        An iterator over DOI objects, with any duplicate entries removed.
+    """
+
     LOGGER.debug(f"Creating DOIs from the input: {raw_input}")
 
-    raw_dois: list[str] = []
+    raw_dois: collections.abc.Iterable[str] = raw_input
 
     is_single_input = len(raw_input) == 1
 
@@ -204,70 +385,148 @@ def form_dois_from_input(
         is_path = raw_path.exists() and raw_path.is_file()
 
         if is_path:
-            raw_dois_from_file = form_raw_dois_from_path(path=raw_path)
-            raw_dois.extend(raw_dois_from_file)
-        else:
-            raw_dois.append(raw_item)
+            raw_dois = iter_raw_dois_from_path(path=raw_path)
 
-    else:
-        raw_dois.extend(raw_input)
+    seen = SeenDOIs(path=seen_path)
 
-    dois: list[DOI] = []
+    try:
 
-    for raw_item in raw_dois:
+        for raw_item in raw_dois:
 
-        constructor = DOI.from_url if raw_item.startswith("http") else DOI
+            constructor = DOI.from_url if raw_item.startswith("http") else DOI
 
-        try:
-            doi = constructor(raw_item, unquote=unquote)
-        except ValueError:
-            LOGGER.error(f"No valid DOI could be interpreted from {raw_item}")
-            continue
-        else:
-            dois.append(doi)
+            try:
+                doi = constructor(raw_item, unquote=unquote)
+            except ValueError:
+                LOGGER.error(f"No valid DOI could be interpreted from {raw_item}")
+                continue
 
-    # remove duplicates
-    dois = list(more_itertools.unique_everseen(dois))
+            # remove duplicates
+            if seen.add(doi=doi):
+                yield doi
 
-    return dois
+    finally:
+        seen.close()
 
 
 def form_raw_dois_from_path(path: pathlib.Path) -> list[str]:
     """
     Reads DOI strings from a file.
 
+    Parameters
+    ----------
+    path
+        Path to the file containing the DOIs (see ``iter_raw_dois_from_path``).
+
+    Returns
+    -------
+        A list of raw DOI strings.
+    """
+
+    return list(iter_raw_dois_from_path(path=path))
+
+
+def iter_raw_dois_from_path(path: pathlib.Path) -> typing.Iterator[str]:
+    """
+    Lazily reads DOI strings from a file.
+
     Parameters
     ----------
     path
         Path to the file containing the DOIs. The DOIs can either be each on a
         single line in the file or they can be in a column named 'DOI' or 'doi'
-        in a CSV format.
+        in a CSV format. If the path has a ``.gz`` suffix, it is read as being
+        gzip-compressed. If the path has a ``.parquet`` or ``.pqt`` suffix, it is
+        read as a Parquet file with a column named 'DOI' or 'doi'.
 
     Returns
     -------
-        A list of raw DOI strings.
+        An iterator over raw DOI strings.
     """
 
-    raw_dois: list[str] = []
+    if path.suffix in (".parquet", ".pqt"):
+        yield from _iter_raw_dois_from_parquet(path=path)
+        return
+
+    handle: typing.TextIO
+
+    if path.suffix == ".gz":
+        handle = gzip.open(path, mode="rt", newline="")
+    else:
+        handle = path.open(newline="")
 
-    with path.open(newline="") as handle:
+    with handle:
 
         reader = csv.DictReader(handle)
 
-        doi_key = (
-            None
-            if reader.fieldnames is None
-            else (
-                "doi"
-                if "doi" in reader.fieldnames
-                else "DOI" if "DOI" in reader.fieldnames else None
-            )
-        )
+        doi_key = _get_doi_key(fieldnames=reader.fieldnames or [])
 
         if doi_key is not None:
-            raw_dois.extend([row[doi_key] for row in reader])
+
+            for row in reader:
+                if raw_doi := row.get(doi_key):
+                    yield raw_doi
+
         else:
+
+            # not a CSV file with a DOI column, so read each line (including the
+            # one that was parsed as the header) as a DOI
             handle.seek(0)
-            raw_dois.extend(handle.read().splitlines())
 
-    return raw_dois
+            for line in handle:
+
+                raw_doi = line.rstrip("\r\n")
+
+                if raw_doi:
+                    yield raw_doi
+
+
+def _iter_raw_dois_from_parquet(
+    path: pathlib.Path,
+    batch_size: int = 100_000,
+) -> typing.Iterator[str]:
+
+    # polars is only needed for this input format
+    import polars as pl
+
+    try:
+        import pyarrow.parquet  # type: ignore[import-not-found, import-untyped]
+    except ImportError:
+        has_pyarrow = False
+    else:
+        has_pyarrow = True
+
+    doi_key = _get_doi_key(fieldnames=list(pl.read_parquet_schema(path)))
+
+    if doi_key is None:
+        msg = f"No column named 'doi' or 'DOI' found in {path}"
+        raise ValueError(msg)
+
+    batches: collections.abc.Iterable[collections.abc.Iterable[str | None]]
+
+    if has_pyarrow:
+        # read the column in batches, so that it is not all held in memory
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        batches = (
+            batch.column(0).to_pylist()
+            for batch in parquet_file.iter_batches(
+                batch_size=batch_size,
+                columns=[doi_key],
+            )
+        )
+    else:
+        # without pyarrow, the whole column has to be read into memory first
+        batches = (
+            batch.get_column(doi_key)
+            for batch in pl.read_parquet(path, columns=[doi_key]).iter_slices(
+                n_rows=batch_size
+            )
+        )
+
+    for batch in batches:
+        yield from (raw_doi for raw_doi in batch if raw_doi is not None)
+
+
+def _get_doi_key(fieldnames: collections.abc.Sequence[str]) -> str | None:
+
+    return "doi" if "doi" in fieldnames else "DOI" if "DOI" in fieldnames else None
@@ -1,7 +1,6 @@
+import functools
 import logging
 
-import requests.exceptions
-
 import tenacity
 
 import doiget_tdm.config
@@ -19,15 +18,40 @@ class AcquisitionError(Exception):
     pass
 
 
-CUSTOM_ERRORS = (ValidationError, InvalidHostnameError, AcquisitionError)
+class QuotaExhaustedError(Exception):
+    pass
+
 
-ACQ_ERRORS = (
-    requests.exceptions.RequestException,
+CUSTOM_ERRORS = (
+    ValidationError,
     InvalidHostnameError,
     AcquisitionError,
+    QuotaExhaustedError,
 )
 
 
+@functools.cache
+def get_acq_errors() -> tuple[type[Exception], ...]:
+    """
+    The errors that are expected when acquiring full-text content from a source.
+
+    Notes
+    -----
+    * This is formed on first use, as it requires importing ``requests``, which is
+      slow to import and is otherwise only needed once a request is made.
+
+    """
+
+    import requests.exceptions
+
+    return (
+        requests.exceptions.RequestException,
+        InvalidHostnameError,
+        AcquisitionError,
+        QuotaExhaustedError,
+    )
+
+
 def check_hostname(valid_hostname: str | None) -> None:
 
     if (
@@ -1,56 +1,22 @@
 from __future__ import annotations
 
 import pathlib
-import enum
 import logging
 
-import pyrage
-
 import doiget_tdm.config
 import doiget_tdm.doi
+import doiget_tdm.metrics
 import doiget_tdm.source
+import doiget_tdm.timing
 
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.addHandler(logging.NullHandler())
 
 
-class FormatName(enum.Enum):
-    """
-    Possible full-text content formats.
-    """
-
-    XML = "xml"
-    PDF = "pdf"
-    HTML = "html"
-    TXT = "txt"
-    TIFF = "tiff"
-
-    @classmethod
-    def from_content_type(
-        cls: type[FormatName],
-        content_type: str,
-    ) -> FormatName:
-        """
-        Return the format name from a content type.
-
-        Parameters
-        ----------
-        content_type
-            The MIME type of the content.
-
-        """
-
-        lut = {
-            "application/pdf": "pdf",
-            "text/html": "html",
-            "text/plain": "txt",
-            "application/xml": "xml",
-            "text/xml": "xml",
-            "image/tiff": "tiff",
-        }
-
-        return cls(lut[content_type])
+#: Possible full-text content formats; these are defined alongside the settings, which
+#: refer to them.
+FormatName = doiget_tdm.config.FormatName
 
 
 class Format:
@@ -118,36 +84,79 @@ class Format:
         Attempt to acquire the full-text content for the format.
         """
 
+        with doiget_tdm.timing.labels(fmt=self.name.name):
+            self._acquire()
+
+    def _acquire(self) -> None:
+
         if len(self.sources) == 0:
             LOGGER.warning(f"No sources for {self.name}")
 
+        metrics = doiget_tdm.metrics.METRICS
+
         for source in self.sources:
 
+            metrics.add_attempt()
+
             try:
                 data = source.acquire()
-            except doiget_tdm.errors.ACQ_ERRORS as err:
+            except doiget_tdm.errors.get_acq_errors() as err:
                 LOGGER.warning(f"Error when acquiring source ({err})")
+                metrics.add_failure(err=err)
                 continue
             except Exception as err:
                 LOGGER.warning(f"Unexpected error when acquiring source ({err})")
+                metrics.add_failure(err=err)
                 continue
 
             try:
                 source.validate(data=data)
             except doiget_tdm.errors.ValidationError as err:
                 LOGGER.warning(f"Error when validating data from source ({err})")
+                metrics.add_failure(err=err)
                 continue
             except Exception as err:
                 LOGGER.warning(f"Unexpected error when validating source ({err})")
+                metrics.add_failure(err=err)
                 continue
 
-            if source.encrypt:
-                if doiget_tdm.config.SETTINGS.encryption_passphrase is None:
-                    raise ValueError(
-                        "Source is specified as requiring encryption but "
-                        + "encryption passphrase configuration setting is missing"
-                    )
+            n_bytes = self.write(data=data, encrypt=source.encrypt)
+
+            metrics.add_bytes_written(n_bytes=n_bytes)
+            metrics.add_success()
+
+            break
+
+        else:
+            raise ValueError(f"Could not acquire from any sources for {self}")
+
+    def write(self, data: bytes, encrypt: bool = False) -> int:
+        """
+        Write full-text content for the format into the data directory.
+
+        Parameters
+        ----------
+        data
+            The (validated) full-text content.
+        encrypt
+            Whether to encrypt the content before writing.
+
+        Returns
+        -------
+            The number of bytes written.
+        """
+
+        if encrypt:
+            if doiget_tdm.config.SETTINGS.encryption_passphrase is None:
+                raise ValueError(
+                    "Source is specified as requiring encryption but "
+                    + "encryption passphrase configuration setting is missing"
+                )
+
+            # deferred import, as it is only needed when encrypting
+            import pyrage
 
+            with doiget_tdm.timing.span(stage=doiget_tdm.timing.Stage.ENCRYPT):
                 data = pyrage.passphrase.encrypt(
                     plaintext=data,
                     passphrase=(
@@ -155,25 +164,27 @@ class Format:
                     ),
                 )
 
-                LOGGER.info(
-                    "Writing encryption sentinel file to "
-                    + f"{self.is_encrypted_sentinel_path}"
-                )
-                # keep retrying if the write failed
+        self.local_path.parent.mkdir(exist_ok=True, parents=True)
+
+        if encrypt:
+            LOGGER.info(
+                "Writing encryption sentinel file to "
+                + f"{self.is_encrypted_sentinel_path}"
+            )
+            # keep retrying if the write failed
+            with doiget_tdm.timing.span(stage=doiget_tdm.timing.Stage.WRITE):
                 for attempt in doiget_tdm.errors.get_retry_controller(logger=LOGGER):
                     with attempt:
                         self.is_encrypted_sentinel_path.touch()
 
-            LOGGER.info(f"Writing full-text content to {self.local_path}")
-            # keep retrying if the write failed
+        LOGGER.info(f"Writing full-text content to {self.local_path}")
+        # keep retrying if the write failed
+        with doiget_tdm.timing.span(stage=doiget_tdm.timing.Stage.WRITE):
             for attempt in doiget_tdm.errors.get_retry_controller(logger=LOGGER):
                 with attempt:
                     self.local_path.write_bytes(data)
 
-            break
-
-        else:
-            raise ValueError(f"Could not acquire from any sources for {self}")
+        return len(data)
 
     def load(self) -> bytes:
         """
@@ -192,6 +203,9 @@ class Format:
                 + "encryption passphrase configuration setting is missing"
             )
 
+        # deferred import, as it is only needed when decrypting
+        import pyrage
+
         decrypted_data: bytes = pyrage.passphrase.decrypt(
             ciphertext=data,
             passphrase=(
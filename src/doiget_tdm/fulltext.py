@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import collections
+import collections.abc
 import logging
 import typing
 
@@ -7,7 +9,9 @@ import doiget_tdm.doi
 import doiget_tdm.metadata
 import doiget_tdm.format
 import doiget_tdm.publisher
+import doiget_tdm.quota
 import doiget_tdm.config
+import doiget_tdm.timing
 
 
 LOGGER = logging.getLogger(__name__)
@@ -58,6 +62,9 @@ class FullText:
 
         self._sources_set = False
 
+        # name of the publisher handler, used to label the acquisition timings
+        self._publisher_name: str | None = None
+
     @property
     def exists(self) -> bool:
 
@@ -78,6 +85,36 @@ class FullText:
         if self.metadata.member_id in doiget_tdm.publisher.registry:
             publisher = doiget_tdm.publisher.registry[self.metadata.member_id]
             publisher.set_sources(fulltext=self)
+            self._publisher_name = type(publisher).__name__
+
+    def get_acquire_group(self) -> str | None:
+        """
+        The key of the group (if any) with which the full-text content is best
+        acquired, as identified by the publisher handler for the item.
+        """
+
+        if not self.metadata.exists:
+            return None
+
+        if self.metadata.member_id not in doiget_tdm.publisher.registry:
+            return None
+
+        publisher = doiget_tdm.publisher.registry[self.metadata.member_id]
+
+        return publisher.get_acquire_group(fulltext=self)
+
+    def get_quota(self) -> doiget_tdm.quota.Quota | None:
+        """
+        The quota (if any) of the publisher handler for the item.
+        """
+
+        if not self.metadata.exists:
+            return None
+
+        if self.metadata.member_id not in doiget_tdm.publisher.registry:
+            return None
+
+        return doiget_tdm.publisher.registry[self.metadata.member_id].quota
 
     def acquire(self, skip_existing: bool = True) -> None:
         """
@@ -107,7 +144,8 @@ class FullText:
                 LOGGER.info(f"Trying to acquire the {fmt_name.name} format")
 
                 try:
-                    fmt.acquire()
+                    with doiget_tdm.timing.labels(publisher=self._publisher_name):
+                        fmt.acquire()
                 except ValueError:
                     LOGGER.warning(
                         f"Could not acquire full-text content for {fmt.name}"
@@ -163,3 +201,37 @@ class FullText:
         fmt: doiget_tdm.format.FormatName,
     ) -> bool:
         return self.formats[fmt].exists
+
+
+def prefetch(fulltexts: collections.abc.Sequence[FullText]) -> None:
+    """
+    Allow the publisher handlers to begin acquiring the full-text content for a
+    batch of items, ahead of their acquisition.
+
+    Parameters
+    ----------
+    fulltexts
+        Information about the full-text items.
+    """
+
+    by_member_id: dict[doiget_tdm.metadata.MemberID, list[FullText]] = (
+        collections.defaultdict(list)
+    )
+
+    for fulltext in fulltexts:
+
+        if (
+            not fulltext.metadata.exists
+            or fulltext.metadata.member_id not in doiget_tdm.publisher.registry
+        ):
+            continue
+
+        if not fulltext._sources_set:
+            fulltext.set_sources()
+            fulltext._sources_set = True
+
+        by_member_id[fulltext.metadata.member_id].append(fulltext)
+
+    for member_id, member_fulltexts in by_member_id.items():
+        publisher = doiget_tdm.publisher.registry[member_id]
+        publisher.prefetch(fulltexts=member_fulltexts)
@@ -0,0 +1,84 @@
+"""
+Shared functionality for writing full-text content into the data directory in bulk,
+from local publisher archives.
+"""
+
+from __future__ import annotations
+
+import logging
+import typing
+
+import doiget_tdm.doi
+import doiget_tdm.format
+import doiget_tdm.metrics
+import doiget_tdm.validate
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+
+class IngestResult(typing.NamedTuple):
+    """
+    Outcome of ingesting the full-text content for a DOI.
+    """
+
+    quoted_doi: str
+    n_bytes: int
+    error: Exception | None
+
+
+def write_xml(quoted_doi: str, data: bytes, encrypt: bool = False) -> IngestResult:
+    """
+    Validate and write full-text XML content into the data directory.
+
+    Parameters
+    ----------
+    quoted_doi
+        The DOI, in quoted form.
+    data
+        The full-text XML content.
+    encrypt
+        Whether to encrypt the content before writing.
+
+    Returns
+    -------
+        The outcome; any error is captured rather than raised.
+    """
+
+    fmt = doiget_tdm.format.Format(
+        name=doiget_tdm.format.FormatName.XML,
+        doi=doiget_tdm.doi.DOI(doi=quoted_doi, unquote=True),
+    )
+
+    try:
+        doiget_tdm.validate.validate_data(data=data, data_format=fmt.name)
+        n_bytes = fmt.write(data=data, encrypt=encrypt)
+    except Exception as err:
+        return IngestResult(quoted_doi=quoted_doi, n_bytes=0, error=err)
+
+    return IngestResult(quoted_doi=quoted_doi, n_bytes=n_bytes, error=None)
+
+
+def record_result(result: IngestResult) -> None:
+    """
+    Count the outcome of ingesting a DOI in the metrics.
+
+    Parameters
+    ----------
+    result
+        The outcome.
+    """
+
+    metrics = doiget_tdm.metrics.METRICS
+
+    metrics.add_attempt()
+
+    if result.error is None:
+        metrics.add_bytes_written(n_bytes=result.n_bytes)
+        metrics.add_success()
+    else:
+        LOGGER.warning(f"Unable to ingest {result.quoted_doi} ({result.error})")
+        metrics.add_failure(err=result.error)
+
+    metrics.add_doi_processed()
@@ -1,15 +1,19 @@
+from __future__ import annotations
+
 import logging
+import typing
 
-import doiget_tdm.config
+if typing.TYPE_CHECKING:
+    import doiget_tdm.config
 
 
-def setup_logging() -> None:
+def setup_logging(settings: doiget_tdm.config.Settings) -> None:
 
     root_logger = logging.getLogger()
     root_logger.setLevel(
         min(
-            doiget_tdm.config.SETTINGS.log_level,
-            doiget_tdm.config.SETTINGS.file_log_level,
+            settings.log_level,
+            settings.file_log_level,
         )
     )
 
@@ -18,12 +22,12 @@ def setup_logging() -> None:
 
     # handler for the screen
     screen_handler = logging.StreamHandler()
-    screen_handler.setLevel(doiget_tdm.config.SETTINGS.log_level)
+    screen_handler.setLevel(settings.log_level)
     screen_handler.setFormatter(formatter)
 
     # handler for the file
-    file_handler = logging.FileHandler(filename=doiget_tdm.config.SETTINGS.log_file)
-    file_handler.setLevel(doiget_tdm.config.SETTINGS.file_log_level)
+    file_handler = logging.FileHandler(filename=settings.log_file)
+    file_handler.setLevel(settings.file_log_level)
     file_handler.setFormatter(formatter)
 
     root_logger.addHandler(screen_handler)
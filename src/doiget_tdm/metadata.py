@@ -8,6 +8,8 @@ import time
 import pathlib
 import zlib
 import datetime
+import functools
+import threading
 
 import simdjson
 
@@ -20,9 +22,11 @@ else:
 
 import rich
 
+import doiget_tdm.codec
 import doiget_tdm.config
 import doiget_tdm.doi
 import doiget_tdm.crossref
+import doiget_tdm.timing
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.addHandler(logging.NullHandler())
@@ -179,7 +183,7 @@ class CrossRefLMDBClient:
         """
 
         if self.env is None:
-            self._load()
+            self.env = self._load()
 
         if self.env is None:
             raise ValueError()
@@ -199,7 +203,17 @@ class CrossRefLMDBClient:
 MetadataSource: typing.TypeAlias = typing.Callable[[doiget_tdm.doi.DOI], bytes]
 
 
+@functools.cache
 def get_metadata_sources() -> tuple[MetadataSource, ...]:
+    """
+    Form the sources from which metadata can be acquired.
+
+    Notes
+    -----
+    * The sources are only formed on the first call, so that the web API client is
+      not created unless metadata needs to be acquired.
+
+    """
 
     crossref_web_api_client = CrossRefWebAPIClient()
 
@@ -219,7 +233,111 @@ def get_metadata_sources() -> tuple[MetadataSource, ...]:
     return metadata_sources
 
 
-metadata_sources = get_metadata_sources()
+#: Key that marks metadata as a placeholder, written without querying CrossRef.
+PLACEHOLDER_KEY = "doiget-tdm-placeholder"
+
+#: JSON pointers to the fields of the metadata that are extracted on loading.
+FIELD_POINTERS: dict[str, str] = {
+    "member": "/member",
+    "publisher": "/publisher",
+    "container_title": "/container-title",
+    "volume": "/volume",
+    "issue": "/issue",
+    "page": "/page",
+    "issn": "/ISSN",
+    "issn_type": "/issn-type",
+    "title": "/title",
+    "published_date_parts": "/published/date-parts",
+    "placeholder": f"/{PLACEHOLDER_KEY}",
+}
+
+_THREAD_LOCAL = threading.local()
+
+
+def get_parser() -> simdjson.Parser:
+    """
+    The JSON parser for the current thread, which is re-used across documents.
+    """
+
+    try:
+        parser: simdjson.Parser = _THREAD_LOCAL.parser
+    except AttributeError:
+        parser = _THREAD_LOCAL.parser = simdjson.Parser()
+
+    return parser
+
+
+class MetadataFields:
+
+    __slots__ = (
+        "container_title",
+        "issn",
+        "issn_type",
+        "issue",
+        "member",
+        "page",
+        "placeholder",
+        "published_date_parts",
+        "publisher",
+        "title",
+        "volume",
+    )
+
+    member: object
+    publisher: object
+    container_title: object
+    volume: object
+    issue: object
+    page: object
+    issn: object
+    issn_type: object
+    title: object
+    published_date_parts: object
+    placeholder: object
+
+    def __init__(self, raw_json: bytes) -> None:
+        """
+        The fields of the metadata that are used within ``doiget_tdm``, extracted
+        from the raw JSON in a single pass.
+
+        Parameters
+        ----------
+        raw_json
+            The metadata, in JSON format.
+
+        Notes
+        -----
+        * The fields are converted into Python objects (or ``None`` if they are not
+          present), so that no references to the parsed document are retained and
+          the parser can be re-used for the next document.
+
+        """
+
+        doc = get_parser().parse(src=raw_json)  # type: ignore[call-overload]
+
+        try:
+
+            if not isinstance(doc, simdjson.Object):
+                raise TypeError("Unexpected type")
+
+            for name, pointer in FIELD_POINTERS.items():
+
+                value: object
+
+                try:
+                    value = doc.at_pointer(pointer)
+                except KeyError:
+                    value = None
+
+                if isinstance(value, simdjson.Object):
+                    value = value.as_dict()
+                elif isinstance(value, simdjson.Array):
+                    value = value.as_list()
+
+                setattr(self, name, value)
+
+        finally:
+            del doc
 
 
 class Metadata:
@@ -243,54 +361,116 @@ class Metadata:
         self._compression_level = doiget_tdm.SETTINGS.metadata_compression_level
         self._is_compressed = self._compression_level != 0
 
-        path_suffix = ".gz" if self._is_compressed else ""
+        self._codec_name = doiget_tdm.SETTINGS.metadata_codec
 
-        #: Path to the raw metadata JSON file in the data directory
-        self.path: pathlib.Path = (
+        base_path = (
             doiget_tdm.config.SETTINGS.data_dir
             / group
             / self._doi.quoted
-            / f"{self._doi.quoted}_metadata.json{path_suffix}"
+            / f"{self._doi.quoted}_metadata.json"
+        )
+
+        path_suffix = (
+            doiget_tdm.codec.SUFFIXES[self._codec_name] if self._is_compressed else ""
         )
 
+        # metadata may have been written with a different codec (or without
+        # compression), so the other possible paths are also checked when reading
+        suffixes = [
+            path_suffix,
+            *(
+                suffix
+                for suffix in ("", *doiget_tdm.codec.SUFFIXES.values())
+                if suffix != path_suffix
+            ),
+        ]
+
+        self._possible_paths = [
+            base_path.with_name(base_path.name + suffix) for suffix in suffixes
+        ]
+
+        #: Path to the raw metadata JSON file in the data directory
+        self.path: pathlib.Path = self._possible_paths[0]
+
         self._raw: simdjson.Object | None = None
+        self._fields: MetadataFields | None = None
 
         self._member_id: MemberID | None = None
-        self._publisher_name: str | None = None
 
     @property
     def exists(self) -> bool:
         """
         Whether the metadata exists in the data directory.
         """
-        return self.path.exists()
+        return self._find_path() is not None
+
+    @property
+    def is_placeholder(self) -> bool:
+        """
+        Whether the metadata in the data directory is a placeholder, as marked by
+        the ``PLACEHOLDER_KEY`` field, rather than having come from CrossRef.
+
+        Notes
+        -----
+        * This reads and parses the metadata.
+
+        """
+        return self.exists and self.fields.placeholder is True
+
+    def _find_path(self) -> pathlib.Path | None:
+
+        for path in self._possible_paths:
+            if path.exists():
+                return path
+
+        return None
 
     @property
     def raw(self) -> simdjson.Object:
         """
         The raw CrossRef metadata as a lazy proxy object.
+
+        Notes
+        -----
+        * The full document is only parsed when this is first accessed; the
+          commonly-used fields are available from the properties of this instance
+          without holding the document.
+
         """
 
         if not self.exists:
             raise ValueError("No metadata available")
 
         if self._raw is None:
-            self._load()
+            self._load_raw()
 
         if self._raw is None:
             raise ValueError("Unexpected data form")
 
         return self._raw
 
+    @property
+    def fields(self) -> MetadataFields:
+        """
+        The fields extracted from the metadata.
+        """
+
+        if self._fields is None:
+
+            if not self.exists:
+                raise ValueError("No metadata available")
+
+            self._fields = MetadataFields(raw_json=self.read())
+
+        return self._fields
+
     @property
     def member_id(self) -> MemberID:
         """
         The member ID from the metadata ("member").
         """
-        if not self.exists or self.raw is None:
-            raise ValueError("No metadata available")
         if self._member_id is None:
-            raw_member_id = self.raw["member"]
+            raw_member_id = self.fields.member
             if not isinstance(raw_member_id, str):
                 raise ValueError(f"Unexpected member id {raw_member_id}")
             self._member_id = MemberID(id_=raw_member_id)
@@ -302,138 +482,62 @@ class Metadata:
         The publisher name from the metadata ("publisher").
         """
 
-        if not self.exists or "publisher" not in self.raw:
+        raw_publisher_name = self.fields.publisher
+
+        if raw_publisher_name is None:
             raise ValueError("No metadata available")
 
-        if self._publisher_name is None:
-            raw_publisher_name = self.raw["publisher"]
-            if not isinstance(raw_publisher_name, str):
-                raise ValueError(f"Unexpected publisher: {raw_publisher_name}")
-            self._publisher_name = raw_publisher_name
+        if not isinstance(raw_publisher_name, str):
+            raise ValueError(f"Unexpected publisher: {raw_publisher_name}")
 
-        return self._publisher_name
+        return raw_publisher_name
 
     @property
     def journal_name(self) -> str | None:
-
-        if not self.exists or self.raw is None:
-            raise ValueError("No metadata available")
-
-        json_msg = "Unexpected JSON format"
-
-        if not isinstance(self.raw, simdjson.Object):
-            raise ValueError(json_msg)
-
-        try:
-            journal_names = self.raw["container-title"]
-        except KeyError:
-            return None
-
-        if not isinstance(journal_names, simdjson.Array):
-            raise ValueError(json_msg)
-
-        (journal_name, *_) = journal_names
-
-        return str(journal_name)
+        return _get_first(value=self.fields.container_title)
 
     @property
     def volume(self) -> str | None:
-
-        if not self.exists or self.raw is None:
-            raise ValueError("No metadata available")
-
-        json_msg = "Unexpected JSON format"
-
-        if not isinstance(self.raw, simdjson.Object):
-            raise ValueError(json_msg)
-
-        try:
-            volume = str(self.raw["volume"])
-        except KeyError:
-            return None
-
-        return volume
+        return _get_str(value=self.fields.volume)
 
     @property
     def issue(self) -> str | None:
-
-        if not self.exists or self.raw is None:
-            raise ValueError("No metadata available")
-
-        json_msg = "Unexpected JSON format"
-
-        if not isinstance(self.raw, simdjson.Object):
-            raise ValueError(json_msg)
-
-        try:
-            issue = str(self.raw["issue"])
-        except KeyError:
-            return None
-
-        return issue
+        return _get_str(value=self.fields.issue)
 
     @property
     def page(self) -> str | None:
-
-        if not self.exists or self.raw is None:
-            raise ValueError("No metadata available")
-
-        json_msg = "Unexpected JSON format"
-
-        if not isinstance(self.raw, simdjson.Object):
-            raise ValueError(json_msg)
-
-        try:
-            page = str(self.raw["page"])
-        except KeyError:
-            return None
-
-        return page
+        return _get_str(value=self.fields.page)
 
     @property
     def issns(self) -> list[str] | None:
 
-        if not self.exists or self.raw is None:
-            raise ValueError("No metadata available")
-
-        json_msg = "Unexpected JSON format"
+        raw_issns = self.fields.issn
 
-        if not isinstance(self.raw, simdjson.Object):
-            raise ValueError(json_msg)
-
-        try:
-            raw_issns = self.raw["ISSN"]
-        except KeyError:
+        if raw_issns is None:
             return None
 
-        if not isinstance(raw_issns, simdjson.Array):
-            raise ValueError(json_msg)
+        if not isinstance(raw_issns, list):
+            raise ValueError("Unexpected JSON format")
 
-        return [str(raw_issn) for raw_issn in raw_issns.as_list()]
+        return [str(raw_issn) for raw_issn in raw_issns]
 
     @property
     def electronic_issn(self) -> str | None:
 
-        if not self.exists or self.raw is None:
-            raise ValueError("No metadata available")
-
         json_msg = "Unexpected JSON format"
 
-        if not isinstance(self.raw, simdjson.Object):
-            raise ValueError(json_msg)
+        issn_types = self.fields.issn_type
 
-        try:
-            issn_types = self.raw["issn-type"]
-        except KeyError:
+        if issn_types is None:
             return None
 
-        if not isinstance(issn_types, simdjson.Array):
+        if not isinstance(issn_types, list):
             raise ValueError(json_msg)
 
         issn: str | None = None
 
         for issn_type in issn_types:
-            if not isinstance(issn_type, simdjson.Object):
+            if not isinstance(issn_type, dict):
                 raise ValueError(json_msg)
 
             if issn_type["type"] == "electronic":
@@ -443,59 +547,26 @@ class Metadata:
 
     @property
     def title(self) -> str | None:
-
-        if not self.exists or self.raw is None:
-            raise ValueError("No metadata available")
-
-        json_msg = "Unexpected JSON format"
-
-        if not isinstance(self.raw, simdjson.Object):
-            raise ValueError(json_msg)
-
-        try:
-            titles = self.raw["title"]
-        except KeyError:
-            return None
-
-        if not isinstance(titles, simdjson.Array):
-            raise ValueError(json_msg)
-
-        (title, *_) = titles
-
-        return str(title)
+        return _get_first(value=self.fields.title)
 
     @property
     def published_date(self) -> datetime.date | None:
 
-        if not self.exists or self.raw is None:
-            raise ValueError("No metadata available")
-
         json_msg = "Unexpected JSON format"
 
-        if not isinstance(self.raw, simdjson.Object):
-            raise ValueError(json_msg)
+        date_parts = self.fields.published_date_parts
 
-        try:
-            published = self.raw["published"]
-        except KeyError:
+        if date_parts is None:
             return None
 
-        if not isinstance(published, simdjson.Object):
-            raise ValueError(json_msg)
-
-        try:
-            date_parts = published["date-parts"]
-        except KeyError:
-            return None
-
-        if not isinstance(date_parts, simdjson.Array):
+        if not isinstance(date_parts, list):
             raise ValueError(json_msg)
 
         dates: list[datetime.date] = []
 
         for raw_date_parts in date_parts:
 
-            if not isinstance(raw_date_parts, simdjson.Array):
+            if not isinstance(raw_date_parts, list):
                 raise ValueError(json_msg)
 
             if len(raw_date_parts) == 1:
@@ -514,15 +585,31 @@ class Metadata:
 
         return max(dates)
 
-    def _load(self) -> None:
+    def read(self) -> bytes:
+        """
+        Read the metadata, in JSON format.
+
+        Notes
+        -----
+        * The codec used to compress the metadata (if any) is identified from the
+          file header, rather than the current settings.
+
+        """
+
+        path = self._find_path()
+
+        if path is None:
+            raise ValueError("No metadata available")
 
-        raw = self.path.read_bytes()
+        return doiget_tdm.codec.decompress(data=path.read_bytes())
 
-        raw_json = zlib.decompress(raw) if self._is_compressed else raw
+    def _load_raw(self) -> None:
 
+        # a separate parser is used, as the proxy objects of the returned document
+        # prevent its parser from being re-used
         parser = simdjson.Parser()
 
-        data = parser.parse(src=raw_json)  # type: ignore[call-overload]
+        data = parser.parse(src=self.read())  # type: ignore[call-overload]
 
         if not isinstance(data, simdjson.Object):
             raise TypeError("Unexpected type")
@@ -531,7 +618,7 @@ class Metadata:
 
     def acquire(
         self,
-        metadata_sources: collections.abc.Iterable[MetadataSource] = metadata_sources,
+        metadata_sources: collections.abc.Iterable[MetadataSource] | None = None,
     ) -> None:
         """
         Attempt to acquire the metadata from CrossRef.
@@ -539,34 +626,58 @@ class Metadata:
         Parameters
         ----------
         metadata_sources
-            The sources from which to attempt to acquire the metadata.
+            The sources from which to attempt to acquire the metadata. If not
+            provided, the sources from ``get_metadata_sources`` are used.
         """
 
+        if metadata_sources is None:
+            metadata_sources = get_metadata_sources()
+
         raw: bytes | None = None
 
-        for metadata_source in metadata_sources:
-            try:
-                raw = metadata_source(self._doi)
-            except Exception:
-                continue
+        with doiget_tdm.timing.span(stage=doiget_tdm.timing.Stage.METADATA_ACQUIRE):
+            for metadata_source in metadata_sources:
+                try:
+                    raw = metadata_source(self._doi)
+                except Exception:
+                    continue
+                else:
+                    break
             else:
-                break
-        else:
-            msg = f"Unable to retrieve metadata for {self}"
-            raise ValueError(msg)
+                msg = f"Unable to retrieve metadata for {self}"
+                raise ValueError(msg)
 
         self.path.parent.mkdir(exist_ok=True, parents=True)
 
         output = (
-            zlib.compress(raw, level=self._compression_level)
+            doiget_tdm.codec.get_codec(name=self._codec_name).compress(
+                data=raw,
+                level=self._compression_level,
+            )
             if self._is_compressed
             else raw
         )
 
+        # any existing metadata (such as a placeholder) is replaced by renaming a new
+        # file over it, rather than rewriting it in place, so that the modification
+        # time of the directory changes and the status cache notices the change
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+
         # keep retrying if the write failed
-        for attempt in doiget_tdm.errors.get_retry_controller(logger=LOGGER):
-            with attempt:
-                self.path.write_bytes(output)
+        with doiget_tdm.timing.span(stage=doiget_tdm.timing.Stage.WRITE):
+            for attempt in doiget_tdm.errors.get_retry_controller(logger=LOGGER):
+                with attempt:
+                    tmp_path.write_bytes(output)
+                    tmp_path.replace(self.path)
+
+        # any metadata that was written with a different codec is now stale
+        for path in self._possible_paths[1:]:
+            path.unlink(missing_ok=True)
+
+        # any previously-read metadata (such as a placeholder) is now stale
+        self._raw = None
+        self._fields = None
+        self._member_id = None
 
         LOGGER.info(f"Wrote metadata to {self.path}")
 
@@ -590,3 +701,20 @@ class Metadata:
             del metadata["reference"]
 
         rich.print(metadata)
+
+
+def _get_str(value: object) -> str | None:
+    return None if value is None else str(value)
+
+
+def _get_first(value: object) -> str | None:
+
+    if value is None:
+        return None
+
+    if not isinstance(value, list):
+        raise ValueError("Unexpected JSON format")
+
+    (first, *_) = value
+
+    return str(first)
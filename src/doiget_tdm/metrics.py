@@ -0,0 +1,297 @@
+"""
+Live counters for acquisition, which can be served over HTTP in the Prometheus
+text exposition format.
+"""
+
+from __future__ import annotations
+
+import collections
+import collections.abc
+import contextlib
+import http
+import http.server
+import logging
+import threading
+
+import doiget_tdm.timing
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+
+class Metrics:
+
+    def __init__(self) -> None:
+        """
+        Counters and gauges that describe the progress of acquisition.
+
+        Notes
+        -----
+        * Unless noted otherwise, the values are labelled by the publisher and
+          format that apply in the current context (see ``doiget_tdm.timing.labels``).
+
+        """
+
+        self._lock = threading.Lock()
+
+        # gauges, labelled only by publisher
+        self._n_limiter_waiting: collections.Counter[str] = collections.Counter()
+        self._n_in_flight: collections.Counter[str] = collections.Counter()
+
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Set all the counters (but not the gauges) to zero.
+        """
+
+        with self._lock:
+            self._n_dois_processed = 0
+            self._n_attempted: collections.Counter[tuple[str, str]] = (
+                collections.Counter()
+            )
+            self._n_succeeded: collections.Counter[tuple[str, str]] = (
+                collections.Counter()
+            )
+            self._n_failed: collections.Counter[tuple[str, str, str]] = (
+                collections.Counter()
+            )
+            self._n_bytes_written: collections.Counter[tuple[str, str]] = (
+                collections.Counter()
+            )
+
+    def add_doi_processed(self) -> None:
+        """
+        Count a DOI as having been processed.
+        """
+        with self._lock:
+            self._n_dois_processed += 1
+
+    def add_attempt(self) -> None:
+        """
+        Count an attempt to acquire full-text content from a source.
+        """
+        with self._lock:
+            self._n_attempted[doiget_tdm.timing.get_labels()] += 1
+
+    def add_success(self) -> None:
+        """
+        Count a successful acquisition of full-text content from a source.
+        """
+        with self._lock:
+            self._n_succeeded[doiget_tdm.timing.get_labels()] += 1
+
+    def add_failure(self, err: BaseException) -> None:
+        """
+        Count a failed acquisition of full-text content from a source.
+
+        Parameters
+        ----------
+        err
+            The error that caused the failure; its class name is used as a label.
+        """
+        with self._lock:
+            self._n_failed[(*doiget_tdm.timing.get_labels(), type(err).__name__)] += 1
+
+    def add_bytes_written(self, n_bytes: int) -> None:
+        """
+        Count the number of bytes written to the data directory.
+
+        Parameters
+        ----------
+        n_bytes
+            Number of bytes written.
+        """
+        with self._lock:
+            self._n_bytes_written[doiget_tdm.timing.get_labels()] += n_bytes
+
+    @contextlib.contextmanager
+    def limiter_waiting(self) -> collections.abc.Iterator[None]:
+        """
+        Count a request as waiting on a rate limiter within the enclosed code.
+        """
+        with self._gauge(gauge=self._n_limiter_waiting):
+            yield
+
+    @contextlib.contextmanager
+    def in_flight(self) -> collections.abc.Iterator[None]:
+        """
+        Count a request as being in flight within the enclosed code.
+        """
+        with self._gauge(gauge=self._n_in_flight):
+            yield
+
+    @contextlib.contextmanager
+    def _gauge(
+        self,
+        gauge: collections.Counter[str],
+    ) -> collections.abc.Iterator[None]:
+
+        (publisher, _) = doiget_tdm.timing.get_labels()
+
+        with self._lock:
+            gauge[publisher] += 1
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                gauge[publisher] -= 1
+
+    def to_prometheus(self) -> str:
+        """
+        The current values, in the Prometheus text exposition format.
+        """
+
+        lines: list[str] = []
+
+        def add_metric(
+            name: str,
+            metric_type: str,
+            help_text: str,
+            values: collections.abc.Iterable[tuple[dict[str, str], int]],
+        ) -> None:
+
+            full_name = f"doiget_tdm_{name}"
+
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+
+            for labels, value in values:
+                label_str = ",".join(
+                    f'{label_name}="{label_value}"'
+                    for (label_name, label_value) in labels.items()
+                )
+                lines.append(f"{full_name}{{{label_str}}} {value}")
+
+        with self._lock:
+
+            add_metric(
+                name="dois_processed_total",
+                metric_type="counter",
+                help_text="Number of DOIs processed",
+                values=[({}, self._n_dois_processed)],
+            )
+
+            for name, help_text, counter in (
+                (
+                    "sources_attempted_total",
+                    "Number of attempts to acquire from a source",
+                    self._n_attempted,
+                ),
+                (
+                    "sources_succeeded_total",
+                    "Number of successful acquisitions from a source",
+                    self._n_succeeded,
+                ),
+                (
+                    "bytes_written_total",
+                    "Number of full-text bytes written to the data directory",
+                    self._n_bytes_written,
+                ),
+            ):
+                add_metric(
+                    name=name,
+                    metric_type="counter",
+                    help_text=help_text,
+                    values=[
+                        ({"publisher": publisher, "format": fmt}, value)
+                        for ((publisher, fmt), value) in sorted(counter.items())
+                    ],
+                )
+
+            add_metric(
+                name="sources_failed_total",
+                metric_type="counter",
+                help_text="Number of failed acquisitions from a source",
+                values=[
+                    ({"publisher": publisher, "format": fmt, "error": error}, value)
+                    for ((publisher, fmt, error), value) in sorted(
+                        self._n_failed.items()
+                    )
+                ],
+            )
+
+            for name, help_text, gauge in (
+                (
+                    "limiter_waiting",
+                    "Number of requests waiting on a rate limiter",
+                    self._n_limiter_waiting,
+                ),
+                (
+                    "requests_in_flight",
+                    "Number of requests in flight",
+                    self._n_in_flight,
+                ),
+            ):
+                add_metric(
+                    name=name,
+                    metric_type="gauge",
+                    help_text=help_text,
+                    values=[
+                        ({"publisher": publisher}, value)
+                        for (publisher, value) in sorted(gauge.items())
+                    ],
+                )
+
+        return "\n".join(lines) + "\n"
+
+
+#: The metrics for the current process.
+METRICS = Metrics()
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self) -> None:
+
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(http.HTTPStatus.NOT_FOUND)
+            return
+
+        body = (
+            METRICS.to_prometheus() + doiget_tdm.timing.TIMINGS.to_prometheus()
+        ).encode()
+
+        self.send_response(http.HTTPStatus.OK)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        LOGGER.debug(f"Metrics request: {format % args}")
+
+
+def serve(port: int, host: str = "127.0.0.1") -> http.server.ThreadingHTTPServer:
+    """
+    Serve the metrics (and the stage timings) over HTTP, from a background thread.
+
+    Parameters
+    ----------
+    port
+        Port on which to serve; a value of 0 uses an arbitrary free port.
+    host
+        Address on which to serve.
+
+    Returns
+    -------
+        The server, which can be stopped by calling its ``shutdown`` method.
+    """
+
+    server = http.server.ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+
+    thread = threading.Thread(
+        target=server.serve_forever,
+        name="doiget-tdm-metrics",
+        daemon=True,
+    )
+    thread.start()
+
+    (served_host, served_port) = server.server_address[:2]
+
+    LOGGER.info(f"Serving metrics at http://{served_host!s}:{served_port}/metrics")
+
+    return server
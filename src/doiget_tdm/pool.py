@@ -0,0 +1,108 @@
+"""
+Run tasks across worker processes, without forming all the tasks ahead of the
+workers.
+"""
+
+from __future__ import annotations
+
+import collections
+import collections.abc
+import concurrent.futures
+import logging
+import multiprocessing
+import typing
+
+import doiget_tdm.config
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+
+T = typing.TypeVar("T")
+
+
+def iter_results(
+    func: typing.Callable[..., T],
+    tasks: collections.abc.Iterable[tuple[typing.Any, ...]],
+    n_workers: int,
+    ordered: bool = False,
+) -> collections.abc.Iterator[T]:
+    """
+    Run tasks, potentially across worker processes.
+
+    Parameters
+    ----------
+    func
+        Function that is called with the arguments of each task.
+    tasks
+        The arguments for each task; these are formed as they are needed.
+    n_workers
+        Number of worker processes; a value of 1 runs the tasks in the current
+        process.
+    ordered
+        Whether the results are yielded in the order of the tasks, rather than in
+        the order in which the tasks finish.
+
+    Returns
+    -------
+        The result of each task.
+
+    Notes
+    -----
+    * Only a limited number of tasks are submitted ahead of the workers, so that
+      the tasks (and their results) are not all held in memory.
+    * Workers are spawned, rather than forked, because forking a process that is
+      running polars threads can deadlock; the settings are passed explicitly so
+      that any changes made in this process also apply in the workers.
+
+    """
+
+    if n_workers == 1:
+        for task in tasks:
+            yield func(*task)
+        return
+
+    max_pending = n_workers * 2
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=doiget_tdm.config.init_worker_settings,
+        initargs=(doiget_tdm.config.SETTINGS.model_dump(),),
+    ) as executor:
+
+        if ordered:
+
+            queued: collections.deque[concurrent.futures.Future[T]] = (
+                collections.deque()
+            )
+
+            for task in tasks:
+
+                queued.append(executor.submit(func, *task))
+
+                if len(queued) >= max_pending:
+                    yield queued.popleft().result()
+
+            while len(queued) > 0:
+                yield queued.popleft().result()
+
+            return
+
+        pending: set[concurrent.futures.Future[T]] = set()
+
+        for task in tasks:
+
+            pending.add(executor.submit(func, *task))
+
+            if len(pending) >= max_pending:
+                (done, pending) = concurrent.futures.wait(
+                    pending,
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                for future in done:
+                    yield future.result()
+
+        for future in concurrent.futures.as_completed(pending):
+            yield future.result()
@@ -0,0 +1,208 @@
+"""
+Profiles the running of a command, writing the reports into the cache directory.
+"""
+
+from __future__ import annotations
+
+import collections
+import collections.abc
+import contextlib
+import cProfile
+import datetime
+import enum
+import io
+import logging
+import pathlib
+import pstats
+import sys
+import threading
+import types
+
+import rich
+
+import doiget_tdm.config
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+
+class ProfilerName(enum.Enum):
+    """
+    Available profilers.
+    """
+
+    #: Deterministic profiling using ``cProfile``, with a stack sampler running
+    #: alongside to produce the collapsed stacks.
+    CPROFILE = "cprofile"
+    #: Only the (lower overhead) stack sampler.
+    SAMPLING = "sampling"
+
+
+class StackSampler:
+
+    def __init__(
+        self,
+        interval_s: float = 0.005,
+        thread_id: int | None = None,
+    ) -> None:
+        """
+        Periodically records the call stack of a thread, from a background thread.
+
+        Parameters
+        ----------
+        interval_s
+            Time, in seconds, between samples.
+        thread_id
+            Identifier of the thread to sample; if not provided, the thread that
+            creates the sampler is used.
+        """
+
+        self.interval_s = interval_s
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+
+        #: Number of samples for each call stack, in 'collapsed' form.
+        self.counts: collections.Counter[str] = collections.Counter()
+
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="doiget-tdm-sampler",
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        """
+        Begin sampling.
+        """
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Finish sampling.
+        """
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+
+        while not self._stop_event.wait(timeout=self.interval_s):
+
+            frame = sys._current_frames().get(self.thread_id)
+
+            if frame is not None:
+                self.counts[collapse_stack(frame=frame)] += 1
+
+    def write_collapsed(self, output_path: pathlib.Path) -> None:
+        """
+        Write the sampled stacks in the 'collapsed' format, as used by
+        ``flamegraph.pl``, ``speedscope``, and similar tools.
+
+        Parameters
+        ----------
+        output_path
+            File to write.
+        """
+
+        output_path.write_text(
+            "".join(f"{stack} {count}\n" for (stack, count) in self.counts.items())
+        )
+
+
+def collapse_stack(frame: types.FrameType) -> str:
+    """
+    Form a string representation of the call stack that ends at a frame.
+
+    Parameters
+    ----------
+    frame
+        The innermost frame.
+
+    Returns
+    -------
+        The function names in the stack, from outermost to innermost, separated by
+        semicolons.
+    """
+
+    names: list[str] = []
+
+    curr_frame: types.FrameType | None = frame
+
+    while curr_frame is not None:
+        module_name = curr_frame.f_globals.get("__name__", "?")
+        names.append(f"{module_name}:{curr_frame.f_code.co_name}")
+        curr_frame = curr_frame.f_back
+
+    return ";".join(reversed(names))
+
+
+@contextlib.contextmanager
+def profile(
+    name: str,
+    profiler_name: ProfilerName = ProfilerName.CPROFILE,
+    output_dir: pathlib.Path | None = None,
+) -> collections.abc.Iterator[None]:
+    """
+    Profile the enclosed code.
+
+    Parameters
+    ----------
+    name
+        Name to include in the report filenames (such as the command name).
+    profiler_name
+        The profiler to use.
+    output_dir
+        Directory in which to write the reports; defaults to ``cache_dir``.
+
+    Notes
+    -----
+    * The reports are written to timestamped files; a ``.collapsed`` file with the
+      sampled call stacks and, for ``cProfile``, a ``.pstats`` file (which can be
+      read with ``pstats`` or viewers such as ``snakeviz``).
+    * Only the calling thread is profiled, so work in any worker processes (such
+      as in the ``revalidate`` command) is not included.
+
+    """
+
+    if output_dir is None:
+        output_dir = doiget_tdm.config.SETTINGS.cache_dir
+
+    curr_time = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    output_stem = f"profile_{name}_{curr_time}"
+
+    profiler = cProfile.Profile() if profiler_name == ProfilerName.CPROFILE else None
+
+    sampler = StackSampler()
+
+    sampler.start()
+
+    if profiler is not None:
+        profiler.enable()
+
+    try:
+        yield
+
+    finally:
+
+        if profiler is not None:
+            profiler.disable()
+
+        sampler.stop()
+
+        output_dir.mkdir(exist_ok=True, parents=True)
+
+        collapsed_path = output_dir / f"{output_stem}.collapsed"
+        sampler.write_collapsed(output_path=collapsed_path)
+        rich.print(f"Wrote sampled call stacks to {collapsed_path}")
+
+        if profiler is not None:
+
+            pstats_path = output_dir / f"{output_stem}.pstats"
+            profiler.dump_stats(pstats_path)
+            rich.print(f"Wrote profile statistics to {pstats_path}")
+
+            summary = io.StringIO()
+            stats = pstats.Stats(profiler, stream=summary)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(20)
+            LOGGER.info(f"Profile summary:\n{summary.getvalue()}")
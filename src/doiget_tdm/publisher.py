@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import typing
+import collections.abc
 import logging
 import abc
 
@@ -13,6 +14,7 @@ import rich
 import doiget_tdm.fulltext
 import doiget_tdm.source
 import doiget_tdm.metadata
+import doiget_tdm.quota
 
 
 LOGGER = logging.getLogger(__name__)
@@ -24,6 +26,9 @@ class Publisher(abc.ABC):
     Abstract base class for defining publishers.
     """
 
+    #: A limit on the number of requests that can be made to the publisher, if any.
+    quota: doiget_tdm.quota.Quota | None = None
+
     @property
     @abc.abstractmethod
     def member_id(self) -> doiget_tdm.metadata.MemberID:
@@ -66,6 +71,72 @@ class Publisher(abc.ABC):
         """
         pass
 
+    def get_acquire_group(
+        self,
+        fulltext: doiget_tdm.fulltext.FullText,  # noqa: ARG002
+    ) -> str | None:
+        """
+        Identifies a group of items whose full-text content is best acquired together.
+
+        Parameters
+        ----------
+        fulltext
+            Information about the full-text item.
+
+        Returns
+        -------
+            A key for the group, or ``None`` if the item is not part of a group. The
+            default is ``None``, unless the publisher is configured and has a quota
+            whose window is too long to wait for (see
+            ``doiget_tdm.quota.MAX_WAIT_S``), in which case all its items form a
+            group.
+
+        Notes
+        -----
+        * Items that are part of a group are acquired in batches from the same
+          group, once a batch has been read from the input (or at the end of the
+          input); this can be used when items share a resource (such as an
+          archive) that is expensive to access.
+        * The acquisition of a group whose publisher has a quota is planned around
+          the remaining budget of the quota.
+
+        """
+
+        # quotas with short windows are handled by waiting for the next window, so
+        # there is no need to plan around their budget
+        if (
+            self.quota is None
+            or self.quota.interval_s <= doiget_tdm.quota.MAX_WAIT_S
+            or not getattr(self, "is_configured", True)
+        ):
+            return None
+
+        return self.quota.name
+
+    def prefetch(
+        self,
+        fulltexts: collections.abc.Sequence[  # noqa: ARG002
+            doiget_tdm.fulltext.FullText
+        ],
+    ) -> None:
+        """
+        Begins acquiring the full-text content for a batch of items, ahead of their
+        acquisition.
+
+        Parameters
+        ----------
+        fulltexts
+            Information about the full-text items, with their sources populated.
+
+        Notes
+        -----
+        * This is called with batches of items from the same acquisition group (see
+          ``get_acquire_group``), immediately before they are acquired in turn; the
+          default is to do nothing.
+
+        """
+        return None
+
 
 class GenericWebHost:
 
@@ -181,7 +252,98 @@ def set_sources_from_crossref(
         fulltext.formats[format_name].sources = sources
 
 
-registry: dict[doiget_tdm.metadata.MemberID, Publisher] = {}
+class Registry:
+
+    def __init__(self) -> None:
+        """
+        Registry of publisher handler instances, keyed by CrossRef member ID.
+
+        Notes
+        -----
+        * The handler for a member ID is only imported (via
+          ``doiget_tdm.publishers.load_handler``) when that member ID is first
+          looked up, so that the dependencies and settings of handlers that are not
+          needed are never loaded.
+        * Handlers can be added, replaced, and removed by item assignment and
+          deletion, such as to substitute a handler within tests.
+
+        """
+
+        self._handlers: dict[doiget_tdm.metadata.MemberID, Publisher] = {}
+        self._checked: set[doiget_tdm.metadata.MemberID] = set()
+
+    def __setitem__(
+        self,
+        member_id: doiget_tdm.metadata.MemberID,
+        publisher: Publisher,
+    ) -> None:
+        self._handlers[member_id] = publisher
+
+    def __getitem__(self, member_id: doiget_tdm.metadata.MemberID) -> Publisher:
+        self._load(member_id=member_id)
+        return self._handlers[member_id]
+
+    def __delitem__(self, member_id: doiget_tdm.metadata.MemberID) -> None:
+        del self._handlers[member_id]
+
+    def __contains__(self, member_id: object) -> bool:
+
+        if not isinstance(member_id, doiget_tdm.metadata.MemberID):
+            return False
+
+        self._load(member_id=member_id)
+
+        return member_id in self._handlers
+
+    def get(
+        self,
+        member_id: doiget_tdm.metadata.MemberID,
+        default: Publisher | None = None,
+    ) -> Publisher | None:
+        """
+        The handler for a member ID, or ``default`` if there is no handler.
+        """
+        return self[member_id] if member_id in self else default
+
+    def is_loaded(self, member_id: doiget_tdm.metadata.MemberID) -> bool:
+        """
+        Whether a handler for the member ID has been imported.
+        """
+        return member_id in self._handlers
+
+    def items(
+        self,
+    ) -> collections.abc.ItemsView[doiget_tdm.metadata.MemberID, Publisher]:
+        """
+        The member IDs and handlers for all known publishers.
+
+        Notes
+        -----
+        * This imports all the handlers.
+
+        """
+
+        # imported here because the handlers themselves import this module
+        import doiget_tdm.publishers
+
+        doiget_tdm.publishers.load_all_handlers()
+
+        return self._handlers.items()
+
+    def _load(self, member_id: doiget_tdm.metadata.MemberID) -> None:
+
+        if member_id in self._checked:
+            return
+
+        # imported here because the handlers themselves import this module
+        import doiget_tdm.publishers
+
+        doiget_tdm.publishers.load_handler(member_id=member_id)
+
+        self._checked.add(member_id)
+
+
+registry = Registry()
 
 T = typing.TypeVar("T", bound=Publisher)
 
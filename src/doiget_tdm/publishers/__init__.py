@@ -1,37 +1,114 @@
+import importlib
 import importlib.util
-import pathlib
 import sys
 import logging
 
 import doiget_tdm
 import doiget_tdm.publisher
+import doiget_tdm.metadata
 
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.addHandler(logging.NullHandler())
 
 
-def _load_handlers() -> None:
+#: The built-in handler modules, keyed by the CrossRef member ID that they handle.
+#: This allows a handler (and its dependencies) to only be imported when a DOI for
+#: its member ID is encountered.
+MANIFEST: dict[str, str] = {
+    "10": "_ama",
+    "15": "_apa",
+    "78": "_elsevier",
+    "175": "_royal_society",
+    "179": "_sage",
+    "266": "_iop",
+    "297": "_springer_nature",
+    "301": "_taylor_and_francis",
+    "311": "_wiley",
+    "340": "_plos",
+    "341": "_pnas",
+    "1965": "_frontiers",
+    "4443": "_peerj",
+}
 
-    module_files = sorted(pathlib.Path(__file__).parent.glob("*.py"))
+_extra_handlers_loaded = False
 
-    extra_files = (
-        sorted(doiget_tdm.SETTINGS.extra_handlers_path.glob("*.py"))
-        if doiget_tdm.SETTINGS.extra_handlers_path is not None
-        else []
-    )
 
-    file_types = ["base"] * len(module_files) + ["extra"] * len(extra_files)
+def load_handler(member_id: doiget_tdm.metadata.MemberID) -> None:
+    """
+    Import the handler for a member ID, if one exists and is not yet imported.
 
-    all_files = module_files + extra_files
+    Parameters
+    ----------
+    member_id
+        The CrossRef member ID.
 
-    for module_file, file_type in zip(all_files, file_types, strict=True):
+    Notes
+    -----
+    * Any extra handlers (from the ``extra_handlers_path`` setting) are imported
+      before the built-in handler, and take precedence over it.
+
+    """
+
+    _load_extra_handlers()
+
+    if doiget_tdm.publisher.registry.is_loaded(member_id=member_id):
+        return
+
+    try:
+        module_name = MANIFEST[str(member_id)]
+    except KeyError:
+        LOGGER.debug(f"No handler available for member ID {member_id}")
+        return
+
+    _load_builtin_handler(module_name=module_name)
+
+
+def load_all_handlers() -> None:
+    """
+    Import all of the built-in and extra handlers.
+    """
+
+    _load_extra_handlers()
+
+    for member_id, module_name in MANIFEST.items():
+
+        if doiget_tdm.publisher.registry.is_loaded(
+            member_id=doiget_tdm.metadata.MemberID(id_=member_id)
+        ):
+            continue
+
+        _load_builtin_handler(module_name=module_name)
+
+
+def _load_builtin_handler(module_name: str) -> None:
+
+    LOGGER.debug(f"Loading the handler {module_name} (base)")
+
+    importlib.import_module(f"{__name__}.{module_name}")
+
+
+def _load_extra_handlers() -> None:
+
+    global _extra_handlers_loaded
+
+    if _extra_handlers_loaded:
+        return
+
+    _extra_handlers_loaded = True
+
+    if doiget_tdm.SETTINGS.extra_handlers_path is None:
+        return
+
+    extra_files = sorted(doiget_tdm.SETTINGS.extra_handlers_path.glob("*.py"))
+
+    for module_file in extra_files:
 
         # ignore __init__.py and any in-progress modules
         if module_file.name.startswith("__"):
             continue
 
-        LOGGER.debug(f"Loading the handler {module_file.name} ({file_type})")
+        LOGGER.debug(f"Loading the handler {module_file.name} (extra)")
 
         # recipe from the importlib docs
         module_name = f"doiget_tdm.publishers.{module_file.name}"
@@ -50,6 +127,3 @@ def _load_handlers() -> None:
         sys.modules[module_name] = module
 
         spec.loader.exec_module(module)
-
-
-_load_handlers()
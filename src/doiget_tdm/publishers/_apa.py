@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import collections
+import collections.abc
 import logging
+import os
 import typing
 import zipfile
 import io
 import pathlib
+import hashlib
+import functools
 
 import pydantic
 import pydantic_settings
@@ -18,9 +23,16 @@ import py7zr
 import simdjson
 
 import doiget_tdm.config
+import doiget_tdm.doi
+import doiget_tdm.format
+import doiget_tdm.ingest
+import doiget_tdm.pool
 import doiget_tdm.publisher
 import doiget_tdm.metadata
+import doiget_tdm.metrics
 import doiget_tdm.errors
+import doiget_tdm.timing
+import doiget_tdm.work
 
 
 LOGGER = logging.getLogger(__name__)
@@ -32,6 +44,9 @@ class Settings(pydantic_settings.BaseSettings):
     data_path: pathlib.Path | None = None
     passphrase: pydantic.SecretStr | None = None
 
+    # number of archives within the data archive to keep extracted in memory
+    n_cached_archives: int = 4
+
     model_config = pydantic_settings.SettingsConfigDict(
         env_prefix="DOIGET_TDM_APA_",
         secrets_dir=doiget_tdm.config.BASE_CONFIG_DIR,
@@ -70,6 +85,13 @@ class APA(doiget_tdm.publisher.Publisher):
         self.file_lut: dict[str, tuple[str, str]] | None = None
         self.raw_data: bytes | None = None
 
+        # the extracted XML files in the most recently-used archives within the
+        # data archive, so that each archive is only extracted once when its files
+        # are acquired together
+        self._get_inner_archive = functools.lru_cache(
+            maxsize=self.settings.n_cached_archives
+        )(self._extract_inner_archive)
+
     def set_sources(self, fulltext: doiget_tdm.fulltext.FullText) -> None:
 
         # can't set any sources if the API is not configured
@@ -81,19 +103,7 @@ class APA(doiget_tdm.publisher.Publisher):
 
         format_name = doiget_tdm.format.FormatName.XML
 
-        if "alternative-id" not in fulltext.metadata.raw:
-            LOGGER.warning(f"No alternative IDs found for APA work {fulltext.doi}")
-            return
-
-        if not isinstance(fulltext.metadata.raw["alternative-id"], simdjson.Array):
-            raise ValueError("Unexpected JSON structure")
-
-        # raw files are saved under an APA ID, rather than the DOI
-        alternative_ids = [
-            str(alt_id)
-            for alt_id in fulltext.metadata.raw["alternative-id"].as_list()
-            if "-" in str(alt_id)
-        ]
+        alternative_ids = self.get_alternative_ids(fulltext=fulltext)
 
         if len(alternative_ids) == 0:
             LOGGER.warning(f"No alternative IDs found for APA work {fulltext.doi}")
@@ -112,13 +122,67 @@ class APA(doiget_tdm.publisher.Publisher):
 
             fulltext.formats[format_name].sources.append(source)
 
+    def get_alternative_ids(self, fulltext: doiget_tdm.fulltext.FullText) -> list[str]:
+        """
+        The APA IDs for a work, under which its files are saved in the data archive.
+        """
+
+        if "alternative-id" not in fulltext.metadata.raw:
+            return []
+
+        if not isinstance(fulltext.metadata.raw["alternative-id"], simdjson.Array):
+            raise ValueError("Unexpected JSON structure")
+
+        return [
+            str(alt_id)
+            for alt_id in fulltext.metadata.raw["alternative-id"].as_list()
+            if "-" in str(alt_id)
+        ]
+
+    def get_acquire_group(self, fulltext: doiget_tdm.fulltext.FullText) -> str | None:
+
+        # works are grouped by the archive (within the data archive) that contains
+        # their files, so that each archive is only extracted once
+        if not self.is_configured or fulltext.exists:
+            return None
+
+        file_location = self.get_file_location(fulltext=fulltext)
+
+        return None if file_location is None else file_location[0]
+
+    def get_file_location(
+        self,
+        fulltext: doiget_tdm.fulltext.FullText,
+    ) -> tuple[str, str] | None:
+        """
+        The location of the XML file for a work within the data archive.
+
+        Returns
+        -------
+            The name of the archive within the data archive and the name of the file
+            within that archive, or ``None`` if the work is not in the data archive.
+        """
+
+        if self.file_lut is None:
+            self.form_file_lut()
+
+        assert self.file_lut is not None
+
+        for alternative_id in self.get_alternative_ids(fulltext=fulltext):
+
+            link = f"{alternative_id}.xml"
+
+            if link in self.file_lut:
+                return self.file_lut[link]
+
+        return None
+
     def acquire(self, source: doiget_tdm.source.Source) -> bytes:
 
         if isinstance(source.link, typing.Sequence):
             raise ValueError(f"Unexpected link: {source.link}")
 
         if self.file_lut is None:
-            LOGGER.info("Initialising APA data archive")
             self.form_file_lut()
 
         assert self.file_lut is not None
@@ -131,22 +195,79 @@ class APA(doiget_tdm.publisher.Publisher):
         return self.read_from_archive(alternative_id=str(source.link))
 
     def form_file_lut(self) -> None:
+        """
+        Load the index of the XML files in the APA data archive, building the index
+        if it is not present in the cache directory.
+        """
+
+        # deferred import, as it is slow to import and is only needed once the
+        # data archive is used
+        import polars as pl
+
+        index_path = self.get_index_path()
+
+        if not index_path.exists():
+            LOGGER.info("Indexing APA data archive")
+            self.build_index(index_path=index_path)
+
+        index = pl.read_parquet(index_path)
+
+        self.file_lut = {
+            alternative_id: (outer_name, inner_name)
+            for (alternative_id, outer_name, inner_name) in index.iter_rows()
+        }
+
+        LOGGER.info(f"Loaded index of {len(self.file_lut)} APA XML files")
+
+    def get_index_path(self) -> pathlib.Path:
+        """
+        The path to the index of the APA data archive.
+
+        Notes
+        -----
+        * The filename depends on the path, size, and modification time of the data
+          archive, so that a changed archive is re-indexed.
+
+        """
 
         assert self.settings.data_path is not None
-        assert self.settings.passphrase is not None
 
-        # the APA data is assumed to be encrypted using age
+        stat = self.settings.data_path.stat()
 
-        # load all the encrypted raw data
-        apa_raw_data = self.settings.data_path.read_bytes()
+        archive_key = hashlib.blake2b(
+            (
+                f"{self.settings.data_path.resolve()}:"
+                + f"{stat.st_size}:{stat.st_mtime_ns}"
+            ).encode(),
+            digest_size=8,
+        ).hexdigest()
 
-        # decrypt and store for future access
-        self.raw_data = pyrage.passphrase.decrypt(
-            ciphertext=apa_raw_data,
-            passphrase=self.settings.passphrase.get_secret_value(),
-        )
+        return doiget_tdm.config.SETTINGS.cache_dir / f"apa_index_{archive_key}.parquet"
+
+    def build_index(self, index_path: pathlib.Path) -> None:
+        """
+        Write an index of the XML files in the APA data archive.
+
+        Parameters
+        ----------
+        index_path
+            Path to write the index, in Parquet format.
 
-        with zipfile.ZipFile(io.BytesIO(self.raw_data)) as apa_zip_handle:
+        Notes
+        -----
+        * The index has a row for each XML file, with its alternative ID and the
+          names of the archive (within the data archive) and the member (within
+          that archive) that contain it.
+
+        """
+
+        # deferred import, as it is slow to import and is only needed once the
+        # data archive is used
+        import polars as pl
+
+        rows: list[tuple[str, str, str]] = []
+
+        with zipfile.ZipFile(io.BytesIO(self.get_raw_data())) as apa_zip_handle:
 
             apa_zip_namelist = apa_zip_handle.namelist()
 
@@ -167,9 +288,8 @@ class APA(doiget_tdm.publisher.Publisher):
                 # this file is itself a compressed archive
                 inner_handle_func = py7zr.SevenZipFile if is_7z else zipfile.ZipFile
 
-                inner_handle = inner_handle_func(io.BytesIO(inner_data))
-
-                inner_namelist = inner_handle.namelist()
+                with inner_handle_func(io.BytesIO(inner_data)) as inner_handle:
+                    inner_namelist = inner_handle.namelist()
 
                 for inner_name in inner_namelist:
 
@@ -178,36 +298,381 @@ class APA(doiget_tdm.publisher.Publisher):
                     if not inner_path.suffix == ".xml":
                         continue
 
-                    if self.file_lut is None:
-                        self.file_lut = {}
+                    rows.append((inner_path.name, apa_zip_name, inner_name))
+
+        index = pl.DataFrame(
+            data=rows,
+            schema={
+                "alternative_id": pl.String(),
+                "outer_name": pl.String(),
+                "inner_name": pl.String(),
+            },
+            orient="row",
+        )
+
+        # write to a temporary file first, so that an interrupted write does not
+        # leave a partial index
+        tmp_path = index_path.with_suffix(".tmp")
+        index.write_parquet(tmp_path)
+        tmp_path.replace(index_path)
 
-                    self.file_lut[inner_path.name] = (
-                        apa_zip_name,
-                        inner_name,
-                    )
+        LOGGER.info(f"Wrote index of {len(index)} APA XML files to {index_path}")
+
+    def get_raw_data(self) -> bytes:
+        """
+        The decrypted APA data archive.
+
+        Notes
+        -----
+        * The archive is decrypted on the first call and then kept in memory, so
+          that it is only decrypted if a file needs to be read from it.
+
+        """
+
+        if self.raw_data is None:
+
+            assert self.settings.data_path is not None
+            assert self.settings.passphrase is not None
+
+            LOGGER.info("Decrypting APA data archive")
+
+            # the APA data is assumed to be encrypted using age
+            self.raw_data = pyrage.passphrase.decrypt(
+                ciphertext=self.settings.data_path.read_bytes(),
+                passphrase=self.settings.passphrase.get_secret_value(),
+            )
+
+        return self.raw_data
 
     def read_from_archive(self, alternative_id: str) -> bytes:
 
         assert self.file_lut is not None
 
-        (outer_path, inner_path) = self.file_lut[alternative_id]
+        (outer_name, inner_name) = self.file_lut[alternative_id]
+
+        return self._get_inner_archive(outer_name)[inner_name]
+
+    def read_outer_member(self, outer_name: str) -> bytes:
+        """
+        Read an archive from within the data archive.
+
+        Parameters
+        ----------
+        outer_name
+            Name of the archive within the data archive.
+
+        Returns
+        -------
+            The (compressed) archive.
+        """
+
+        with zipfile.ZipFile(io.BytesIO(self.get_raw_data())) as apa_zip_handle:
+            return apa_zip_handle.read(name=outer_name)
+
+    def _extract_inner_archive(self, outer_name: str) -> dict[str, bytes]:
+
+        LOGGER.info(f"Extracting {outer_name} from the APA data archive")
+
+        return extract_xml(
+            outer_name=outer_name,
+            outer_data=self.read_outer_member(outer_name=outer_name),
+        )
+
+
+def extract_xml(
+    outer_name: str,
+    outer_data: bytes,
+    inner_names: collections.abc.Collection[str] | None = None,
+) -> dict[str, bytes]:
+    """
+    Extract XML files from an archive within the APA data archive.
+
+    Parameters
+    ----------
+    outer_name
+        Name of the archive within the data archive; its suffix identifies whether
+        it is a zip or a 7z archive.
+    outer_data
+        The archive.
+    inner_names
+        Names of the files to extract; if not provided, all XML files are extracted.
+
+    Returns
+    -------
+        The contents of each extracted file, keyed by its name within the archive.
+    """
+
+    is_7z = outer_name.endswith(".7z")
+
+    def is_wanted(inner_name: str) -> bool:
+        if inner_names is None:
+            return inner_name.endswith(".xml")
+        return inner_name in inner_names
+
+    # all the files are extracted in one pass, because reading a single file from a
+    # (solid) 7z archive requires decompressing all the files before it
+    if is_7z:
+        with py7zr.SevenZipFile(io.BytesIO(outer_data)) as inner_handle:
+            targets = [
+                inner_name
+                for inner_name in inner_handle.namelist()
+                if is_wanted(inner_name=inner_name)
+            ]
+            return {
+                inner_name: inner_file.read()
+                for (inner_name, inner_file) in inner_handle.read(
+                    targets=targets
+                ).items()
+            }
+
+    with zipfile.ZipFile(io.BytesIO(outer_data)) as inner_handle:
+        return {
+            inner_name: inner_handle.read(inner_name)
+            for inner_name in inner_handle.namelist()
+            if is_wanted(inner_name=inner_name)
+        }
+
+
+def ingest(
+    dois: collections.abc.Iterable[doiget_tdm.doi.DOI] | None = None,
+    n_workers: int | None = None,
+    show_progress_bar: bool = True,
+) -> None:
+    """
+    Write the full-text content for APA DOIs into the data directory, by unpacking
+    the APA data archive in bulk rather than acquiring each DOI in turn.
+
+    Parameters
+    ----------
+    dois
+        The DOIs to ingest; any non-APA DOIs, or DOIs that already have full-text
+        XML content, are skipped. If not provided, the files in the data archive are
+        ingested for the APA works whose metadata is in the data directory.
+    n_workers
+        Number of worker processes used to extract, validate, encrypt, and write the
+        files. If not provided, the number of CPUs is used; a value of 1 does this
+        in the current process.
+    show_progress_bar
+        Whether to show a progress bar.
+
+    Notes
+    -----
+    * The files in the data archive are named by their APA ID, which is only
+      related to a DOI through the "alternative-id" field of the CrossRef metadata
+      for the DOI. Hence, if DOIs are provided, the metadata for each DOI is
+      acquired if it is not already present. Otherwise, each file in the data
+      archive is matched to a DOI via the metadata in the data directory, and any
+      files without a match are not ingested.
+    * Each archive within the data archive is read once, and the files it contains
+      are handled by a worker process.
+
+    """
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    apa = doiget_tdm.publisher.registry[APA.member_id]
+
+    if not isinstance(apa, APA) or not apa.is_configured:
+        raise ValueError("Handler for APA is not configured")
+
+    # deferred import, as it is only needed for the ingest
+    import alive_progress
+
+    n_dois = (
+        len(dois)
+        if dois is not None and isinstance(dois, collections.abc.Sized)
+        else None
+    )
+
+    with alive_progress.alive_bar(
+        total=n_dois,
+        disable=not show_progress_bar,
+    ) as progress_bar:
+
+        plan = (
+            plan_archive_ingest(apa=apa)
+            if dois is None
+            else plan_doi_ingest(apa=apa, dois=dois, progress_bar=progress_bar)
+        )
+
+        LOGGER.info(
+            f"Ingesting {sum(len(members) for members in plan.values())} files "
+            + f"from {len(plan)} APA archives"
+        )
+
+        tasks = (
+            (outer_name, apa.read_outer_member(outer_name=outer_name), members)
+            for (outer_name, members) in sorted(plan.items())
+        )
+
+        with doiget_tdm.timing.labels(
+            publisher=type(apa).__name__,
+            fmt=doiget_tdm.format.FormatName.XML.name,
+        ):
+
+            for results in doiget_tdm.pool.iter_results(
+                func=_ingest_archive,
+                tasks=tasks,
+                n_workers=n_workers,
+            ):
+
+                for result in results:
+                    doiget_tdm.ingest.record_result(result=result)
+                    progress_bar()
+
+
+#: The files to write from each archive within the data archive, as pairs of the
+#: name of the file within the archive and the quoted DOI.
+IngestPlan: typing.TypeAlias = dict[str, list[tuple[str, str]]]
+
+
+def plan_doi_ingest(
+    apa: APA,
+    dois: collections.abc.Iterable[doiget_tdm.doi.DOI],
+    progress_bar: typing.Callable[[], typing.Any],
+) -> IngestPlan:
+    """
+    Identify the files in the data archive for a set of DOIs.
+
+    Parameters
+    ----------
+    apa
+        The APA publisher handler.
+    dois
+        The DOIs; their metadata is acquired if it is not already present.
+    progress_bar
+        Called for each DOI that is skipped.
+
+    Returns
+    -------
+        The files to ingest.
+    """
+
+    plan: IngestPlan = collections.defaultdict(list)
+
+    for doi in dois:
+
+        work = doiget_tdm.work.Work(doi=doi)
+
+        if not work.metadata.exists:
+            work.metadata.acquire()
 
-        assert self.raw_data is not None
+        file_location = (
+            None
+            if (
+                work.metadata.member_id != APA.member_id
+                or work.fulltext.has_format(fmt=doiget_tdm.format.FormatName.XML)
+            )
+            else apa.get_file_location(fulltext=work.fulltext)
+        )
+
+        if file_location is None:
+            LOGGER.info(f"Skipping ingest of {doi}")
+            doiget_tdm.metrics.METRICS.add_doi_processed()
+            progress_bar()
+            continue
+
+        (outer_name, inner_name) = file_location
+
+        plan[outer_name].append((inner_name, doi.quoted))
+
+    return plan
+
+
+def plan_archive_ingest(apa: APA) -> IngestPlan:
+    """
+    Identify the DOIs for the files in the data archive, from the metadata for the
+    APA works in the data directory.
+
+    Parameters
+    ----------
+    apa
+        The APA publisher handler.
+
+    Returns
+    -------
+        The files to ingest, for the matched DOIs that do not already have full-text
+        XML content.
+    """
+
+    import doiget_tdm.data
+
+    if apa.file_lut is None:
+        apa.form_file_lut()
+
+    assert apa.file_lut is not None
+
+    LOGGER.info("Matching the APA data archive to the works in the data directory")
+
+    # the work for the file of each alternative ID
+    doi_lut: dict[str, doiget_tdm.work.Work] = {}
+
+    for work in doiget_tdm.data.iter_unsorted_works(
+        test_if_valid_work=lambda work: (
+            work.metadata.exists and work.metadata.member_id == APA.member_id
+        ),
+    ):
+        for alternative_id in apa.get_alternative_ids(fulltext=work.fulltext):
+            doi_lut[f"{alternative_id}.xml"] = work
+
+    plan: IngestPlan = collections.defaultdict(list)
 
-        is_7z = outer_path.endswith(".7z")
+    n_unmatched = 0
 
-        with zipfile.ZipFile(io.BytesIO(self.raw_data)) as apa_zip_handle:
+    for link, (outer_name, inner_name) in apa.file_lut.items():
 
-            # read the bytes of the file within the APA zip
-            outer_data = apa_zip_handle.read(name=outer_path)
+        matched_work = doi_lut.get(link)
 
-            data: bytes
+        if matched_work is None:
+            n_unmatched += 1
+            continue
 
-            if is_7z:
-                with py7zr.SevenZipFile(io.BytesIO(outer_data)) as inner_handle:
-                    data = inner_handle.read([inner_path])[inner_path].read()
-            else:
-                with zipfile.ZipFile(io.BytesIO(outer_data)) as inner_handle:
-                    data = inner_handle.read(inner_path)
+        if matched_work.fulltext.has_format(fmt=doiget_tdm.format.FormatName.XML):
+            continue
+
+        plan[outer_name].append((inner_name, matched_work.doi.quoted))
+
+    if n_unmatched > 0:
+        LOGGER.warning(
+            f"{n_unmatched} files in the APA data archive do not match any work in "
+            + "the data directory; these can be ingested by providing their DOIs"
+        )
+
+    return plan
+
+
+def _ingest_archive(
+    outer_name: str,
+    outer_data: bytes,
+    members: list[tuple[str, str]],
+) -> list[doiget_tdm.ingest.IngestResult]:
+
+    extracted = extract_xml(
+        outer_name=outer_name,
+        outer_data=outer_data,
+        inner_names={inner_name for (inner_name, _) in members},
+    )
+
+    results: list[doiget_tdm.ingest.IngestResult] = []
+
+    for inner_name, quoted_doi in members:
+
+        if inner_name not in extracted:
+            err = KeyError(f"{inner_name} not found in {outer_name}")
+            results.append(
+                doiget_tdm.ingest.IngestResult(
+                    quoted_doi=quoted_doi, n_bytes=0, error=err
+                )
+            )
+            continue
+
+        results.append(
+            doiget_tdm.ingest.write_xml(
+                quoted_doi=quoted_doi,
+                data=extracted[inner_name],
+                encrypt=True,
+            )
+        )
 
-        return data
+    return results
@@ -10,6 +10,7 @@ import pydantic_settings
 import doiget_tdm.config
 import doiget_tdm.publisher
 import doiget_tdm.metadata
+import doiget_tdm.quota
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.addHandler(logging.NullHandler())
@@ -20,6 +21,8 @@ class Settings(pydantic_settings.BaseSettings):
     api_key: pydantic.SecretStr | None = None
     institution_token: pydantic.SecretStr | None = None
 
+    n_requests_per_week: int | None = None
+
     model_config = pydantic_settings.SettingsConfigDict(
         env_prefix="DOIGET_TDM_ELSEVIER_",
         secrets_dir=doiget_tdm.config.BASE_CONFIG_DIR,
@@ -47,6 +50,16 @@ class Elsevier(doiget_tdm.publisher.Publisher):
         if not self.is_configured:
             LOGGER.warning("Handler for Elsevier is not configured")
 
+        self.quota = (
+            doiget_tdm.quota.Quota(
+                name=type(self).__name__,
+                limit=self.settings.n_requests_per_week,
+                interval_s=60 * 60 * 24 * 7,
+            )
+            if self.settings.n_requests_per_week is not None
+            else None
+        )
+
         self.session: doiget_tdm.web.WebRequester | None = None
 
     def initialise(self) -> None:
@@ -66,7 +79,7 @@ class Elsevier(doiget_tdm.publisher.Publisher):
 
             headers[header_name] = header_value
 
-        self.session = doiget_tdm.web.WebRequester(headers=headers)
+        self.session = doiget_tdm.web.WebRequester(headers=headers, quota=self.quota)
 
     def set_sources(self, fulltext: doiget_tdm.fulltext.FullText) -> None:
 
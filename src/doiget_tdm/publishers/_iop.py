@@ -1,33 +1,196 @@
 from __future__ import annotations
 
+import collections.abc
+import concurrent.futures
+import contextlib
+import contextvars
+import threading
 import typing
 import logging
 import json
+import pathlib
+import sqlite3
 import tempfile
 import zipfile
-import pathlib
 
 import pydantic
 import pydantic_settings
 
 import pysftp
-import paramiko
 
 import upath
 
-import simdjson
-
 import doiget_tdm.config
+import doiget_tdm.fulltext
 import doiget_tdm.publisher
 import doiget_tdm.metadata
-import doiget_tdm.work
 import doiget_tdm.format
+import doiget_tdm.timing
 
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.addHandler(logging.NullHandler())
 
 
+#: Size, in bytes, above which a downloaded file is spooled to disk rather than being
+#: held in memory.
+SPOOL_MAX_SIZE = 64 * 1024 * 1024
+
+#: The directories on the sFTP server, keyed by the type of file that they contain.
+SERVER_DIRS: dict[str, str] = {"XML": "XMLdata", "PDF": "PDFdata"}
+
+
+class ServerFileList:
+
+    __slots__ = ("_db",)
+
+    def __init__(self, path: pathlib.Path) -> None:
+        """
+        A record of the files on the IOP sFTP server, stored in a SQLite database.
+
+        Parameters
+        ----------
+        path
+            Path to the database.
+
+        Notes
+        -----
+        * The DOIs are stored in a normalised (lower case) form, so that each DOI
+          can be looked up with a single query.
+
+        """
+
+        self._db = sqlite3.connect(path)
+
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            + "file_type TEXT, doi TEXT, filename TEXT, mtime INTEGER, "
+            + "PRIMARY KEY (doi, file_type)) WITHOUT ROWID"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS dirs ("
+            + "file_type TEXT PRIMARY KEY, mtime INTEGER)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def normalise_doi(doi: str) -> str:
+        """
+        Form the (case-insensitive) DOI in the form used in the file list.
+        """
+        return doi.lower()
+
+    @property
+    def is_empty(self) -> bool:
+        """
+        Whether the file list has not yet been formed.
+        """
+        return self._db.execute("SELECT 1 FROM dirs LIMIT 1").fetchone() is None
+
+    def get_filenames(self, doi: str) -> dict[str, str]:
+        """
+        Look up the files for a DOI.
+
+        Parameters
+        ----------
+        doi
+            The DOI.
+
+        Returns
+        -------
+            The name of each file, keyed by its file type ("XML" or "PDF").
+        """
+
+        rows = self._db.execute(
+            "SELECT file_type, filename FROM files WHERE doi = ?",
+            (self.normalise_doi(doi=doi),),
+        )
+
+        return dict(rows.fetchall())
+
+    def get_dir_mtime(self, file_type: str) -> int | None:
+        """
+        The modification time of a directory on the server, as of the last time
+        that it was listed.
+        """
+
+        row = self._db.execute(
+            "SELECT mtime FROM dirs WHERE file_type = ?",
+            (file_type,),
+        ).fetchone()
+
+        return None if row is None else int(row[0])
+
+    def get_latest_mtime(self, file_type: str) -> int | None:
+        """
+        The latest modification time of the files of a type in the file list.
+        """
+
+        row = self._db.execute(
+            "SELECT MAX(mtime) FROM files WHERE file_type = ?",
+            (file_type,),
+        ).fetchone()
+
+        return None if row[0] is None else int(row[0])
+
+    def update(
+        self,
+        file_type: str,
+        dir_mtime: int,
+        entries: collections.abc.Iterable[tuple[str, str, int]],
+        replace: bool = False,
+    ) -> int:
+        """
+        Add files of a type to the file list.
+
+        Parameters
+        ----------
+        file_type
+            The type of the files.
+        dir_mtime
+            The modification time of the directory that contains the files.
+        entries
+            The DOI, file name, and modification time of each file.
+        replace
+            Whether to remove any existing files of the type.
+
+        Returns
+        -------
+            The number of files that were added (or updated).
+        """
+
+        with self._db:
+
+            if replace:
+                self._db.execute("DELETE FROM files WHERE file_type = ?", (file_type,))
+
+            n_before = self._db.total_changes
+
+            self._db.executemany(
+                "INSERT OR REPLACE INTO files (file_type, doi, filename, mtime) "
+                + "VALUES (?, ?, ?, ?)",
+                (
+                    (file_type, self.normalise_doi(doi=doi), filename, mtime)
+                    for (doi, filename, mtime) in entries
+                ),
+            )
+
+            n_added = self._db.total_changes - n_before
+
+            self._db.execute(
+                "INSERT OR REPLACE INTO dirs (file_type, mtime) VALUES (?, ?)",
+                (file_type, dir_mtime),
+            )
+
+        return n_added
+
+    def close(self) -> None:
+        """
+        Release the database connection.
+        """
+        self._db.close()
+
+
 class Settings(pydantic_settings.BaseSettings):
 
     valid_hostname: str | None = None
@@ -36,6 +199,9 @@ class Settings(pydantic_settings.BaseSettings):
     server_address: str = "iopp-public-transfer-server.cld.iop.org"
     server_port: int = 22
 
+    # number of concurrent sessions with the sFTP server
+    n_connections: int = 4
+
     model_config = pydantic_settings.SettingsConfigDict(
         env_prefix="DOIGET_TDM_IOP_",
         secrets_dir=doiget_tdm.config.BASE_CONFIG_DIR,
@@ -64,67 +230,142 @@ class IOP(doiget_tdm.publisher.Publisher):
             LOGGER.warning("Handler for IOP is not configured")
 
         self.cache_dir = doiget_tdm.config.SETTINGS.cache_dir / "iop"
-        self.cache_dir.mkdir(exist_ok=True)
 
-        self.server_file_list_path = self.cache_dir / "iop_server_file_list.json"
+        self.server_file_list_path = self.cache_dir / "iop_server_file_list.sqlite"
 
-        self._file_list: simdjson.Object | None = None
+        # the file list from earlier versions, which is imported if present
+        self.legacy_server_file_list_path = self.cache_dir / "iop_server_file_list.json"
 
-        self._connection: pysftp.Connection | None = None
+        self._file_list: ServerFileList | None = None
 
-    def initialise(self) -> None:
+        # idle sessions with the sFTP server, which are formed as they are needed; the
+        # condition is notified whenever a session is returned or discarded
+        self._idle_connections: list[pysftp.Connection] = []
+        self._n_connections = 0
+        self._connections_changed = threading.Condition()
 
-        if not self.is_configured:
-            return
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+        # downloads that have been started ahead of their acquisition, keyed by the
+        # remote path
+        self._prefetched: dict[str, concurrent.futures.Future[bytes]] = {}
+
+    def _connect(self) -> pysftp.Connection:
 
         assert self.settings.username is not None
         assert self.settings.password is not None
 
-        if self._connection is None or (
-            hasattr(self._connection, "_sftp_live") and not self._connection._sftp_live
-        ):
+        cnopts = pysftp.CnOpts()
+        cnopts.hostkeys = None
 
-            cnopts = pysftp.CnOpts()
-            cnopts.hostkeys = None
+        LOGGER.info("Connecting to the IOP sFTP server")
 
-            LOGGER.info("Connecting to the IOP sFTP server")
+        return pysftp.Connection(
+            host=self.settings.server_address,
+            username=self.settings.username.get_secret_value(),
+            password=self.settings.password.get_secret_value(),
+            port=self.settings.server_port,
+            cnopts=cnopts,
+        )
 
-            self._connection = pysftp.Connection(
-                host=self.settings.server_address,
-                username=self.settings.username.get_secret_value(),
-                password=self.settings.password.get_secret_value(),
-                port=self.settings.server_port,
-                cnopts=cnopts,
-            )
+    @contextlib.contextmanager
+    def connection(self) -> collections.abc.Iterator[pysftp.Connection]:
+        """
+        Use a session with the sFTP server from the pool of sessions.
+
+        Notes
+        -----
+        * A new session is formed if there are no idle sessions and there are fewer
+          than ``n_connections`` sessions; otherwise, this waits for a session to
+          become idle or to be discarded.
+        * Sessions that are no longer connected are discarded, both when they are
+          returned to the pool and when they are taken from it.
+
+        """
+
+        if not self.is_configured:
+            raise ValueError("Handler for IOP is not configured")
+
+        connection = self._take_connection()
+
+        if connection is None:
+            try:
+                connection = self._connect()
+            except Exception:
+                with self._connections_changed:
+                    self._n_connections -= 1
+                    self._connections_changed.notify()
+                raise
+
+        try:
+            yield connection
+        finally:
+            with self._connections_changed:
+                if is_active(connection=connection):
+                    self._idle_connections.append(connection)
+                else:
+                    self._discard_connection(connection=connection)
+                self._connections_changed.notify()
+
+    def _take_connection(self) -> pysftp.Connection | None:
+        """
+        Take an idle session from the pool, waiting for one if required.
+
+        Returns
+        -------
+            The session, or ``None`` if a new session can instead be formed (which
+            has been counted towards ``n_connections``).
+        """
+
+        with self._connections_changed:
+
+            while True:
+
+                # the most recently used sessions are taken first, as they are the
+                # least likely to have timed out
+                while len(self._idle_connections) > 0:
+
+                    connection = self._idle_connections.pop()
+
+                    if is_active(connection=connection):
+                        return connection
+
+                    self._discard_connection(connection=connection)
+
+                if self._n_connections < self.settings.n_connections:
+                    self._n_connections += 1
+                    return None
+
+                self._connections_changed.wait()
+
+    def _discard_connection(self, connection: pysftp.Connection) -> None:
+
+        LOGGER.info("Discarding an inactive session with the IOP sFTP server")
+
+        self._n_connections -= 1
+
+        with contextlib.suppress(Exception):
+            connection.close()
 
     def set_sources(self, fulltext: doiget_tdm.fulltext.FullText) -> None:
 
-        if self._file_list is None:
-            self.load_server_file_list()
+        file_list = self.load_server_file_list()
 
-        assert self._file_list is not None
+        filenames = file_list.get_filenames(doi=str(fulltext.doi))
+
+        if len(filenames) == 0:
+            LOGGER.error(f"No entry in the server file list for {fulltext.doi}")
+            return
 
         for format_name in [
             doiget_tdm.format.FormatName.XML,
             doiget_tdm.format.FormatName.PDF,
         ]:
 
-            format_list = self._file_list[format_name.name]
-
-            if not isinstance(format_list, simdjson.Object):
-                raise ValueError()
-
-            try:
-                filename = format_list[str(fulltext.doi)]
-            except KeyError:
-                try:
-                    filename = format_list[str(fulltext.doi).upper()]
-                except KeyError:
-                    msg = f"No entry in the server file list for {fulltext.doi}"
-                    LOGGER.error(msg)
-                    break
+            if format_name.name not in filenames:
+                continue
 
-            link = f"{format_name.name}data/{filename}"
+            link = f"{SERVER_DIRS[format_name.name]}/{filenames[format_name.name]}"
 
             source = doiget_tdm.source.Source(
                 acq_func=self.acquire,
@@ -135,6 +376,81 @@ class IOP(doiget_tdm.publisher.Publisher):
 
             fulltext.formats[format_name].sources = [source]
 
+    def get_acquire_group(
+        self,
+        fulltext: doiget_tdm.fulltext.FullText,  # noqa: ARG002
+    ) -> str | None:
+
+        # works are grouped so that they are acquired in batches, allowing their
+        # files to be downloaded concurrently (see ``prefetch``)
+        return "iop" if self.is_configured else None
+
+    def prefetch(
+        self,
+        fulltexts: collections.abc.Sequence[doiget_tdm.fulltext.FullText],
+    ) -> None:
+
+        # any downloads from a previous batch that were not used are discarded
+        for future in self._prefetched.values():
+            future.cancel()
+
+        self._prefetched.clear()
+
+        if not self.is_configured:
+            return
+
+        # an invalid hostname is reported when each source is acquired, which only
+        # affects the acquisition of that source
+        try:
+            doiget_tdm.errors.check_hostname(
+                valid_hostname=self.settings.valid_hostname
+            )
+        except doiget_tdm.errors.InvalidHostnameError as err:
+            LOGGER.warning(f"Not prefetching IOP files ({err})")
+            return
+
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.settings.n_connections,
+                thread_name_prefix="doiget-tdm-iop",
+            )
+
+        for fulltext in fulltexts:
+
+            # only the first format that is to be acquired from IOP is downloaded, as
+            # the remaining formats are often not needed
+            for format_name in doiget_tdm.config.SETTINGS.format_preference_order:
+
+                fmt = fulltext.formats[format_name]
+
+                if fmt.exists:
+                    continue
+
+                is_submitted = False
+
+                for source in fmt.sources:
+                    if source.acq_func == self.acquire and not isinstance(
+                        source.link, typing.Sequence
+                    ):
+                        remote_path = str(source.link)
+                        # the executor threads do not inherit the context, so the
+                        # timing labels are carried over in a copy of it
+                        with doiget_tdm.timing.labels(
+                            publisher=type(self).__name__,
+                            fmt=source.format_name.name,
+                        ):
+                            context = contextvars.copy_context()
+                        self._prefetched[remote_path] = self._executor.submit(
+                            context.run,
+                            self.download,
+                            remote_path=remote_path,
+                            format_name=source.format_name,
+                        )
+                        is_submitted = True
+
+                if is_submitted:
+                    break
+
     def acquire(self, source: doiget_tdm.source.Source) -> bytes:
 
         if isinstance(source.link, typing.Sequence):
@@ -142,98 +458,150 @@ class IOP(doiget_tdm.publisher.Publisher):
 
         doiget_tdm.errors.check_hostname(valid_hostname=self.settings.valid_hostname)
 
-        self.initialise()
+        remote_path = str(source.link)
 
-        assert self._connection is not None
+        future = self._prefetched.pop(remote_path, None)
 
-        tmp_file = tempfile.NamedTemporaryFile(delete=False)
-        tmp_file.close()
+        if future is not None:
+            return future.result()
 
-        tmp_path = pathlib.Path(tmp_file.name)
+        return self.download(remote_path=remote_path, format_name=source.format_name)
 
-        try:
+    def download(
+        self,
+        remote_path: str,
+        format_name: doiget_tdm.format.FormatName,
+    ) -> bytes:
+        """
+        Download a file from the sFTP server and extract its full-text content.
 
-            if not self._connection.exists(remotepath=str(source.link)):
-                msg = f"Remote path {source.link} not on server"
-                LOGGER.error(msg)
-                raise doiget_tdm.errors.AcquisitionError(msg)
+        Parameters
+        ----------
+        remote_path
+            Path to the (zip) file on the server.
+        format_name
+            Format of the full-text content within the zip file.
 
-            self._connection.get(
-                remotepath=str(source.link),
-                localpath=str(tmp_path),
-            )
+        Returns
+        -------
+            The full-text content.
 
-        except paramiko.ssh_exception.SSHException as err:
-            tmp_path.unlink()
-            msg = "Received download error ({err})"
-            LOGGER.error(msg)
-            raise doiget_tdm.errors.AcquisitionError(msg) from err
+        Notes
+        -----
+        * The file is not checked for existence beforehand, as it is known to be
+          present from the server file list; a missing file is reported as an
+          acquisition error.
 
-        except Exception as err:
-            tmp_path.unlink()
-            msg = "Received download error ({err})"
-            LOGGER.error(msg)
-            raise doiget_tdm.errors.AcquisitionError(msg) from err
+        """
 
-        data: bytes | None
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as buffer:
 
-        try:
-            with zipfile.ZipFile(tmp_path) as zip_handle:
+            try:
+                with self.connection() as connection:
+                    # the reads are pipelined (prefetched) by paramiko
+                    connection.getfo(remotepath=remote_path, flo=buffer)
+
+            except FileNotFoundError as err:
+                msg = f"Remote path {remote_path} not on server"
+                LOGGER.error(msg)
+                raise doiget_tdm.errors.AcquisitionError(msg) from err
 
-                filenames = zip_handle.namelist()
+            except Exception as err:
+                msg = f"Received download error ({err})"
+                LOGGER.error(msg)
+                raise doiget_tdm.errors.AcquisitionError(msg) from err
 
-                within_zip_filenames = [
-                    filename
-                    for filename in filenames
-                    if filename.endswith(f".{str(source.link)[:3].lower()}")
-                ]
+            buffer.seek(0)
 
-                if len(within_zip_filenames) != 1:
-                    raise ValueError(f"More filenames than expected: {filenames}")
+            try:
+                with zipfile.ZipFile(buffer) as zip_handle:
 
-                (within_zip_filename,) = within_zip_filenames
+                    filenames = zip_handle.namelist()
 
-                data = zip_handle.read(within_zip_filename)
+                    within_zip_filenames = [
+                        filename
+                        for filename in filenames
+                        if filename.endswith(f".{format_name.name.lower()}")
+                    ]
 
-        except Exception as err:
-            msg = f"Receieved zip file error {err}"
-            LOGGER.error(msg)
-            raise doiget_tdm.errors.AcquisitionError(msg) from err
+                    if len(within_zip_filenames) != 1:
+                        raise ValueError(f"More filenames than expected: {filenames}")
 
-        finally:
-            tmp_path.unlink()
+                    (within_zip_filename,) = within_zip_filenames
+
+                    data = zip_handle.read(within_zip_filename)
+
+            except Exception as err:
+                msg = f"Receieved zip file error {err}"
+                LOGGER.error(msg)
+                raise doiget_tdm.errors.AcquisitionError(msg) from err
 
         return data
 
-    def form_server_file_list(self) -> None:
+    def form_server_file_list(self, full: bool = False) -> None:
+        """
+        Update the list of the files on the sFTP server.
 
-        self.initialise()
+        Parameters
+        ----------
+        full
+            Whether to re-list all the files, rather than only adding the files that
+            are new since the last update.
 
-        if self._connection is None:
-            raise ValueError()
+        Notes
+        -----
+        * A directory on the server is only listed if its modification time has
+          changed since the last update, and only the files with a modification time
+          at least as recent as the latest in the file list are then added.
+        * Files that have been removed from the server are only removed from the
+          file list by a full update.
+
+        """
 
         LOGGER.info("Forming server file list for IOP")
 
-        file_list: dict[str, dict[str, str]] = {
-            "XML": {},
-            "PDF": {},
-        }
+        file_list = self.load_server_file_list()
+
+        with self.connection() as connection:
 
-        for file_type in ["XML", "PDF"]:
+            for file_type, dir_name in SERVER_DIRS.items():
 
-            dir_name = f"{file_type}data"
+                dir_attr = connection.stat(remotepath=dir_name)
 
-            with self._connection.cd(dir_name):
+                assert dir_attr.st_mtime is not None
 
-                dir_contents = self._connection.listdir()
+                if not full and file_list.get_dir_mtime(file_type=file_type) == (
+                    dir_attr.st_mtime
+                ):
+                    LOGGER.info(f"No changes to {dir_name} since the last update")
+                    continue
 
-                for filename in dir_contents:
+                latest_mtime = (
+                    None if full else file_list.get_latest_mtime(file_type=file_type)
+                )
 
-                    doi = self.get_doi_from_filename(filename=filename)
+                # files with the same time as the latest could have been added after
+                # the last update, so they are included
+                entries = (
+                    (
+                        self.get_doi_from_filename(filename=attr.filename),
+                        attr.filename,
+                        attr.st_mtime or 0,
+                    )
+                    for attr in connection.listdir_attr(remotepath=dir_name)
+                    if latest_mtime is None or (attr.st_mtime or 0) >= latest_mtime
+                )
 
-                    file_list[file_type][doi] = filename
+                n_added = file_list.update(
+                    file_type=file_type,
+                    dir_mtime=dir_attr.st_mtime,
+                    entries=entries,
+                    replace=full,
+                )
 
-        self.save_server_file_list(file_list=file_list)
+                LOGGER.info(
+                    f"Updated the file list with {n_added} files from {dir_name}"
+                )
 
         LOGGER.info(f"Saved IOP server file list to {self.server_file_list_path}")
 
@@ -258,20 +626,57 @@ class IOP(doiget_tdm.publisher.Publisher):
 
         return doi
 
-    def save_server_file_list(self, file_list: dict[str, dict[str, str]]) -> None:
+    def load_server_file_list(self) -> ServerFileList:
+        """
+        Open the list of the files on the sFTP server.
+
+        Notes
+        -----
+        * If the file list has not been formed, but there is a file list in the
+          (JSON) format used by earlier versions, its contents are imported.
 
-        with self.server_file_list_path.open("w") as handle:
-            json.dump(file_list, handle)
+        """
 
-    def load_server_file_list(self) -> simdjson.Object:
+        if self._file_list is not None:
+            return self._file_list
 
-        raw_file_data = self.server_file_list_path.read_bytes()
+        self.cache_dir.mkdir(exist_ok=True, parents=True)
 
-        file_list = simdjson.Parser().parse(raw_file_data)
+        file_list = ServerFileList(path=self.server_file_list_path)
 
-        if not isinstance(file_list, simdjson.Object):
-            raise ValueError()
+        if file_list.is_empty and self.legacy_server_file_list_path.exists():
+
+            LOGGER.info(
+                "Importing the IOP server file list from "
+                + f"{self.legacy_server_file_list_path}"
+            )
+
+            with self.legacy_server_file_list_path.open() as handle:
+                legacy_file_list: dict[str, dict[str, str]] = json.load(handle)
+
+            # the modification times are unknown, so the next update lists all
+            # the files
+            for file_type, entries in legacy_file_list.items():
+                file_list.update(
+                    file_type=file_type,
+                    dir_mtime=0,
+                    entries=((doi, filename, 0) for (doi, filename) in entries.items()),
+                )
+
+        elif file_list.is_empty:
+            LOGGER.warning(
+                "The IOP server file list has not been formed (see "
+                + "`form_server_file_list`)"
+            )
 
         self._file_list = file_list
 
         return file_list
+
+
+def is_active(connection: pysftp.Connection) -> bool:
+    """
+    Whether a session with the sFTP server is still connected.
+    """
+    transport = getattr(connection, "_transport", None)
+    return transport is not None and bool(transport.is_active())
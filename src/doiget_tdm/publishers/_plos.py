@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import collections.abc
+import functools
+import json
 import logging
+import os
 import pathlib
+import threading
 import typing
 import zipfile
 
@@ -9,11 +14,19 @@ import pydantic_settings
 
 import upath
 
+import doiget_tdm.config
+import doiget_tdm.doi
+import doiget_tdm.ingest
+import doiget_tdm.metadata
+import doiget_tdm.pool
 import doiget_tdm.publisher
 import doiget_tdm.web
 import doiget_tdm.fulltext
 import doiget_tdm.format
+import doiget_tdm.metrics
 import doiget_tdm.source
+import doiget_tdm.timing
+import doiget_tdm.work
 
 
 LOGGER = logging.getLogger(__name__)
@@ -51,11 +64,97 @@ class PLoS(doiget_tdm.publisher.Publisher):
         self.warning_printed = False
         self.n_requests = 0
 
+        # the data file is opened on first use and then kept open, so that its
+        # central directory (which has an entry for each of the >300k files) is only
+        # read once per process
+        self._handle: zipfile.ZipFile | None = None
+        self._handle_lock = threading.Lock()
+
+    def get_handle(self) -> zipfile.ZipFile:
+        """
+        Get the open handle to the PLoS data file.
+
+        Returns
+        -------
+            The handle, which has an index from member name to member information.
+        """
+
+        if not self.has_allofplos:
+            raise ValueError("Cannot acquire from the PLoS data file")
+
+        # we know, but the type checker doesn't
+        assert self.settings.allofplos_path is not None
+
+        with self._handle_lock:
+
+            if self._handle is None:
+                self._handle = zipfile.ZipFile(self.settings.allofplos_path)
+                LOGGER.info(
+                    f"Opened the PLoS data file at {self.settings.allofplos_path}, "
+                    + f"with {len(self._handle.NameToInfo)} members"
+                )
+
+            return self._handle
+
+    def close(self) -> None:
+        """
+        Close the handle to the PLoS data file, if it is open.
+        """
+
+        with self._handle_lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    def read_member(self, name: str) -> bytes:
+        """
+        Read a file from the PLoS data file.
+
+        Parameters
+        ----------
+        name
+            Name of the file within the data file.
+
+        Returns
+        -------
+            The (uncompressed) file contents.
+        """
+
+        handle = self.get_handle()
+
+        return handle.read(handle.getinfo(name))
+
+    def read_members(
+        self,
+        names: collections.abc.Iterable[str],
+    ) -> collections.abc.Iterator[tuple[str, bytes]]:
+        """
+        Read a batch of files from the PLoS data file, in a single sequential pass.
+
+        Parameters
+        ----------
+        names
+            Names of the files within the data file; any names that are not present
+            in the data file are skipped.
+
+        Returns
+        -------
+            Pairs of the file name and the (uncompressed) file contents, in the order
+            in which the files are stored within the data file.
+        """
+
+        handle = self.get_handle()
+
+        infos = [handle.NameToInfo[name] for name in names if name in handle.NameToInfo]
+
+        for info in sorted(infos, key=lambda info: info.header_offset):
+            yield (info.filename, handle.read(info))
+
     def set_sources(self, fulltext: doiget_tdm.fulltext.FullText) -> None:
 
         if self.has_allofplos:
 
-            link = upath.UPath(f"file:///{fulltext.doi.parts.suffix}.xml")
+            link = upath.UPath(f"file:///{get_member_name(doi=fulltext.doi)}")
 
             file_source = doiget_tdm.source.Source(
                 acq_func=self.acquire,
@@ -100,18 +199,7 @@ class PLoS(doiget_tdm.publisher.Publisher):
 
         if source.link.protocol == "file":
 
-            if self.has_allofplos:
-
-                # we know, but the type checker doesn't
-                assert self.settings.allofplos_path is not None
-
-                with zipfile.ZipFile(self.settings.allofplos_path) as handle:
-                    data = handle.read(source.link.name)
-
-                return data
-
-            else:
-                raise ValueError("Cannot acquire from the PLoS data file")
+            return self.read_member(name=source.link.name)
 
         else:
 
@@ -128,3 +216,263 @@ class PLoS(doiget_tdm.publisher.Publisher):
                 self.warning_printed = True
 
             return response.content
+
+
+#: Prefix of the DOIs in the PLoS data file.
+DOI_PREFIX = "10.1371"
+
+#: Name of the publisher, as used in placeholder metadata.
+PUBLISHER_NAME = "Public Library of Science (PLoS)"
+
+
+def get_member_name(doi: doiget_tdm.doi.DOI) -> str:
+    """
+    Get the name of the file for a DOI within the PLoS data file.
+
+    Parameters
+    ----------
+    doi
+        The DOI.
+
+    Returns
+    -------
+        The file name.
+    """
+    return f"{doi.parts.suffix}.xml"
+
+
+def get_member_doi(name: str) -> doiget_tdm.doi.DOI | None:
+    """
+    Get the DOI for a file within the PLoS data file.
+
+    Parameters
+    ----------
+    name
+        Name of the file within the data file.
+
+    Returns
+    -------
+        The DOI, or ``None`` if the file is not a full-text XML file.
+    """
+
+    path = pathlib.PurePosixPath(name)
+
+    if name.endswith("/") or path.suffix != ".xml":
+        return None
+
+    return doiget_tdm.doi.DOI(doi=f"{DOI_PREFIX}/{path.stem}")
+
+
+def get_placeholder_metadata(doi: doiget_tdm.doi.DOI) -> bytes:
+    """
+    Form minimal metadata for a DOI in the PLoS data file, without querying CrossRef.
+
+    Parameters
+    ----------
+    doi
+        The DOI.
+
+    Returns
+    -------
+        The metadata, in JSON format; it only identifies the DOI and its publisher,
+        and is marked as a placeholder (see ``Metadata.is_placeholder``) so that it
+        is replaced when the metadata is next acquired.
+    """
+
+    return json.dumps(
+        {
+            "DOI": str(doi),
+            "member": str(PLoS.member_id),
+            "publisher": PUBLISHER_NAME,
+            doiget_tdm.metadata.PLACEHOLDER_KEY: True,
+        }
+    ).encode()
+
+
+@functools.cache
+def get_corpus_metadata_sources() -> tuple[doiget_tdm.metadata.MetadataSource, ...]:
+    """
+    Form the sources from which metadata is acquired when ingesting the PLoS data
+    file as a whole.
+
+    Notes
+    -----
+    * The CrossRef LMDB database is used, if it is available, with placeholder
+      metadata for any DOIs that are not present in the database. The CrossRef web
+      API is not used, as it would be much slower than the ingest itself.
+
+    """
+
+    metadata_sources: tuple[doiget_tdm.metadata.MetadataSource, ...] = (
+        get_placeholder_metadata,
+    )
+
+    db_path = doiget_tdm.config.SETTINGS.crossref_lmdb_path
+
+    if doiget_tdm.metadata.HAS_LMDB and db_path is not None:
+        crossref_lmdb_client = doiget_tdm.metadata.CrossRefLMDBClient(db_path=db_path)
+        metadata_sources = (crossref_lmdb_client.get_doi_metadata, *metadata_sources)
+
+    return metadata_sources
+
+
+def ingest(
+    dois: collections.abc.Iterable[doiget_tdm.doi.DOI] | None = None,
+    n_workers: int | None = None,
+    chunk_size: int = 256,
+    show_progress_bar: bool = True,
+) -> None:
+    """
+    Write the full-text content for PLoS DOIs into the data directory, by reading
+    them from the PLoS data file in bulk rather than acquiring each DOI in turn.
+
+    Parameters
+    ----------
+    dois
+        The DOIs to ingest; any non-PLoS DOIs, or DOIs that already have full-text
+        XML content, are skipped. If not provided, all the DOIs in the data file are
+        ingested.
+    n_workers
+        Number of worker processes used to decompress, validate, and write the
+        files. If not provided, the number of CPUs is used; a value of 1 does this
+        in the current process.
+    chunk_size
+        Number of files sent to a worker process at a time.
+    show_progress_bar
+        Whether to show a progress bar.
+
+    Notes
+    -----
+    * If DOIs are provided, the metadata for each DOI is acquired if it is not
+      already present, as it identifies the publisher of the DOI.
+    * Otherwise, the DOIs are derived from the file names within the data file and
+      any missing metadata is acquired by the worker processes from the sources in
+      ``get_corpus_metadata_sources``.
+    * The files are read in the order in which they are stored within the data file,
+      so that each worker process reads its files in a single sequential pass.
+
+    """
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    plos = doiget_tdm.publisher.registry[PLoS.member_id]
+
+    if not isinstance(plos, PLoS) or not plos.has_allofplos:
+        raise ValueError("Handler for PLoS does not have a data file")
+
+    # deferred import, as it is only needed for the ingest
+    import alive_progress
+
+    handle = plos.get_handle()
+
+    is_corpus = dois is None
+
+    if dois is None:
+        dois = [
+            doi
+            for doi in (
+                get_member_doi(name=info.filename) for info in handle.infolist()
+            )
+            if doi is not None
+        ]
+
+    n_dois = len(dois) if isinstance(dois, collections.abc.Sized) else None
+
+    metrics = doiget_tdm.metrics.METRICS
+
+    # the files to write, as pairs of the name of the file within the data file and
+    # the quoted DOI
+    plan: list[tuple[str, str]] = []
+
+    with alive_progress.alive_bar(
+        total=n_dois,
+        disable=not show_progress_bar,
+    ) as progress_bar:
+
+        for doi in dois:
+
+            work = doiget_tdm.work.Work(doi=doi)
+
+            if not is_corpus and not work.metadata.exists:
+                work.metadata.acquire()
+
+            name = get_member_name(doi=doi)
+
+            if (
+                (not is_corpus and work.metadata.member_id != PLoS.member_id)
+                or name not in handle.NameToInfo
+                or work.fulltext.has_format(fmt=doiget_tdm.format.FormatName.XML)
+            ):
+                LOGGER.info(f"Skipping ingest of {doi}")
+                metrics.add_doi_processed()
+                progress_bar()
+                continue
+
+            plan.append((name, doi.quoted))
+
+        plan.sort(key=lambda member: handle.NameToInfo[member[0]].header_offset)
+
+        LOGGER.info(f"Ingesting {len(plan)} files from the PLoS data file")
+
+        tasks = (
+            (plan[i_start : i_start + chunk_size], is_corpus)
+            for i_start in range(0, len(plan), chunk_size)
+        )
+
+        with doiget_tdm.timing.labels(
+            publisher=type(plos).__name__,
+            fmt=doiget_tdm.format.FormatName.XML.name,
+        ):
+
+            for results in doiget_tdm.pool.iter_results(
+                func=_ingest_members,
+                tasks=tasks,
+                n_workers=n_workers,
+            ):
+
+                for result in results:
+                    doiget_tdm.ingest.record_result(result=result)
+                    progress_bar()
+
+
+def _ingest_members(
+    members: list[tuple[str, str]],
+    acquire_metadata: bool,
+) -> list[doiget_tdm.ingest.IngestResult]:
+
+    plos = doiget_tdm.publisher.registry[PLoS.member_id]
+
+    if not isinstance(plos, PLoS):
+        raise ValueError("Unexpected handler for PLoS")
+
+    quoted_dois = dict(members)
+
+    results: list[doiget_tdm.ingest.IngestResult] = []
+
+    for name, data in plos.read_members(names=quoted_dois):
+
+        quoted_doi = quoted_dois[name]
+
+        if acquire_metadata:
+
+            metadata = doiget_tdm.metadata.Metadata(
+                doi=doiget_tdm.doi.DOI(doi=quoted_doi, unquote=True)
+            )
+
+            if not metadata.exists:
+                try:
+                    metadata.acquire(metadata_sources=get_corpus_metadata_sources())
+                except Exception as err:
+                    results.append(
+                        doiget_tdm.ingest.IngestResult(
+                            quoted_doi=quoted_doi,
+                            n_bytes=0,
+                            error=err,
+                        )
+                    )
+                    continue
+
+        results.append(doiget_tdm.ingest.write_xml(quoted_doi=quoted_doi, data=data))
+
+    return results
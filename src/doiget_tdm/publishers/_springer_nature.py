@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-import xml.dom.minidom
+import collections.abc
+import functools
+import math
+import typing
+import urllib.parse
+import xml.parsers.expat
 import logging
 
 import pydantic
@@ -13,13 +18,21 @@ import upath
 import doiget_tdm.config
 import doiget_tdm.publisher
 import doiget_tdm.errors
+import doiget_tdm.fulltext
 import doiget_tdm.metadata
+import doiget_tdm.quota
+import doiget_tdm.timing
+import doiget_tdm.validate
 
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.addHandler(logging.NullHandler())
 
 
+#: Size, in bytes, of the pieces in which API responses are read and parsed.
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
+
 class Settings(pydantic_settings.BaseSettings):
 
     api_base_url: str | None = None
@@ -28,6 +41,9 @@ class Settings(pydantic_settings.BaseSettings):
 
     n_requests_per_day: int = 500
 
+    # number of DOIs that are queried in a single request
+    n_dois_per_request: int = 20
+
     model_config = pydantic_settings.SettingsConfigDict(
         env_prefix="DOIGET_TDM_SPRINGER_NATURE_",
         secrets_dir=doiget_tdm.config.BASE_CONFIG_DIR,
@@ -63,58 +79,445 @@ class SpringerNature(doiget_tdm.publisher.Publisher):
             ),
         )
 
-        self.session = doiget_tdm.web.WebRequester(limiter=limiter)
+        # the limit is also recorded in the quota ledger, so that it applies across
+        # runs and processes
+        self.quota = doiget_tdm.quota.Quota(
+            name=type(self).__name__,
+            limit=self.settings.n_requests_per_day,
+            interval_s=60 * 60 * 24,
+            n_works_per_request=self.settings.n_dois_per_request,
+        )
 
-    def set_sources(self, fulltext: doiget_tdm.fulltext.FullText) -> None:
+        self.session = doiget_tdm.web.WebRequester(limiter=limiter, quota=self.quota)
 
-        # can't set any sources if the API is not configured
-        if not self.is_configured:
-            return
+        # articles that have been acquired as part of a batch, keyed by the link of
+        # their source; the value is ``None`` if the article was not in the response
+        self._prefetched: dict[str, bytes | None] = {}
+
+        # links of the articles in a batch that could not be acquired, and that
+        # cannot be acquired individually within the remaining budget of the quota
+        self._skipped: set[str] = set()
+
+    def get_link(self, query: str, n_results: int = 1) -> upath.UPath:
+        """
+        Form the link for a query of the API.
+
+        Parameters
+        ----------
+        query
+            The query, such as ``doi:10.1007/...``.
+        n_results
+            The number of records to request.
+
+        Returns
+        -------
+            The link.
+        """
 
         # we have already narrowed from the above, but type checker doesn't know that
         assert self.settings.api_key is not None
         assert self.settings.api_suffix is not None
 
-        format_name = doiget_tdm.format.FormatName.XML
+        n_results_param = "" if n_results == 1 else f"p={n_results}&"
 
-        link = upath.UPath(
-            f"{self.settings.api_base_url}?q=doi:{fulltext.doi}&"
+        return upath.UPath(
+            f"{self.settings.api_base_url}?q={query}&{n_results_param}"
             + f"api_key={self.settings.api_key.get_secret_value()}/"
             + self.settings.api_suffix.get_secret_value()
         )
 
+    def set_sources(self, fulltext: doiget_tdm.fulltext.FullText) -> None:
+
+        # can't set any sources if the API is not configured
+        if not self.is_configured:
+            return
+
+        format_name = doiget_tdm.format.FormatName.XML
+
+        link = self.get_link(query=f"doi:{fulltext.doi}")
+
+        # the articles are checked for body content as they are extracted from the
+        # API response (see ``get_articles``), so they are not parsed again
         source = doiget_tdm.source.Source(
-            acq_func=self.acquire,
+            acq_func=functools.partial(self.acquire, doi=str(fulltext.doi)),
             link=link,
             format_name=format_name,
             encrypt=False,
+            validator_func=doiget_tdm.validate.skip_validation,
         )
 
         fulltext.formats[format_name].sources = [source]
 
-    def acquire(self, source: doiget_tdm.source.Source) -> bytes:
+    def get_acquire_group(
+        self,
+        fulltext: doiget_tdm.fulltext.FullText,  # noqa: ARG002
+    ) -> str | None:
+
+        # works are grouped so that they can be acquired with multiple DOIs per
+        # request (see ``prefetch``), within the budget of the quota
+        if not self.is_configured or self.quota is None:
+            return None
+
+        return self.quota.name
+
+    def prefetch(
+        self,
+        fulltexts: collections.abc.Sequence[doiget_tdm.fulltext.FullText],
+    ) -> None:
+
+        # any articles from a previous batch that were not used are discarded
+        self._prefetched.clear()
+        self._skipped.clear()
+
+        if not self.is_configured:
+            return
+
+        format_name = doiget_tdm.format.FormatName.XML
+
+        # the links of the sources to acquire, keyed by the (normalised) DOI
+        links: dict[str, str] = {}
+
+        for fulltext in fulltexts:
+
+            fmt = fulltext.formats[format_name]
+
+            if fmt.exists:
+                continue
+
+            for source in fmt.sources:
+
+                # the DOI is bound to the acquisition function (see ``set_sources``)
+                acq_func = source.acq_func
+
+                if isinstance(acq_func, functools.partial):
+                    acq_func = acq_func.func
+
+                if acq_func == self.acquire:
+                    links[str(fulltext.doi).lower()] = str(source.link)
+
+        dois = list(links)
+
+        n_per_request = self.settings.n_dois_per_request
+
+        batch_starts = range(0, len(dois), n_per_request)
+
+        # number of requests that will be made for the articles in failed batches
+        n_individual = 0
+
+        for i_batch, i_start in enumerate(batch_starts):
+
+            batch_dois = dois[i_start : i_start + n_per_request]
+
+            query = urllib.parse.quote(
+                " OR ".join(f"doi:{doi}" for doi in batch_dois),
+                safe=":/",
+            )
+
+            link = self.get_link(query=f"({query})", n_results=len(batch_dois))
+
+            try:
+                with doiget_tdm.timing.labels(
+                    publisher=type(self).__name__,
+                    fmt=format_name.name,
+                ):
+                    articles = self.request_articles(link=link)
+            except Exception as err:
+
+                # the articles can instead be acquired individually, but only if
+                # that would not use the budget needed by the remaining batches
+                n_spare = self.get_n_spare_requests(
+                    n_reserved=n_individual + len(batch_starts) - (i_batch + 1)
+                )
+
+                if n_spare >= len(batch_dois):
+                    LOGGER.warning(
+                        f"Unable to acquire a batch of articles ({err}); they will "
+                        + "be acquired individually"
+                    )
+                    n_individual += len(batch_dois)
+                else:
+                    LOGGER.warning(
+                        f"Unable to acquire a batch of articles ({err}); there is not "
+                        + "enough of the quota remaining to acquire them individually"
+                    )
+                    self._skipped.update(links[doi] for doi in batch_dois)
+
+                continue
+
+            LOGGER.info(
+                f"Acquired {len(articles)} of {len(batch_dois)} requested articles"
+            )
+
+            for doi in batch_dois:
+                self._prefetched[links[doi]] = articles.get(doi)
+
+    def get_n_spare_requests(self, n_reserved: int) -> float:
+        """
+        The number of requests that can be made within the remaining budget of the
+        quota, beyond those that have already been reserved.
+        """
+
+        if self.quota is None:
+            return math.inf
+
+        n_remaining = doiget_tdm.quota.get_ledger().get_n_remaining(quota=self.quota)
+
+        return n_remaining - n_reserved
+
+    def request_articles(self, link: upath.UPath) -> dict[str, bytes]:
+        """
+        Request a query of the API and extract the articles from its response, as
+        the response is received.
+
+        Parameters
+        ----------
+        link
+            The link for the query (see ``get_link``).
+
+        Returns
+        -------
+            The XML for each article with body content, keyed by its DOI (in lower
+            case).
+        """
+
+        response = self.session.get(url=str(link), stream=True)
+
+        with response:
+            return get_articles(
+                chunks=response.iter_content(chunk_size=RESPONSE_CHUNK_SIZE)
+            )
 
-        response = self.session.get(url=str(source.link))
+    def acquire(
+        self,
+        source: doiget_tdm.source.Source,
+        doi: str | None = None,
+    ) -> bytes:
+        """
+        Acquire the article for a source.
 
-        dom = xml.dom.minidom.parseString(response.content.decode())
+        Parameters
+        ----------
+        source
+            The source, as formed by ``set_sources``.
+        doi
+            The DOI of the article, which identifies it among the articles in
+            the API response. If not provided, the response must contain a single
+            article.
 
-        # the response includes stuff about the query, potential for
-        # multiple articles, etc.
-        articles = dom.getElementsByTagName("article")
+        Returns
+        -------
+            The article content.
+        """
+
+        if isinstance(source.link, typing.Sequence):
+            raise ValueError(f"Unexpected link: {source.link}")
+
+        if str(source.link) in self._skipped:
+            self._skipped.discard(str(source.link))
+            msg = "Article was not acquired in its batch, and the quota is exhausted"
+            raise doiget_tdm.errors.QuotaExhaustedError(msg)
+
+        if str(source.link) in self._prefetched:
+
+            article = self._prefetched.pop(str(source.link))
+
+            if article is None:
+                msg = "Article was not in the API response"
+                raise doiget_tdm.errors.AcquisitionError(msg)
+
+            return article
+
+        articles = self.request_articles(link=source.link)
 
         if len(articles) == 0:
             raise doiget_tdm.errors.ValidationError()
 
-        (article,) = articles
+        # the response can contain more than one article, such as if the DOI
+        # matches other records, so the article is chosen by its DOI
+        if doi is None:
+            if len(articles) > 1:
+                msg = f"Expected a single article but received {len(articles)}"
+                raise doiget_tdm.errors.AcquisitionError(msg)
+            (article,) = articles.values()
+        else:
+            try:
+                article = articles[doi.lower()]
+            except KeyError as err:
+                msg = f"Article for {doi} was not in the API response"
+                raise doiget_tdm.errors.AcquisitionError(msg) from err
 
-        bodies = article.getElementsByTagName("body")
+        return article
 
-        if len(bodies) == 0:
-            raise doiget_tdm.errors.ValidationError()
 
-        (body,) = bodies
+def get_articles(chunks: collections.abc.Iterable[bytes]) -> dict[str, bytes]:
+    """
+    Split an API response into its articles.
 
-        if len(body.childNodes) == 0:
-            raise doiget_tdm.errors.ValidationError()
+    Parameters
+    ----------
+    chunks
+        The API response, in XML format, in pieces of any size.
+
+    Returns
+    -------
+        The XML for each article, keyed by its DOI (in lower case).
+
+    Raises
+    ------
+    doiget_tdm.errors.ValidationError
+        If the response cannot be parsed.
+
+    Notes
+    -----
+    * The XML for each article is the bytes of its element in the response, rather
+      than a re-serialisation.
+    * Articles without body content are not included.
+
+    """
+
+    extractor = _ArticleExtractor()
+
+    try:
+        for chunk in chunks:
+            extractor.feed(data=chunk)
+        extractor.close()
+    except xml.parsers.expat.ExpatError:
+        raise doiget_tdm.errors.ValidationError("Cannot parse into XML") from None
+
+    return extractor.articles
+
+
+class _ArticleExtractor:
+
+    def __init__(self) -> None:
+        """
+        Incrementally parses an API response, keeping only the data of the article
+        that is being parsed.
+        """
+
+        self._parser = xml.parsers.expat.ParserCreate()
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        self._parser.CharacterDataHandler = self._characters
+
+        # the unparsed data and the data of the current article, which begins at
+        # an offset of ``_buffer_start`` bytes from the start of the response
+        self._buffer = bytearray()
+        self._buffer_start = 0
+
+        # offset of the most recent element tag that has been parsed
+        self._last_index = 0
+
+        self._article_start: int | None = None
+        self._article_depth = 0
+        self._doi: str | None = None
+        self._doi_parts: list[str] | None = None
+        self._n_bodies = 0
+        self._body_depth = 0
+        self._has_body_content = False
+
+        self.articles: dict[str, bytes] = {}
+
+    def feed(self, data: bytes) -> None:
+        """
+        Parse the next piece of the response.
+        """
+
+        self._buffer += data
+
+        self._parser.Parse(data, False)
+
+        # the response is only held from the start of the current article or, if
+        # not within an article, from the last tag (as the next article may have
+        # been partly received)
+        if self._article_start is None:
+            n_discard = self._last_index - self._buffer_start
+            del self._buffer[:n_discard]
+            self._buffer_start += n_discard
+
+    def close(self) -> None:
+        """
+        Finish parsing the response.
+        """
+        self._parser.Parse(b"", True)
+
+    def _start(self, name: str, attrs: dict[str, str]) -> None:
+
+        self._last_index = self._parser.CurrentByteIndex
+
+        if name == "article":
+
+            if self._article_depth == 0:
+                self._article_start = self._last_index
+                self._doi = None
+                self._n_bodies = 0
+                self._has_body_content = False
+
+            self._article_depth += 1
+
+            return
+
+        if self._article_depth == 0:
+            return
+
+        if self._body_depth > 0:
+            self._has_body_content = True
+
+        if name == "body":
+            self._n_bodies += 1
+            self._body_depth += 1
+
+        elif (
+            name == "article-id"
+            and attrs.get("pub-id-type") == "doi"
+            and self._doi is None
+        ):
+            self._doi_parts = []
+
+    def _characters(self, data: str) -> None:
+
+        if self._doi_parts is not None:
+            self._doi_parts.append(data)
+
+        if self._body_depth > 0:
+            self._has_body_content = True
+
+    def _end(self, name: str) -> None:
+
+        self._last_index = self._parser.CurrentByteIndex
+
+        if self._article_depth == 0:
+            return
+
+        if name == "article-id" and self._doi_parts is not None:
+            self._doi = "".join(self._doi_parts).strip()
+            self._doi_parts = None
+
+        elif name == "body":
+            self._body_depth -= 1
+
+        elif name == "article":
+
+            self._article_depth -= 1
+
+            if self._article_depth == 0:
+                self._add_article()
+
+    def _add_article(self) -> None:
+
+        assert self._article_start is not None
+
+        if self._doi is None:
+            LOGGER.warning("Article without a DOI in the API response")
+
+        elif self._n_bodies != 1 or not self._has_body_content:
+            LOGGER.warning(f"Article for {self._doi} does not have body content")
+
+        else:
+            i_start = self._article_start - self._buffer_start
+            # the end tag (or the start tag, if the element is empty) finishes
+            # at the first '>' after the current tag begins
+            i_end = self._buffer.index(b">", self._last_index - self._buffer_start) + 1
+            self.articles[self._doi.lower()] = bytes(self._buffer[i_start:i_end])
 
-        return article.toxml(encoding="utf-8")
+        self._article_start = None
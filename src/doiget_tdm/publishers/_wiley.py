@@ -13,6 +13,7 @@ import upath
 import doiget_tdm.config
 import doiget_tdm.publisher
 import doiget_tdm.metadata
+import doiget_tdm.quota
 import doiget_tdm.errors
 
 
@@ -24,6 +25,9 @@ class Settings(pydantic_settings.BaseSettings):
 
     valid_hostname: str | None = None
     tdm_client_token: pydantic.SecretStr | None = None
+    api_base_url: str = "https://api.wiley.com/onlinelibrary/tdm/v1/articles/"
+
+    n_requests_per_ten_minutes: int = 60
 
     model_config = pydantic_settings.SettingsConfigDict(
         env_prefix="DOIGET_TDM_WILEY_",
@@ -62,12 +66,24 @@ class Wiley(doiget_tdm.publisher.Publisher):
         #   of 10 seconds between requests
         limiter = pyrate_limiter.Limiter(
             pyrate_limiter.RequestRate(
-                limit=60,
+                limit=self.settings.n_requests_per_ten_minutes,
                 interval=10 * 60,
             ),
         )
 
-        self.session = doiget_tdm.web.WebRequester(headers=headers, limiter=limiter)
+        # the limit is also recorded in the quota ledger, so that it applies across
+        # processes
+        self.quota = doiget_tdm.quota.Quota(
+            name=type(self).__name__,
+            limit=self.settings.n_requests_per_ten_minutes,
+            interval_s=10 * 60,
+        )
+
+        self.session = doiget_tdm.web.WebRequester(
+            headers=headers,
+            limiter=limiter,
+            quota=self.quota,
+        )
 
     def set_sources(self, fulltext: doiget_tdm.fulltext.FullText) -> None:
 
@@ -81,9 +97,7 @@ class Wiley(doiget_tdm.publisher.Publisher):
         # the API only has PDF
         format_name = doiget_tdm.format.FormatName.PDF
 
-        link = upath.UPath(
-            f"https://api.wiley.com/onlinelibrary/tdm/v1/articles/{fulltext.doi.quoted}"
-        )
+        link = upath.UPath(f"{self.settings.api_base_url}{fulltext.doi.quoted}")
 
         source = doiget_tdm.source.Source(
             acq_func=self.acquire,
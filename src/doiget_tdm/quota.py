@@ -0,0 +1,254 @@
+"""
+Records the requests made against the quotas of publisher APIs, in a ledger that is
+stored in the cache directory and shared by processes.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import functools
+import logging
+import math
+import pathlib
+import sqlite3
+import threading
+import time
+
+import doiget_tdm.config
+import doiget_tdm.errors
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+
+#: Name of the ledger file within the cache directory.
+LEDGER_FILENAME = "quota_ledger.sqlite"
+
+#: The longest time, in seconds, to wait for a quota to reset; quotas with windows
+#: that are longer than this are instead treated as being exhausted.
+MAX_WAIT_S = 60 * 60
+
+
+@dataclasses.dataclass(frozen=True)
+class Quota:
+    """
+    A limit on the number of requests to a publisher API within a time window.
+
+    Parameters
+    ----------
+    name
+        Name of the quota, such as the publisher name.
+    limit
+        Number of requests that can be made within each window.
+    interval_s
+        Duration of each window, in seconds; the windows are aligned to the UNIX
+        epoch (so daily windows begin at midnight UTC).
+    n_works_per_request
+        Number of works that are typically acquired with each request.
+    """
+
+    name: str
+    limit: int
+    interval_s: int
+    n_works_per_request: int = 1
+
+    def get_window_start(self, now: float | None = None) -> int:
+        """
+        The start time of the window that contains a given time.
+
+        Parameters
+        ----------
+        now
+            The time, as a UNIX timestamp; defaults to the current time.
+
+        Returns
+        -------
+            The start time of the window, as a UNIX timestamp.
+        """
+
+        if now is None:
+            now = time.time()
+
+        return int(now // self.interval_s) * self.interval_s
+
+
+class QuotaLedger:
+
+    def __init__(self, path: pathlib.Path) -> None:
+        """
+        A record of the number of requests made within each quota window, stored in
+        a SQLite database.
+
+        Parameters
+        ----------
+        path
+            Path to the database.
+        """
+
+        self.path = path
+
+        # transactions are managed explicitly, so that checking and adding to the
+        # spend is atomic across processes
+        self._db = sqlite3.connect(
+            path,
+            timeout=60,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._lock = threading.Lock()
+
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS spend ("
+            + "name TEXT, window_start INTEGER, n_spent INTEGER, "
+            + "PRIMARY KEY (name, window_start)) WITHOUT ROWID"
+        )
+
+    def get_n_spent(self, quota: Quota) -> int:
+        """
+        The number of requests made within the current window of a quota.
+        """
+
+        with self._lock:
+            return self._get_n_spent(
+                quota=quota,
+                window_start=quota.get_window_start(),
+            )
+
+    def get_n_remaining(self, quota: Quota) -> int:
+        """
+        The number of requests that can be made within the current window of a quota.
+        """
+        return max(quota.limit - self.get_n_spent(quota=quota), 0)
+
+    def _get_n_spent(self, quota: Quota, window_start: int) -> int:
+
+        row = self._db.execute(
+            "SELECT n_spent FROM spend WHERE name = ? AND window_start = ?",
+            (quota.name, window_start),
+        ).fetchone()
+
+        return 0 if row is None else int(row[0])
+
+    def spend(self, quota: Quota, max_wait_s: float = MAX_WAIT_S) -> None:
+        """
+        Record a request against a quota.
+
+        Parameters
+        ----------
+        quota
+            The quota.
+        max_wait_s
+            If the quota is exhausted and its next window begins within this many
+            seconds, this waits for the next window.
+
+        Raises
+        ------
+        doiget_tdm.errors.QuotaExhaustedError
+            If the quota is exhausted.
+        """
+
+        while True:
+
+            now = time.time()
+
+            window_start = quota.get_window_start(now=now)
+
+            with self._lock:
+
+                self._db.execute("BEGIN IMMEDIATE")
+
+                try:
+
+                    n_spent = self._get_n_spent(quota=quota, window_start=window_start)
+
+                    is_available = n_spent < quota.limit
+
+                    if is_available:
+
+                        self._db.execute(
+                            "INSERT INTO spend (name, window_start, n_spent) "
+                            + "VALUES (?, ?, 1) ON CONFLICT (name, window_start) "
+                            + "DO UPDATE SET n_spent = n_spent + 1",
+                            (quota.name, window_start),
+                        )
+
+                        # only the current window is needed
+                        self._db.execute(
+                            "DELETE FROM spend WHERE name = ? AND window_start < ?",
+                            (quota.name, window_start),
+                        )
+
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+
+                self._db.execute("COMMIT")
+
+            if is_available:
+                return
+
+            wait_s = window_start + quota.interval_s - now
+
+            if wait_s > max_wait_s:
+                msg = (
+                    f"The quota for {quota.name} is exhausted until "
+                    + f"{get_reset_time(quota=quota)}"
+                )
+                raise doiget_tdm.errors.QuotaExhaustedError(msg)
+
+            LOGGER.info(f"Waiting {wait_s:.0f} s for the quota for {quota.name}")
+
+            time.sleep(wait_s)
+
+    def close(self) -> None:
+        """
+        Release the database connection.
+        """
+        self._db.close()
+
+
+@functools.cache
+def _get_ledger(path: pathlib.Path) -> QuotaLedger:
+    path.parent.mkdir(exist_ok=True, parents=True)
+    return QuotaLedger(path=path)
+
+
+def get_ledger() -> QuotaLedger:
+    """
+    Get the ledger in the cache directory.
+
+    Returns
+    -------
+        The ledger; it is only opened on the first call with a given cache directory.
+    """
+    return _get_ledger(path=doiget_tdm.config.SETTINGS.cache_dir / LEDGER_FILENAME)
+
+
+def get_reset_time(quota: Quota) -> datetime.datetime:
+    """
+    The time at which the next window of a quota begins.
+    """
+    return datetime.datetime.fromtimestamp(
+        quota.get_window_start() + quota.interval_s,
+        tz=datetime.UTC,
+    )
+
+
+def get_n_works_allowed(quota: Quota) -> float:
+    """
+    The number of works that can be acquired within the remaining budget of a quota.
+
+    Returns
+    -------
+        The number of works; this is infinite for quotas with short windows, as
+        requests wait for the next window (see ``MAX_WAIT_S``) rather than fail.
+    """
+
+    if quota.interval_s <= MAX_WAIT_S:
+        return math.inf
+
+    n_remaining = get_ledger().get_n_remaining(quota=quota)
+
+    return n_remaining * quota.n_works_per_request
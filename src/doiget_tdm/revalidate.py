@@ -0,0 +1,290 @@
+"""
+Re-checks the full-text content in the data directory against the validators,
+optionally moving any invalid files into a quarantine directory.
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import os
+import pathlib
+import shutil
+import typing
+
+import alive_progress
+
+import more_itertools
+
+import polars as pl
+
+import rich
+
+import doiget_tdm.config
+import doiget_tdm.data
+import doiget_tdm.doi
+import doiget_tdm.format
+import doiget_tdm.pool
+import doiget_tdm.validate
+import doiget_tdm.work
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+
+REPORT_SCHEMA: pl.Schema = pl.Schema(
+    schema={
+        "doi": pl.String(),
+        "format": pl.Categorical(),
+        "path": pl.String(),
+        "is_encrypted": pl.Boolean(),
+        "error_type": pl.Categorical(),
+        "error_msg": pl.String(),
+    },
+)
+
+
+class ValidationFailure(typing.NamedTuple):
+    """
+    Details of a full-text file that did not pass validation.
+    """
+
+    doi: str
+    fmt: doiget_tdm.format.FormatName
+    path: pathlib.Path
+    is_encrypted: bool
+    error_type: str
+    error_msg: str
+
+
+def run(
+    output_path: pathlib.Path | None = None,
+    quarantine_dir: pathlib.Path | None = None,
+    n_workers: int | None = None,
+    chunk_size: int = 64,
+    show_progress_bar: bool = True,
+) -> list[ValidationFailure]:
+    """
+    Validate the full-text content for all works in the data directory.
+
+    Parameters
+    ----------
+    output_path
+        File to write the report of validation failures, in Parquet format. If not
+        provided, the report is written to a timestamped file in ``cache_dir``.
+    quarantine_dir
+        If provided, any full-text files that fail validation (along with any
+        encryption sentinel files) are moved into this directory.
+    n_workers
+        Number of worker processes used for validation. If not provided, the number
+        of CPUs is used; a value of 1 performs the validation in the current process.
+    chunk_size
+        Number of works that are sent to a worker process at a time.
+    show_progress_bar
+        Whether to show a progress bar.
+
+    Returns
+    -------
+        The validation failures.
+    """
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    if output_path is None:
+        curr_time = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = (
+            doiget_tdm.config.SETTINGS.cache_dir / f"revalidate_{curr_time}.parquet"
+        )
+
+    failures: list[ValidationFailure] = []
+
+    with alive_progress.alive_bar(
+        total=None,
+        disable=not show_progress_bar,
+    ) as progress_bar:
+
+        for work_failures in iter_validation_results(
+            n_workers=n_workers,
+            chunk_size=chunk_size,
+        ):
+            failures.extend(work_failures)
+            progress_bar()
+
+    LOGGER.info(f"Found {len(failures)} full-text file(s) that failed validation")
+
+    write_report(failures=failures, output_path=output_path)
+
+    rich.print(f"Wrote validation report ({len(failures)} failures) to {output_path}")
+
+    if quarantine_dir is not None:
+        for failure in failures:
+            quarantine(failure=failure, quarantine_dir=quarantine_dir)
+
+    return failures
+
+
+def iter_validation_results(
+    n_workers: int,
+    chunk_size: int,
+) -> typing.Iterator[list[ValidationFailure]]:
+    """
+    Streams the works in the data directory through the validators.
+
+    Parameters
+    ----------
+    n_workers
+        Number of worker processes; a value of 1 performs the validation in the
+        current process.
+    chunk_size
+        Number of works that are sent to a worker process at a time.
+
+    Returns
+    -------
+        An iterator that yields the validation failures (if any) for each work.
+    """
+
+    # only pass the (picklable) directory names to the workers, rather than `Work`
+    # instances, so that the data directory can be streamed
+    quoted_dois = (path.name for path in doiget_tdm.data._iter_paths())
+
+    chunks = more_itertools.chunked(quoted_dois, n=chunk_size)
+
+    for chunk_failures in doiget_tdm.pool.iter_results(
+        func=validate_works,
+        tasks=((chunk,) for chunk in chunks),
+        n_workers=n_workers,
+    ):
+        yield from chunk_failures
+
+
+def validate_works(quoted_dois: list[str]) -> list[list[ValidationFailure]]:
+    """
+    Validate each full-text format that is present for a set of works.
+
+    Parameters
+    ----------
+    quoted_dois
+        The DOIs of the works, in 'quoted' form.
+
+    Returns
+    -------
+        Details on any formats that failed validation, for each work.
+    """
+    return [validate_work(quoted_doi=quoted_doi) for quoted_doi in quoted_dois]
+
+
+def validate_work(quoted_doi: str) -> list[ValidationFailure]:
+    """
+    Validate each full-text format that is present for a work.
+
+    Parameters
+    ----------
+    quoted_doi
+        The DOI of the work, in 'quoted' form (as per its data directory name).
+
+    Returns
+    -------
+        Details on any formats that failed validation.
+    """
+
+    doi = doiget_tdm.doi.DOI(doi=quoted_doi, unquote=True)
+
+    work = doiget_tdm.work.Work(doi=doi)
+
+    failures: list[ValidationFailure] = []
+
+    for fmt_name, fmt in work.fulltext.formats.items():
+
+        if not fmt.exists:
+            continue
+
+        is_encrypted = fmt.is_encrypted
+
+        try:
+            # decryption, if required, happens within the worker
+            data = fmt.load()
+            doiget_tdm.validate.validate_data(data=data, data_format=fmt_name)
+        except Exception as err:
+            LOGGER.warning(f"Validation failed for {fmt.local_path} ({err})")
+            failures.append(
+                ValidationFailure(
+                    doi=str(doi),
+                    fmt=fmt_name,
+                    path=fmt.local_path,
+                    is_encrypted=is_encrypted,
+                    error_type=type(err).__name__,
+                    error_msg=str(err),
+                )
+            )
+
+    return failures
+
+
+def write_report(
+    failures: typing.Sequence[ValidationFailure],
+    output_path: pathlib.Path,
+) -> None:
+    """
+    Write the validation failures to a Parquet file.
+
+    Parameters
+    ----------
+    failures
+        The validation failures.
+    output_path
+        File to write the report.
+    """
+
+    df = pl.DataFrame(
+        data=[
+            (
+                failure.doi,
+                failure.fmt.name,
+                str(failure.path),
+                failure.is_encrypted,
+                failure.error_type,
+                failure.error_msg,
+            )
+            for failure in failures
+        ],
+        schema=REPORT_SCHEMA,
+        orient="row",
+    )
+
+    df.write_parquet(output_path)
+
+
+def quarantine(
+    failure: ValidationFailure,
+    quarantine_dir: pathlib.Path,
+) -> None:
+    """
+    Move a full-text file that failed validation out of the data directory.
+
+    Parameters
+    ----------
+    failure
+        Details of the validation failure.
+    quarantine_dir
+        Directory in which to place the file, within a subdirectory named after
+        the work's directory in the data directory.
+    """
+
+    fmt = doiget_tdm.format.Format(
+        name=failure.fmt,
+        doi=doiget_tdm.doi.DOI(doi=failure.doi),
+    )
+
+    dest_dir = quarantine_dir / fmt.local_path.parent.name
+    dest_dir.mkdir(exist_ok=True, parents=True)
+
+    paths = [fmt.local_path]
+
+    if fmt.is_encrypted:
+        paths.append(fmt.is_encrypted_sentinel_path)
+
+    for path in paths:
+        LOGGER.info(f"Moving {path} to quarantine in {dest_dir}")
+        shutil.move(src=path, dst=dest_dir / path.name)
@@ -6,6 +6,7 @@ import typing
 import upath
 
 import doiget_tdm.format
+import doiget_tdm.timing
 import doiget_tdm.validate
 
 
@@ -44,7 +45,8 @@ class Source:
         """
         Attempt to acquire the full-text content from the source.
         """
-        return self.acq_func(self)
+        with doiget_tdm.timing.span(stage=doiget_tdm.timing.Stage.SOURCE_ACQUIRE):
+            return self.acq_func(self)
 
     def validate(self, data: bytes) -> bool:
         """
@@ -59,4 +61,5 @@ class Source:
         -------
             Whether the data was deemed as valid.
         """
-        return self.validator_func(data, self.format_name)
+        with doiget_tdm.timing.span(stage=doiget_tdm.timing.Stage.VALIDATE):
+            return self.validator_func(data, self.format_name)
@@ -7,8 +7,17 @@ from __future__ import annotations
 
 import pathlib
 import typing
+import atexit
 import dataclasses
 import warnings
+import hashlib
+import logging
+import operator
+import os
+import shutil
+import tempfile
+
+import more_itertools
 
 import polars as pl
 import polars.exceptions
@@ -19,6 +28,11 @@ import rich.table
 import doiget_tdm.doi
 import doiget_tdm.format
 import doiget_tdm.data
+import doiget_tdm.pool
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
 
 
 SCHEMA: pl.Schema = pl.Schema(
@@ -42,6 +56,17 @@ SCHEMA: pl.Schema = pl.Schema(
 )
 
 
+#: Column in the cached status that holds the modification time of the directory for
+#: each work, in nanoseconds.
+MTIME_COLUMN = "dir_mtime_ns"
+
+CACHE_SCHEMA: pl.Schema = pl.Schema(schema=dict(SCHEMA) | {MTIME_COLUMN: pl.Int64()})
+
+#: Default number of works in each batch of status rows; each batch is formed
+#: within a single worker process.
+BATCH_SIZE = 1_000
+
+
 StatusRow = dataclasses.make_dataclass(
     cls_name="StatusRow",
     fields=SCHEMA.to_python().items(),
@@ -97,6 +122,8 @@ def convert_work_to_status_row(
 def run(
     dois: typing.Sequence[doiget_tdm.doi.DOI] | None,
     output_path: pathlib.Path | None,
+    full: bool = False,
+    n_workers: int | None = None,
 ) -> None:
     """
     Produce a status summary for the data directory.
@@ -107,22 +134,31 @@ def run(
         Set of DOIs to constrain the summary.
     output_path
         File to write a detailed summary (in CSV format).
+    full
+        Whether to rebuild the status of every work, rather than only those with
+        directories that have changed since the previous run.
+    n_workers
+        Number of worker processes used to form the status of the works. If not
+        provided, the number of CPUs is used; a value of 1 forms the status in the
+        current process.
 
     """
 
-    df = get_df(dois=dois)
+    lf = get_lf(dois=dois, full=full, n_workers=n_workers)
 
-    publishers_table = get_publisher_table(df=df)
+    publishers_table = get_publisher_table(lf=lf)
     rich.print(publishers_table)
 
-    formats_table = get_formats_table(df=df)
+    formats_table = get_formats_table(lf=lf)
     rich.print(formats_table)
 
-    best_format_table = get_best_format_table(df=df)
+    best_format_table = get_best_format_table(lf=lf)
     rich.print(best_format_table)
 
     if output_path is not None:
 
+        df = lf.collect()
+
         writers = {
             ".csv": df.write_csv,
             ".json": df.write_json,
@@ -141,41 +177,28 @@ def run(
 
 
 def get_formats_table(
-    df: pl.DataFrame,
+    lf: pl.LazyFrame,
 ) -> rich.table.Table:
 
-    with_fulltext = df.filter(pl.col("has_fulltext"))
-
-    cols = [
-        f"has_fulltext_{fmt.name}"
-        for fmt in doiget_tdm.SETTINGS.format_preference_order
-    ]
-
-    def row_func(row: tuple[bool, ...]) -> str:
-        return " + ".join(
-            sorted(
-                {
-                    fmt.name
-                    for (fmt, has_fmt) in zip(
-                        doiget_tdm.SETTINGS.format_preference_order,
-                        row,
-                        strict=True,
-                    )
-                    if has_fmt
-                }
-            )
-        )
+    # the names of the formats that are present in each row, joined in sorted order
+    fmt_names = sorted(fmt.name for fmt in doiget_tdm.SETTINGS.format_preference_order)
 
-    fmt_types = (
-        with_fulltext.select(pl.col(*cols))
-        .map_rows(
-            function=row_func,
-            return_dtype=pl.Categorical(),
-        )
-        .rename({"map": "fmt_types"})
+    fmt_types = pl.concat_str(
+        [
+            pl.when(pl.col(f"has_fulltext_{fmt_name}")).then(pl.lit(fmt_name))
+            for fmt_name in fmt_names
+        ],
+        separator=" + ",
+        ignore_nulls=True,
     )
 
-    counts = fmt_types.group_by(pl.col("fmt_types")).len()
+    counts = (
+        lf.filter(pl.col("has_fulltext"))
+        .group_by(fmt_types.alias("fmt_types"))
+        .len()
+        .sort("len", "fmt_types")
+        .collect()
+    )
 
     table = rich.table.Table(
         title="DOIs with full-text formats",
@@ -184,51 +207,40 @@ def get_formats_table(
     table.add_column("Format(s)")
     table.add_column("Count")
 
-    for value in counts.sort("len").iter_rows():
+    for value in counts.iter_rows():
         table.add_row(*[str(val) for val in value])
 
     return table
 
 
 def get_best_format_table(
-    df: pl.DataFrame,
+    lf: pl.LazyFrame,
 ) -> rich.table.Table:
 
-    fmt_columns = [
-        f"has_fulltext_{fmt.name}"
-        for fmt in doiget_tdm.SETTINGS.format_preference_order
-    ]
-
-    best_expr: pl.expr.whenthen.Then | pl.expr.whenthen.ChainedThen | None = None
-
-    for fmt_column in fmt_columns:
-
-        (*_, fmt) = fmt_column.split("_")
+    fmt_names = [fmt.name for fmt in doiget_tdm.SETTINGS.format_preference_order]
 
-        if best_expr is None:
-            best_expr = pl.when(pl.col(fmt_column)).then(pl.lit(fmt))
-        else:
-            best_expr = best_expr.when(pl.col(fmt_column)).then(pl.lit(fmt))
-
-    if not isinstance(best_expr, pl.expr.whenthen.ChainedThen):
-        raise ValueError()
-
-    best = df.filter(pl.col("has_fulltext")).select(best_expr.alias("best"))
+    best_expr = pl.coalesce(
+        [
+            pl.when(pl.col(f"has_fulltext_{fmt_name}")).then(pl.lit(fmt_name))
+            for fmt_name in fmt_names
+        ]
+    )
 
-    counts = best.group_by("best").len()
+    best_counts = (
+        lf.filter(pl.col("has_fulltext")).group_by(best_expr.alias("best")).len()
+    )
 
-    for curr_fmt in doiget_tdm.format.FormatName:
-        if curr_fmt.name not in counts["best"]:
-            counts = pl.concat(
-                [
-                    counts,
-                    pl.DataFrame(
-                        {"best": curr_fmt.name, "len": 0},
-                        schema=counts.schema,
-                    ),
-                ],
-                how="vertical",
-            )
+    # include formats that are not the best for any DOIs
+    counts = (
+        pl.LazyFrame(
+            {"best": [fmt.name for fmt in doiget_tdm.format.FormatName]},
+            schema={"best": pl.String()},
+        )
+        .join(best_counts, on="best", how="left")
+        .with_columns(pl.col("len").fill_null(0))
+        .sort("len", "best")
+        .collect()
+    )
 
     table = rich.table.Table(
         title="Best available format count",
@@ -237,39 +249,35 @@ def get_best_format_table(
     table.add_column("Format")
     table.add_column("Count")
 
-    for value in counts.sort("len").iter_rows():
+    for value in counts.iter_rows():
         table.add_row(*[str(val) for val in value])
 
     return table
 
 
 def get_publisher_table(
-    df: pl.DataFrame,
+    lf: pl.LazyFrame,
 ) -> rich.table.Table:
 
-    df_with_metadata = df.filter(pl.col("has_metadata")).select(
-        pl.col("member_id", "publisher_name")
-    )
-
-    def combine_publisher_names(member_df: pl.DataFrame) -> pl.DataFrame:
-
-        count = member_df.select("member_id").count().item()
-
-        publisher_names = member_df.select(pl.col("publisher_name")).unique().rows()
-
-        member_id = member_df.select(pl.first("member_id")).item()
-
-        combined = "; ".join([publisher_name for publisher_name, in publisher_names])
-
-        return pl.DataFrame(
-            {
-                "member_id": [member_id],
-                "publisher_name": [combined],
-                "count": [count],
-            }
+    names = (
+        lf.filter(pl.col("has_metadata"))
+        .group_by("member_id")
+        .agg(
+            pl.col("publisher_name")
+            .cast(pl.String())
+            .unique()
+            .sort()
+            .str.join(delimiter="; ")
+            .alias("publisher_name"),
+            pl.len().alias("count"),
         )
-
-    names = df_with_metadata.group_by("member_id").map_groups(combine_publisher_names)
+        .sort(
+            "count",
+            "publisher_name",
+            descending=[True, False],
+        )
+        .collect()
+    )
 
     table = rich.table.Table(
         title="Publishers of DOIs with metadata",
@@ -280,49 +288,364 @@ def get_publisher_table(
     table.add_column("Publisher name(s)")
     table.add_column("Count")
 
-    for value in names.sort(
-        "count",
-        "publisher_name",
-        descending=[True, False],
-    ).iter_rows():
+    for value in names.iter_rows():
         table.add_row(*[str(val) for val in value])
 
     return table
 
 
-def iter_works(
-    dois: typing.Sequence[doiget_tdm.doi.DOI] | None,
-) -> typing.Iterable[dict[str, object]]:
+def form_batch(quoted_dois: typing.Sequence[str]) -> pl.DataFrame:
+    """
+    Form a data frame of the status of a batch of works.
 
-    iterator = iter(dois) if dois is not None else doiget_tdm.data.iter_unsorted_works()
+    Parameters
+    ----------
+    quoted_dois
+        The DOIs of the works in the batch, in 'quoted' form (as per their data
+        directory names).
 
-    items_are_works = dois is None
+    Returns
+    -------
+        The status information, with one row per work.
+    """
 
-    for item in iterator:
+    get_row_values = operator.attrgetter(*SCHEMA.names())
+
+    works = (
+        doiget_tdm.Work(doi=doiget_tdm.doi.DOI(doi=quoted_doi, unquote=True))
+        for quoted_doi in quoted_dois
+    )
+
+    return pl.DataFrame(
+        data=[get_row_values(convert_work_to_status_row(work=work)) for work in works],
+        schema=SCHEMA,
+        orient="row",
+    )
+
+
+def iter_batches(
+    quoted_dois: typing.Iterable[str],
+    n_workers: int | None = None,
+    batch_size: int = BATCH_SIZE,
+) -> typing.Iterator[pl.DataFrame]:
+    """
+    Form the status of works in batches, using a pool of worker processes.
+
+    Parameters
+    ----------
+    quoted_dois
+        The DOIs of the works, in 'quoted' form.
+    n_workers
+        Number of worker processes. If not provided, the number of CPUs is used; a
+        value of 1 forms the batches in the current process.
+    batch_size
+        Number of works in each batch.
+
+    Returns
+    -------
+        An iterator that yields the status of each batch of works, in the order of
+        ``quoted_dois``.
+    """
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    # only the (picklable) directory names are sent to the workers, and the batches
+    # are returned as Arrow-backed data frames; only a few batches are formed ahead
+    # of the workers
+    chunks = more_itertools.chunked(quoted_dois, n=batch_size)
+
+    yield from doiget_tdm.pool.iter_results(
+        func=form_batch,
+        tasks=((chunk,) for chunk in chunks),
+        n_workers=n_workers,
+        ordered=True,
+    )
 
-        if items_are_works:
-            if not isinstance(item, doiget_tdm.Work):
-                raise ValueError()
-            work = item
 
-        else:
-            if not isinstance(item, doiget_tdm.DOI):
-                raise ValueError()
-            work = doiget_tdm.Work(doi=item)
+def get_df(
+    dois: typing.Sequence[doiget_tdm.doi.DOI] | None,
+    full: bool = False,
+    n_workers: int | None = None,
+) -> pl.DataFrame:
+    """
+    Form a data frame of the status of each work.
 
-        status_row = convert_work_to_status_row(work=work)
+    Parameters
+    ----------
+    dois
+        Set of DOIs to constrain the works; if not provided, all the works in the
+        data directory are included.
+    full
+        When including all the works in the data directory, whether to rebuild the
+        status of every work rather than re-using the cached status of any works
+        whose directories have not changed since the previous run.
+    n_workers
+        Number of worker processes used to form the status of the works; see
+        ``iter_batches``.
+
+    Returns
+    -------
+        The status information, with one row per work.
+    """
+
+    return get_lf(dois=dois, full=full, n_workers=n_workers).collect()
 
-        yield dataclasses.asdict(status_row)  # type: ignore[call-overload]
 
+def get_lf(
+    dois: typing.Sequence[doiget_tdm.doi.DOI] | None,
+    full: bool = False,
+    n_workers: int | None = None,
+    batch_size: int = BATCH_SIZE,
+) -> pl.LazyFrame:
+    """
+    Form a lazy frame of the status of each work.
 
-def get_df(dois: typing.Sequence[doiget_tdm.doi.DOI] | None) -> pl.DataFrame:
+    The status is written, in batches, to a Parquet file in the cache directory and
+    the returned frame reads from this file, so that the status of all the works
+    does not need to be held in memory.
+
+    Parameters
+    ----------
+    dois
+        Set of DOIs to constrain the works; if not provided, all the works in the
+        data directory are included.
+    full
+        See ``get_df``.
+    n_workers
+        See ``get_df``.
+    batch_size
+        Number of works in each batch.
+
+    Returns
+    -------
+        The status information, with one row per work.
+    """
 
     warnings.simplefilter("ignore", polars.exceptions.CategoricalRemappingWarning)
 
-    df = pl.DataFrame(
-        data=iter_works(dois=dois),
-        schema=SCHEMA,
+    if dois is None:
+        return get_data_dir_lf(full=full, n_workers=n_workers, batch_size=batch_size)
+
+    for doi in dois:
+        if not isinstance(doi, doiget_tdm.DOI):
+            raise ValueError()
+
+    # the subset is specific to this run, so it is written to a unique file that is
+    # removed when the process exits
+    (handle, output_name) = tempfile.mkstemp(
+        prefix="status_subset_",
+        suffix=".parquet",
+        dir=doiget_tdm.SETTINGS.cache_dir,
+    )
+    os.close(handle)
+
+    output_path = pathlib.Path(output_name)
+
+    atexit.register(output_path.unlink, missing_ok=True)
+
+    batches = iter_batches(
+        quoted_dois=(doi.quoted for doi in dois),
+        n_workers=n_workers,
+        batch_size=batch_size,
+    )
+
+    write_batches(batches=batches, output_path=output_path, schema=SCHEMA)
+
+    return pl.scan_parquet(output_path)
+
+
+def get_data_dir_lf(
+    full: bool = False,
+    n_workers: int | None = None,
+    batch_size: int = BATCH_SIZE,
+) -> pl.LazyFrame:
+    """
+    Form a lazy frame of the status of each work in the data directory, re-using
+    the cached status from the previous run for any works whose directory
+    modification time is unchanged.
+
+    Parameters
+    ----------
+    full
+        Whether to ignore the cache and rebuild the status of every work.
+    n_workers
+        Number of worker processes; see ``iter_batches``.
+    batch_size
+        Number of works in each batch.
+
+    Returns
+    -------
+        The status information, with one row per work.
+    """
+
+    cache_path = get_cache_path(name="status")
+
+    # the directory of each work that is currently in the data directory, along with
+    # its modification time
+    dirs = pl.DataFrame(
+        data=(
+            (path.name, path.stat().st_mtime_ns)
+            for path in doiget_tdm.data._iter_paths()
+        ),
+        schema={"doi_quoted": pl.String(), MTIME_COLUMN: pl.Int64()},
         orient="row",
     )
 
-    return df
+    cached = None if full else read_cache(cache_path=cache_path)
+
+    if cached is None:
+        unchanged = None
+        to_scan = dirs
+    else:
+        # a work is unchanged if its directory has the same name and modification
+        # time; this is expressed as a filter, rather than a join, so that the
+        # unchanged rows can be streamed from the cache
+        key = pl.concat_str(
+            [pl.col("doi_quoted"), pl.col(MTIME_COLUMN).cast(pl.String())],
+            separator=":",
+        )
+        cached_keys = cached.select(key.alias("key")).collect()["key"]
+        unchanged = cached.filter(key.is_in(dirs.select(key.alias("key"))["key"]))
+        to_scan = dirs.filter(~key.is_in(cached_keys))
+
+    LOGGER.info(
+        f"Re-using the cached status of {len(dirs) - len(to_scan)} works and "
+        + f"scanning {len(to_scan)} works"
+    )
+
+    # the batches are formed in the same order, and with the same size, as the
+    # slices of the directory frame
+    batches = (
+        batch.with_columns(dirs_slice[MTIME_COLUMN])
+        for (batch, dirs_slice) in zip(
+            iter_batches(
+                quoted_dois=to_scan["doi_quoted"],
+                n_workers=n_workers,
+                batch_size=batch_size,
+            ),
+            to_scan.iter_slices(n_rows=batch_size),
+            strict=True,
+        )
+    )
+
+    write_batches(
+        batches=batches,
+        output_path=cache_path,
+        schema=CACHE_SCHEMA,
+        existing=unchanged,
+    )
+
+    return pl.scan_parquet(cache_path).drop(MTIME_COLUMN)
+
+
+def write_batches(
+    batches: typing.Iterable[pl.DataFrame],
+    output_path: pathlib.Path,
+    schema: pl.Schema,
+    existing: pl.LazyFrame | None = None,
+) -> None:
+    """
+    Write batches of rows to a Parquet file, holding only one batch in memory at a
+    time.
+
+    Parameters
+    ----------
+    batches
+        The batches of rows.
+    output_path
+        Parquet file to write.
+    schema
+        The schema of the rows.
+    existing
+        Any rows to include before the rows in the batches.
+    """
+
+    # each batch is written to a separate file, and these are then combined into
+    # the output file in a streaming manner; the intermediate files have unique
+    # names, so that concurrent runs do not write to the same files
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    parts_dir = pathlib.Path(
+        tempfile.mkdtemp(prefix=f"{output_path.stem}_parts_", dir=output_path.parent)
+    )
+
+    try:
+
+        frames = [existing] if existing is not None else []
+
+        for i_batch, batch in enumerate(batches):
+            part_path = parts_dir / f"part_{i_batch:06d}.parquet"
+            batch.write_parquet(part_path)
+            frames.append(pl.scan_parquet(part_path))
+
+        combined = (
+            pl.concat(frames, how="vertical")
+            if len(frames) > 0
+            else pl.LazyFrame(schema=schema)
+        )
+
+        # write to a temporary file first, so that an interrupted write does not
+        # leave a corrupted file (and because `existing` may read from the output)
+        tmp_path = parts_dir / "combined.parquet"
+
+        combined.sink_parquet(tmp_path)
+
+        tmp_path.replace(output_path)
+
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    LOGGER.info(f"Wrote the status to {output_path}")
+
+
+def get_cache_path(name: str) -> pathlib.Path:
+    """
+    The path to a status file for the current data directory.
+
+    Parameters
+    ----------
+    name
+        Prefix for the filename.
+    """
+
+    # the data directory and its grouping determine the work directories
+    data_dir_key = hashlib.blake2b(
+        (
+            f"{doiget_tdm.SETTINGS.data_dir.resolve()}:"
+            + f"{doiget_tdm.SETTINGS.data_dir_n_groups}"
+        ).encode(),
+        digest_size=8,
+    ).hexdigest()
+
+    return doiget_tdm.SETTINGS.cache_dir / f"{name}_{data_dir_key}.parquet"
+
+
+def read_cache(cache_path: pathlib.Path) -> pl.LazyFrame | None:
+    """
+    Read the cached status, if it exists and is compatible.
+
+    Parameters
+    ----------
+    cache_path
+        Path to the cached status.
+
+    Returns
+    -------
+        The cached status, or ``None`` if it could not be used.
+    """
+
+    if not cache_path.exists():
+        return None
+
+    try:
+        cached_schema = pl.read_parquet_schema(cache_path)
+    except Exception as err:
+        LOGGER.warning(f"Unable to read the cached status at {cache_path} ({err})")
+        return None
+
+    if cached_schema != dict(CACHE_SCHEMA):
+        LOGGER.info(f"Ignoring the cached status at {cache_path}; schema has changed")
+        return None
+
+    return pl.scan_parquet(cache_path)
@@ -0,0 +1,321 @@
+"""
+Records the time spent in each stage of acquisition, aggregated by publisher and
+format.
+"""
+
+from __future__ import annotations
+
+import collections.abc
+import contextlib
+import contextvars
+import dataclasses
+import enum
+import json
+import logging
+import pathlib
+import threading
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    import rich.table
+
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+
+class Stage(enum.Enum):
+    """
+    Timed stages of acquisition.
+
+    Notes
+    -----
+    * The ``LIMITER_WAIT`` and ``HTTP`` stages are nested within the
+      ``METADATA_ACQUIRE`` and ``SOURCE_ACQUIRE`` stages, so that the time spent
+      waiting on rate limiters can be distinguished from network time.
+
+    """
+
+    METADATA_ACQUIRE = "metadata_acquire"
+    SOURCE_ACQUIRE = "source_acquire"
+    LIMITER_WAIT = "limiter_wait"
+    HTTP = "http"
+    VALIDATE = "validate"
+    ENCRYPT = "encrypt"
+    WRITE = "write"
+
+
+@dataclasses.dataclass(frozen=True)
+class SpanKey:
+    stage: Stage
+    publisher: str
+    fmt: str
+
+
+@dataclasses.dataclass
+class SpanStats:
+    count: int = 0
+    n_errors: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+
+
+# the publisher and format that apply to any spans within the current context
+_publisher_label: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "publisher",
+    default="",
+)
+_fmt_label: contextvars.ContextVar[str] = contextvars.ContextVar("fmt", default="")
+
+
+class Timings:
+
+    def __init__(self) -> None:
+        """
+        Aggregated durations of the timed stages.
+        """
+
+        self._lock = threading.Lock()
+        self._stats: dict[SpanKey, SpanStats] = {}
+
+    def reset(self) -> None:
+        """
+        Remove any recorded durations.
+        """
+        with self._lock:
+            self._stats.clear()
+
+    def record(
+        self,
+        stage: Stage,
+        duration_s: float,
+        is_error: bool = False,
+    ) -> None:
+        """
+        Add the duration of a stage, labelled with the current publisher and format.
+
+        Parameters
+        ----------
+        stage
+            The timed stage.
+        duration_s
+            Duration, in seconds.
+        is_error
+            Whether the stage raised an error.
+        """
+
+        (publisher, fmt) = get_labels()
+
+        key = SpanKey(stage=stage, publisher=publisher, fmt=fmt)
+
+        with self._lock:
+            stats = self._stats.setdefault(key, SpanStats())
+            stats.count += 1
+            stats.n_errors += int(is_error)
+            stats.total_s += duration_s
+            stats.max_s = max(stats.max_s, duration_s)
+
+    def items(self) -> list[tuple[SpanKey, SpanStats]]:
+        """
+        The recorded durations, sorted by stage, publisher, and format.
+        """
+
+        stage_order = list(Stage)
+
+        with self._lock:
+            items = [
+                (key, dataclasses.replace(stats)) for key, stats in self._stats.items()
+            ]
+
+        return sorted(
+            items,
+            key=lambda item: (
+                stage_order.index(item[0].stage),
+                item[0].publisher,
+                item[0].fmt,
+            ),
+        )
+
+    def get_table(self) -> rich.table.Table:
+        """
+        Form a summary table of the recorded durations.
+        """
+
+        # deferred import, as it is only needed when showing the summary
+        import rich.table
+
+        table = rich.table.Table(title="Time spent per acquisition stage")
+
+        for column in ("Stage", "Publisher", "Format", "Count", "Errors"):
+            table.add_column(column)
+
+        for column in ("Total (s)", "Mean (ms)", "Max (ms)"):
+            table.add_column(column, justify="right")
+
+        for key, stats in self.items():
+            table.add_row(
+                key.stage.value,
+                key.publisher or "-",
+                key.fmt or "-",
+                str(stats.count),
+                str(stats.n_errors),
+                f"{stats.total_s:.2f}",
+                f"{stats.total_s / stats.count * 1000:.1f}",
+                f"{stats.max_s * 1000:.1f}",
+            )
+
+        return table
+
+    def print_summary(self) -> None:
+        """
+        Print a summary table of the recorded durations.
+        """
+
+        # deferred import, as it is only needed when showing the summary
+        import rich
+
+        rich.print(self.get_table())
+
+    def write(self, output_path: pathlib.Path) -> None:
+        """
+        Write the recorded durations to a file.
+
+        Parameters
+        ----------
+        output_path
+            File to write. If it has a suffix of ``.prom``, the output is in the
+            Prometheus text exposition format (suitable for the textfile collector
+            of the node exporter); otherwise, it is in JSON format.
+        """
+
+        output = (
+            self.to_prometheus()
+            if output_path.suffix == ".prom"
+            else json.dumps(self.to_json(), indent=2)
+        )
+
+        output_path.write_text(output)
+
+        LOGGER.info(f"Wrote stage timings to {output_path}")
+
+    def to_json(self) -> list[dict[str, str | int | float]]:
+        """
+        The recorded durations, in a JSON-compatible form.
+        """
+
+        return [
+            {
+                "stage": key.stage.value,
+                "publisher": key.publisher,
+                "format": key.fmt,
+                "count": stats.count,
+                "n_errors": stats.n_errors,
+                "total_s": stats.total_s,
+                "max_s": stats.max_s,
+            }
+            for key, stats in self.items()
+        ]
+
+    def to_prometheus(self) -> str:
+        """
+        The recorded durations, in the Prometheus text exposition format.
+        """
+
+        items = self.items()
+
+        metrics = (
+            ("count", "counter", "Number of times the stage was run", "count"),
+            ("errors", "counter", "Number of times the stage raised", "n_errors"),
+            ("seconds", "counter", "Total time spent in the stage", "total_s"),
+            ("max_seconds", "gauge", "Longest time spent in the stage", "max_s"),
+        )
+
+        lines: list[str] = []
+
+        for suffix, metric_type, help_text, attr in metrics:
+
+            name = f"doiget_tdm_stage_{suffix}"
+
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+            for key, stats in items:
+                labels = (
+                    f'stage="{key.stage.value}",'
+                    + f'publisher="{key.publisher}",'
+                    + f'format="{key.fmt}"'
+                )
+                lines.append(f"{name}{{{labels}}} {getattr(stats, attr)}")
+
+        return "\n".join(lines) + "\n"
+
+
+#: The durations recorded during the current process.
+TIMINGS = Timings()
+
+
+@contextlib.contextmanager
+def span(stage: Stage) -> collections.abc.Iterator[None]:
+    """
+    Time the enclosed code as a stage of acquisition.
+
+    Parameters
+    ----------
+    stage
+        The stage to attribute the duration to.
+    """
+
+    start = time.perf_counter()
+
+    try:
+        yield
+    except BaseException:
+        TIMINGS.record(
+            stage=stage,
+            duration_s=time.perf_counter() - start,
+            is_error=True,
+        )
+        raise
+
+    TIMINGS.record(stage=stage, duration_s=time.perf_counter() - start)
+
+
+@contextlib.contextmanager
+def labels(
+    publisher: str | None = None,
+    fmt: str | None = None,
+) -> collections.abc.Iterator[None]:
+    """
+    Label any stages that are timed within the enclosed code.
+
+    Parameters
+    ----------
+    publisher
+        Name of the publisher.
+    fmt
+        Name of the full-text format.
+    """
+
+    tokens = [
+        (label_var, label_var.set(value))
+        for (label_var, value) in ((_publisher_label, publisher), (_fmt_label, fmt))
+        if value is not None
+    ]
+
+    try:
+        yield
+    finally:
+        for label_var, token in reversed(tokens):
+            label_var.reset(token)
+
+
+def get_labels() -> tuple[str, str]:
+    """
+    The publisher and format labels that apply within the current context.
+
+    Returns
+    -------
+        The publisher name and format name; either is an empty string if not set.
+    """
+    return (_publisher_label.get(), _fmt_label.get())
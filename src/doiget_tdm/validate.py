@@ -7,13 +7,13 @@ import puremagic
 
 import html5lib
 
-import doiget_tdm.format
+import doiget_tdm.config
 import doiget_tdm.errors
 
 
 def validate_data(
     data: bytes,
-    data_format: doiget_tdm.format.FormatName,
+    data_format: doiget_tdm.config.FormatName,
 ) -> bool:
     """
     Use heuristics to validate that data is in an expected format.
@@ -36,11 +36,11 @@ def validate_data(
     """
 
     validators = {
-        doiget_tdm.format.FormatName.XML: validate_xml,
-        doiget_tdm.format.FormatName.PDF: validate_pdf,
-        doiget_tdm.format.FormatName.HTML: validate_html,
-        doiget_tdm.format.FormatName.TXT: validate_txt,
-        doiget_tdm.format.FormatName.TIFF: validate_tiff,
+        doiget_tdm.config.FormatName.XML: validate_xml,
+        doiget_tdm.config.FormatName.PDF: validate_pdf,
+        doiget_tdm.config.FormatName.HTML: validate_html,
+        doiget_tdm.config.FormatName.TXT: validate_txt,
+        doiget_tdm.config.FormatName.TIFF: validate_tiff,
     }
 
     validator_func = validators[data_format]
@@ -50,6 +50,28 @@ def validate_data(
     return True
 
 
+def skip_validation(
+    data: bytes,  # noqa: ARG001
+    data_format: doiget_tdm.config.FormatName,  # noqa: ARG001
+) -> bool:
+    """
+    A validator for sources whose data have already been checked as they were
+    acquired.
+
+    Parameters
+    ----------
+    data
+        The raw data, which are not examined.
+    data_format
+        The expected data format.
+
+    Returns
+    -------
+        Always ``True``.
+    """
+    return True
+
+
 def validate_xml(data: bytes) -> None:
     """
     Validates an XML by checking that it has a non-empty `body` tag.
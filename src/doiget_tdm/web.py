@@ -3,11 +3,16 @@ Make web requests with rate limiting and retrying.
 """
 
 import collections.abc
+import contextlib
+import typing
 
 import requests
 import requests_ratelimiter
 import pyrate_limiter
-import retryhttp
+
+import doiget_tdm.metrics
+import doiget_tdm.quota
+import doiget_tdm.timing
 
 
 DEFAULT_LIMITER = pyrate_limiter.Limiter(
@@ -18,16 +23,56 @@ DEFAULT_LIMITER = pyrate_limiter.Limiter(
 )
 
 
+class _TimedLimiterSession(requests_ratelimiter.LimiterSession):
+    """
+    A ``LimiterSession`` that times the wait for the rate limiter separately from
+    the request itself.
+    """
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        **kwargs: typing.Any,  # noqa: ANN401
+    ) -> requests.Response:
+
+        with contextlib.ExitStack() as stack:
+
+            # the limiter delays (if required) on entering its context
+            with (
+                doiget_tdm.metrics.METRICS.limiter_waiting(),
+                doiget_tdm.timing.span(stage=doiget_tdm.timing.Stage.LIMITER_WAIT),
+            ):
+                stack.enter_context(
+                    self.limiter.ratelimit(
+                        self._bucket_name(request),  # type: ignore[no-untyped-call]
+                        delay=True,
+                        max_delay=self.max_delay,  # type: ignore[arg-type]
+                    )
+                )
+
+            with (
+                doiget_tdm.metrics.METRICS.in_flight(),
+                doiget_tdm.timing.span(stage=doiget_tdm.timing.Stage.HTTP),
+            ):
+                response = requests.Session.send(self, request, **kwargs)
+
+            if response.status_code in self.limit_statuses:
+                self._fill_bucket(request)
+
+        return response
+
+
 class WebRequester:
 
     def __init__(
         self,
-        limiter: pyrate_limiter.Limiter = DEFAULT_LIMITER,
+        limiter: pyrate_limiter.Limiter | None = None,
         headers: dict[str, str] | None = None,
         max_delay_s: float | None = 60 * 60,
         per_host: bool = False,
         limit_statuses: collections.abc.Iterable[int] = (429, 500),
         max_retry_attempts: int = 10,
+        quota: doiget_tdm.quota.Quota | None = None,
     ) -> None:
         """
         Interface for making HTTP requests with rate limiting and retrying.
@@ -35,7 +80,7 @@ class WebRequester:
         Parameters
         ----------
         limiter
-            Rate limiter settings.
+            Rate limiter settings; if not provided, ``DEFAULT_LIMITER`` is used.
         headers
             Any headers to add to the request.
         max_delay_s
@@ -48,10 +93,14 @@ class WebRequester:
             The status codes that invoke rate limiting beyond the set limits.
         max_retry_attempts
             How many attempts at a retry before failure.
+        quota
+            A quota that each request is recorded against, in the ledger in the
+            cache directory; requests raise ``doiget_tdm.errors.QuotaExhaustedError``
+            if the quota is exhausted.
         """
 
-        self._session = requests_ratelimiter.LimiterSession(
-            limiter=limiter,
+        self._session = _TimedLimiterSession(
+            limiter=DEFAULT_LIMITER if limiter is None else limiter,
             max_delay=max_delay_s,
             per_host=per_host,
             limit_statuses=limit_statuses,
@@ -59,12 +108,23 @@ class WebRequester:
 
         self.max_retry_attempts = max_retry_attempts
 
+        self.quota = quota
+
+        # deferred import, as it is slow to import and is only needed once a
+        # requester is created
+        import retryhttp
+
         self.retry_wrapper = retryhttp.retry(max_attempt_number=self.max_retry_attempts)
 
         if headers is not None:
             self._session.headers = {**self._session.headers, **headers}
 
-    def get(self, url: str, raise_error: bool = True) -> requests.Response:
+    def get(
+        self,
+        url: str,
+        raise_error: bool = True,
+        stream: bool = False,
+    ) -> requests.Response:
         """
         Perform a GET request.
 
@@ -75,6 +135,10 @@ class WebRequester:
         raise_error
             Whether to raise a Python error if the HTTP status code indicates a
             request error.
+        stream
+            Whether to defer downloading the response content until it is read
+            (such as with ``iter_content``); the response should then be closed
+            once it has been read.
 
         Returns
         -------
@@ -82,13 +146,25 @@ class WebRequester:
         """
 
         retry_get = self.retry_wrapper(self._getter)
-        response: requests.Response = retry_get(url=url, raise_error=raise_error)
+        response: requests.Response = retry_get(
+            url=url,
+            raise_error=raise_error,
+            stream=stream,
+        )
 
         return response
 
-    def _getter(self, url: str, raise_error: bool = True) -> requests.Response:
+    def _getter(
+        self,
+        url: str,
+        raise_error: bool = True,
+        stream: bool = False,
+    ) -> requests.Response:
+
+        if self.quota is not None:
+            doiget_tdm.quota.get_ledger().spend(quota=self.quota)
 
-        response = self._session.get(url=url, timeout=60)
+        response = self._session.get(url=url, timeout=60, stream=stream)
 
         if raise_error:
             response.raise_for_status()
@@ -0,0 +1,193 @@
+import io
+import json
+import zipfile
+
+import py7zr
+import pydantic
+import pyrage
+
+import doiget_tdm.config
+import doiget_tdm.doi
+import doiget_tdm.format
+import doiget_tdm.metadata
+import doiget_tdm.publisher
+import doiget_tdm.publishers._apa
+
+
+XML_A = b"<article><body><p>A</p></body></article>"
+XML_B = b"<article><body><p>B</p></body></article>"
+
+
+def form_archive(tmp_path, passphrase: str):
+
+    inner_zip = io.BytesIO()
+
+    with zipfile.ZipFile(inner_zip, "w") as handle:
+        handle.writestr("a/2020-0001-001.xml", XML_A)
+        handle.writestr("a/readme.txt", b"")
+
+    inner_7z = io.BytesIO()
+
+    with py7zr.SevenZipFile(inner_7z, "w") as handle:
+        handle.writestr(XML_B, "b/2020-0002-001.xml")
+
+    outer_zip = io.BytesIO()
+
+    with zipfile.ZipFile(outer_zip, "w") as handle:
+        handle.writestr("a.zip", inner_zip.getvalue())
+        handle.writestr("b.7z", inner_7z.getvalue())
+
+    data_path = tmp_path / "apa.zip.age"
+
+    data_path.write_bytes(
+        pyrage.passphrase.encrypt(outer_zip.getvalue(), passphrase=passphrase)
+    )
+
+    return data_path
+
+
+def configure(monkeypatch, tmp_path) -> None:
+
+    passphrase = "test"
+
+    data_path = form_archive(tmp_path=tmp_path, passphrase=passphrase)
+
+    monkeypatch.setenv("DOIGET_TDM_APA_DATA_PATH", str(data_path))
+    monkeypatch.setenv("DOIGET_TDM_APA_PASSPHRASE", passphrase)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "cache_dir", tmp_path)
+    monkeypatch.setattr(
+        doiget_tdm.config.SETTINGS,
+        "encryption_passphrase",
+        pydantic.SecretStr("test"),
+    )
+
+
+def test_index(monkeypatch, tmp_path) -> None:
+
+    configure(monkeypatch=monkeypatch, tmp_path=tmp_path)
+
+    apa = doiget_tdm.publishers._apa.APA()
+
+    apa.form_file_lut()
+
+    assert apa.file_lut == {
+        "2020-0001-001.xml": ("a.zip", "a/2020-0001-001.xml"),
+        "2020-0002-001.xml": ("b.7z", "b/2020-0002-001.xml"),
+    }
+
+    assert apa.get_index_path().exists()
+
+    # a new instance loads the index, without decrypting the archive
+    apa = doiget_tdm.publishers._apa.APA()
+
+    apa.form_file_lut()
+
+    assert apa.raw_data is None
+
+    assert apa.read_from_archive(alternative_id="2020-0001-001.xml") == XML_A
+    assert apa.read_from_archive(alternative_id="2020-0002-001.xml") == XML_B
+
+    # each inner archive is only extracted once
+    apa.read_from_archive(alternative_id="2020-0001-001.xml")
+
+    cache_info = apa._get_inner_archive.cache_info()
+
+    assert (cache_info.hits, cache_info.misses) == (1, 2)
+
+
+def test_ingest(monkeypatch, tmp_path) -> None:
+
+    configure(monkeypatch=monkeypatch, tmp_path=tmp_path)
+
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir", data_dir)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir_n_groups", None)
+
+    apa = doiget_tdm.publishers._apa.APA()
+
+    monkeypatch.setitem(
+        doiget_tdm.publisher.registry,
+        apa.member_id,
+        apa,
+    )
+
+    dois = [
+        doiget_tdm.doi.DOI(doi=f"10.1037/{alternative_id}")
+        for alternative_id in ("2020-0001-001", "2020-0002-001", "2020-0003-001")
+    ]
+
+    for doi in dois:
+        metadata = doiget_tdm.metadata.Metadata(doi=doi)
+        metadata.path.parent.mkdir()
+        metadata.path.write_bytes(
+            json.dumps(
+                {
+                    "member": "15",
+                    "publisher": "APA",
+                    "alternative-id": [str(doi).split("/")[1]],
+                }
+            ).encode()
+        )
+
+    doiget_tdm.publishers._apa.ingest(
+        dois=dois,
+        n_workers=1,
+        show_progress_bar=False,
+    )
+
+    formats = [
+        doiget_tdm.format.Format(name=doiget_tdm.format.FormatName.XML, doi=doi)
+        for doi in dois
+    ]
+
+    # the third DOI is not in the archive
+    assert [fmt.exists for fmt in formats] == [True, True, False]
+    assert all(fmt.is_encrypted for fmt in formats[:2])
+
+    assert (
+        pyrage.passphrase.decrypt(
+            formats[0].local_path.read_bytes(),
+            passphrase="test",
+        )
+        == XML_A
+    )
+
+
+def test_ingest_archive(monkeypatch, tmp_path) -> None:
+
+    configure(monkeypatch=monkeypatch, tmp_path=tmp_path)
+
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir", data_dir)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir_n_groups", None)
+
+    apa = doiget_tdm.publishers._apa.APA()
+
+    monkeypatch.setitem(
+        doiget_tdm.publisher.registry,
+        apa.member_id,
+        apa,
+    )
+
+    # only the first file in the archive has a work in the data directory
+    doi = doiget_tdm.doi.DOI(doi="10.1037/a0000001")
+
+    metadata = doiget_tdm.metadata.Metadata(doi=doi)
+    metadata.path.parent.mkdir()
+    metadata.path.write_bytes(
+        json.dumps(
+            {"member": "15", "publisher": "APA", "alternative-id": ["2020-0001-001"]}
+        ).encode()
+    )
+
+    doiget_tdm.publishers._apa.ingest(n_workers=1, show_progress_bar=False)
+
+    fmt = doiget_tdm.format.Format(name=doiget_tdm.format.FormatName.XML, doi=doi)
+
+    assert pyrage.passphrase.decrypt(fmt.local_path.read_bytes(), "test") == XML_A
+
+    assert [path.name for path in data_dir.iterdir()] == [doi.quoted]
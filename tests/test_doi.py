@@ -1,5 +1,9 @@
+import gzip
+
 import pytest
 
+import polars as pl
+
 import doiget_tdm.doi
 import doiget_tdm.config
 
@@ -202,3 +206,86 @@ def test_from_input(tmp_path) -> None:
             raw_input=[EXAMPLE_VALID_DOI, EXAMPLE_INVALID_DOI],
             unquote=unquote,
         ) == [EXAMPLE_VALID_DOI]
+
+
+def test_doi_groups() -> None:
+
+    n_groups = 5000
+
+    dois = [
+        doiget_tdm.doi.DOI(doi=EXAMPLE_VALID_DOI),
+        doiget_tdm.doi.DOI(doi=EXAMPLE_VALID_DOI_2),
+    ]
+
+    groups = doiget_tdm.doi.DOI.get_group_of_each(dois=dois, n_groups=n_groups)
+
+    assert groups == [doi.get_group(n_groups=n_groups) for doi in dois]
+    assert groups[0] == "3652"
+
+    # cached hash value is independent of the number of groups
+    assert dois[0].get_group(n_groups=n_groups) == "3652"
+    assert dois[0].get_group(n_groups=None) == ""
+
+    assert doiget_tdm.doi.DOI.get_group_of_each(dois=dois, n_groups=None) == ["", ""]
+
+
+def test_quoted_cached() -> None:
+
+    doi = doiget_tdm.doi.DOI(doi=EXAMPLE_VALID_DOI)
+
+    assert doi.quoted is doi.quoted
+    assert doi.quoted == EXAMPLE_VALID_DOI_QUOTED
+
+
+def test_iter_from_input(tmp_path) -> None:
+
+    test_dois = [
+        EXAMPLE_VALID_DOI,
+        EXAMPLE_VALID_DOI_2,
+    ]
+
+    tmp_path_gz = tmp_path / "lined.txt.gz"
+
+    with gzip.open(tmp_path_gz, "wt") as handle:
+        handle.write("\n".join(test_dois + test_dois))
+
+    tmp_path_parquet = tmp_path / "dois.parquet"
+    pl.DataFrame({"a": [1, 2], "DOI": test_dois}).write_parquet(tmp_path_parquet)
+
+    # a header field spanning multiple lines, and a blank line between rows
+    tmp_path_csv = tmp_path / "dois.csv"
+    tmp_path_csv.write_text(
+        f'"multi\nline",DOI\n1,{EXAMPLE_VALID_DOI}\n\n2,{EXAMPLE_VALID_DOI_2}\n'
+    )
+
+    for tmp_input in [tmp_path_gz, tmp_path_parquet, tmp_path_csv]:
+
+        dois = doiget_tdm.doi.iter_dois_from_input(raw_input=[tmp_input])
+
+        assert not isinstance(dois, list)
+
+        assert list(dois) == test_dois
+
+    assert (
+        list(
+            doiget_tdm.doi.iter_dois_from_input(
+                raw_input=test_dois + test_dois,
+                seen_path=tmp_path / "seen.sqlite",
+            )
+        )
+        == test_dois
+    )
+
+
+def test_seen_spill() -> None:
+
+    seen = doiget_tdm.doi.SeenDOIs(max_in_memory=1)
+
+    dois = [
+        doiget_tdm.doi.DOI(EXAMPLE_VALID_DOI),
+        doiget_tdm.doi.DOI(EXAMPLE_VALID_DOI_2),
+    ]
+
+    assert [seen.add(doi=doi) for doi in dois + dois] == [True, True, False, False]
+
+    seen.close()
@@ -0,0 +1,308 @@
+import io
+import json
+import os
+import pathlib
+import socket
+import threading
+import zipfile
+
+import paramiko
+import pytest
+
+import doiget_tdm.config
+import doiget_tdm.doi
+import doiget_tdm.errors
+import doiget_tdm.format
+import doiget_tdm.fulltext
+import doiget_tdm.metadata
+import doiget_tdm.publisher
+import doiget_tdm.publishers._iop
+import doiget_tdm.timing
+import doiget_tdm.work
+
+
+# host key checking is disabled for the IOP server, so there is no need for the
+# 'known hosts' file
+pytestmark = pytest.mark.filterwarnings("ignore:Failed to load HostKeys")
+
+
+XML = b"<article><body><p>A</p></body></article>"
+
+
+class StubServer(paramiko.ServerInterface):
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED
+
+
+class StubSFTPHandle(paramiko.SFTPHandle):
+
+    def stat(self):
+        return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+
+
+class StubSFTPServer(paramiko.SFTPServerInterface):
+    """
+    A read-only sFTP server for the files within a local directory.
+    """
+
+    root: pathlib.Path
+
+    def _local_path(self, path):
+        return self.root / self.canonicalize(path).lstrip("/")
+
+    def list_folder(self, path):
+        try:
+            return [
+                paramiko.SFTPAttributes.from_stat(child.stat(), filename=child.name)
+                for child in self._local_path(path).iterdir()
+            ]
+        except OSError as err:
+            return paramiko.SFTPServer.convert_errno(err.errno)
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(self._local_path(path).stat())
+        except OSError as err:
+            return paramiko.SFTPServer.convert_errno(err.errno)
+
+    lstat = stat
+
+    def open(self, path, flags, attr):
+        try:
+            handle_file = self._local_path(path).open("rb")
+        except OSError as err:
+            return paramiko.SFTPServer.convert_errno(err.errno)
+
+        handle = StubSFTPHandle(flags)
+        handle.readfile = handle_file
+        return handle
+
+
+def serve_sftp(root):
+
+    host_key = paramiko.RSAKey.generate(bits=1024)
+
+    StubSFTPServer.root = root
+
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+
+    def run():
+        while True:
+            try:
+                (sock, _) = listener.accept()
+            except OSError:
+                return
+            transport = paramiko.Transport(sock)
+            transport.add_server_key(host_key)
+            transport.set_subsystem_handler("sftp", paramiko.SFTPServer, StubSFTPServer)
+            transport.start_server(server=StubServer())
+
+    threading.Thread(target=run, daemon=True).start()
+
+    return listener
+
+
+@pytest.fixture
+def iop(monkeypatch, tmp_path):
+
+    server_dir = tmp_path / "server"
+
+    (server_dir / "XMLdata").mkdir(parents=True)
+    (server_dir / "PDFdata").mkdir(parents=True)
+
+    for number in (1, 2, 3):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as handle:
+            handle.writestr(f"{number}.xml", XML)
+        (server_dir / "XMLdata" / f"10__1088_{number}.zip").write_bytes(
+            buffer.getvalue()
+        )
+
+    listener = serve_sftp(root=server_dir)
+
+    monkeypatch.setenv("DOIGET_TDM_IOP_USERNAME", "user")
+    monkeypatch.setenv("DOIGET_TDM_IOP_PASSWORD", "password")
+    monkeypatch.setenv("DOIGET_TDM_IOP_SERVER_ADDRESS", "127.0.0.1")
+    monkeypatch.setenv("DOIGET_TDM_IOP_SERVER_PORT", str(listener.getsockname()[1]))
+    monkeypatch.setenv("DOIGET_TDM_IOP_N_CONNECTIONS", "2")
+
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "cache_dir", tmp_path)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir", data_dir)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir_n_groups", None)
+
+    # the metadata module may have been reloaded by another test, so form the member
+    # ID from its current classes
+    monkeypatch.setattr(
+        doiget_tdm.publishers._iop.IOP,
+        "member_id",
+        doiget_tdm.metadata.MemberID(id_="266"),
+    )
+
+    iop = doiget_tdm.publishers._iop.IOP()
+
+    monkeypatch.setitem(doiget_tdm.publisher.registry, iop.member_id, iop)
+
+    yield iop
+
+    listener.close()
+
+
+def test_server_file_list(iop, tmp_path) -> None:
+
+    iop.form_server_file_list()
+
+    file_list = iop.load_server_file_list()
+
+    assert file_list.get_filenames(doi="10.1088/1") == {"XML": "10__1088_1.zip"}
+
+    xml_dir = tmp_path / "server" / "XMLdata"
+
+    # a new file, with the DOI in a different case
+    new_path = xml_dir / "10__1088_ABC.zip"
+    new_path.write_bytes(b"")
+
+    dir_mtime = xml_dir.stat().st_mtime + 10
+    os.utime(new_path, (dir_mtime, dir_mtime))
+    os.utime(xml_dir, (dir_mtime, dir_mtime))
+
+    iop.form_server_file_list()
+
+    assert file_list.get_filenames(doi="10.1088/abc") == {"XML": "10__1088_ABC.zip"}
+
+    # a removed file is only noticed by a full update
+    (xml_dir / "10__1088_1.zip").unlink()
+    os.utime(xml_dir, (dir_mtime, dir_mtime))
+
+    iop.form_server_file_list()
+
+    assert file_list.get_filenames(doi="10.1088/1") == {"XML": "10__1088_1.zip"}
+
+    iop.form_server_file_list(full=True)
+
+    assert file_list.get_filenames(doi="10.1088/1") == {}
+    assert file_list.get_filenames(doi="10.1088/2") == {"XML": "10__1088_2.zip"}
+
+
+def test_prefetch(iop, monkeypatch) -> None:
+
+    iop.form_server_file_list()
+
+    download = iop.download
+    download_labels = []
+
+    def labelled_download(**kwargs):
+        download_labels.append(doiget_tdm.timing.get_labels())
+        return download(**kwargs)
+
+    monkeypatch.setattr(iop, "download", labelled_download)
+
+    dois = [doiget_tdm.doi.DOI(doi=f"10.1088/{number}") for number in (1, 2, 3)]
+
+    for doi in dois:
+        metadata = doiget_tdm.metadata.Metadata(doi=doi)
+        metadata.path.parent.mkdir()
+        metadata.path.write_bytes(json.dumps({"member": "266"}).encode())
+
+    works = [doiget_tdm.work.Work(doi=doi) for doi in dois]
+
+    assert works[0].fulltext.get_acquire_group() == "iop"
+
+    doiget_tdm.fulltext.prefetch(fulltexts=[work.fulltext for work in works])
+
+    assert sorted(iop._prefetched) == [
+        f"XMLdata/10__1088_{number}.zip" for number in (1, 2, 3)
+    ]
+
+    for future in iop._prefetched.values():
+        future.result()
+
+    # the downloads in the executor threads are labelled for the timing
+    assert download_labels == [("IOP", "XML")] * 3
+
+    for work in works:
+        work.fulltext.acquire()
+        assert work.fulltext.load().data == XML
+
+    assert iop._prefetched == {}
+
+    # the downloads share the sessions in the pool
+    assert iop._n_connections <= 2
+
+    with pytest.raises(doiget_tdm.errors.AcquisitionError):
+        iop.download(
+            remote_path="XMLdata/missing.zip",
+            format_name=doiget_tdm.format.FormatName.XML,
+        )
+
+
+def test_prefetch_skips(iop, monkeypatch) -> None:
+
+    iop.form_server_file_list()
+
+    doi = doiget_tdm.doi.DOI(doi="10.1088/1")
+
+    metadata = doiget_tdm.metadata.Metadata(doi=doi)
+    metadata.path.parent.mkdir()
+    metadata.path.write_bytes(json.dumps({"member": "266"}).encode())
+
+    work = doiget_tdm.work.Work(doi=doi)
+
+    # IOP has no HTML source, so the XML is prefetched instead
+    monkeypatch.setattr(
+        doiget_tdm.config.SETTINGS,
+        "format_preference_order",
+        (doiget_tdm.format.FormatName.HTML, doiget_tdm.format.FormatName.XML),
+    )
+
+    doiget_tdm.fulltext.prefetch(fulltexts=[work.fulltext])
+
+    assert sorted(iop._prefetched) == ["XMLdata/10__1088_1.zip"]
+
+    # an invalid hostname only fails the acquisition of the IOP source
+    monkeypatch.setattr(iop.settings, "valid_hostname", "invalid.test")
+
+    doiget_tdm.fulltext.prefetch(fulltexts=[work.fulltext])
+
+    assert iop._prefetched == {}
+
+    work.fulltext.acquire()
+
+    assert not work.fulltext.exists
+
+
+def test_connection_pool(iop, monkeypatch) -> None:
+
+    monkeypatch.setattr(iop.settings, "n_connections", 1)
+
+    n_files = []
+
+    def use_connection():
+        with iop.connection() as connection:
+            n_files.append(len(connection.listdir("XMLdata")))
+
+    with iop.connection() as connection:
+
+        # waits for the only session
+        thread = threading.Thread(target=use_connection)
+        thread.start()
+
+        # the session drops while it is in use
+        connection.close()
+
+    thread.join(timeout=30)
+
+    assert not thread.is_alive()
+    assert n_files == [3]
+    assert iop._n_connections == 1
@@ -7,6 +7,8 @@ import pytest
 
 import requests
 
+import doiget_tdm.codec
+import doiget_tdm.config
 import doiget_tdm.doi
 import doiget_tdm.metadata
 
@@ -86,3 +88,129 @@ def test_api_get(monkeypatch):
         metadata = client.get_doi_metadata(
             doi=doiget_tdm.doi.DOI(doi="10.7717/peerj.1038")
         )
+
+
+def test_fields(monkeypatch, tmp_path) -> None:
+
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir", tmp_path)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir_n_groups", None)
+
+    test_data_path = (
+        pathlib.Path(__file__).parent.parent
+        / "test_data"
+        / "example_crossref_metadata.json"
+    )
+
+    message = json.loads(test_data_path.read_bytes())["message"]
+
+    # the parser is shared across documents
+    for doi in ("10.7717/peerj.1038", "10.7717/peerj.1039"):
+
+        metadata = doiget_tdm.metadata.Metadata(doi=doiget_tdm.doi.DOI(doi=doi))
+
+        metadata.path.parent.mkdir(parents=True)
+        metadata.path.write_bytes(json.dumps(message).encode())
+
+        assert str(metadata.member_id) == message["member"]
+        assert metadata.publisher_name == message["publisher"]
+        assert metadata.journal_name == message["container-title"][0]
+        assert metadata.title == message["title"][0]
+        assert metadata.issns == message["ISSN"]
+        assert metadata.published_date is not None
+        assert metadata.page == message.get("page")
+
+        assert metadata.raw["DOI"] == message["DOI"]
+
+
+def test_codec(monkeypatch, tmp_path) -> None:
+
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir", tmp_path)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir_n_groups", None)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "metadata_compression_level", 6)
+
+    raw = json.dumps({"member": "4443", "publisher": "PeerJ"}).encode()
+
+    assert doiget_tdm.codec.detect_codec(data=raw) is None
+    assert doiget_tdm.codec.decompress(data=raw) == raw
+
+    doi = doiget_tdm.doi.DOI(doi="10.7717/peerj.1038")
+
+    metadata = doiget_tdm.metadata.Metadata(doi=doi)
+    metadata.acquire(metadata_sources=[lambda doi: raw])
+
+    assert metadata.path.suffix == ".gz"
+    assert (
+        doiget_tdm.codec.detect_codec(data=metadata.path.read_bytes())
+        == doiget_tdm.config.CodecName.ZLIB
+    )
+
+    # the compressed metadata can be read when the settings have changed
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "metadata_compression_level", 0)
+
+    metadata = doiget_tdm.metadata.Metadata(doi=doi)
+
+    assert metadata.path.suffix == ".json"
+    assert metadata.exists
+    assert metadata.read() == raw
+    assert metadata.publisher_name == "PeerJ"
+
+
+@pytest.mark.parametrize(
+    ("codec_name", "package"),
+    [
+        (doiget_tdm.config.CodecName.ZSTD, "zstandard"),
+        (doiget_tdm.config.CodecName.LZ4, "lz4"),
+    ],
+)
+def test_codec_round_trip(monkeypatch, tmp_path, codec_name, package) -> None:
+
+    pytest.importorskip(package)
+
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir", tmp_path)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir_n_groups", None)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "metadata_codec", codec_name)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "metadata_compression_level", -1)
+
+    raw = json.dumps({"member": "4443", "publisher": "PeerJ"}).encode()
+
+    doi = doiget_tdm.doi.DOI(doi="10.7717/peerj.1038")
+
+    metadata = doiget_tdm.metadata.Metadata(doi=doi)
+    metadata.acquire(metadata_sources=[lambda doi: raw])
+
+    assert metadata.path.suffix == doiget_tdm.codec.SUFFIXES[codec_name]
+    assert doiget_tdm.codec.detect_codec(metadata.path.read_bytes()) == codec_name
+
+    # the codec is detected when reading with different settings
+    monkeypatch.setattr(
+        doiget_tdm.config.SETTINGS,
+        "metadata_codec",
+        doiget_tdm.config.CodecName.ZLIB,
+    )
+
+    assert doiget_tdm.metadata.Metadata(doi=doi).read() == raw
+
+
+def test_zstd_dictionary(monkeypatch, tmp_path) -> None:
+
+    pytest.importorskip("zstandard")
+
+    samples = [
+        json.dumps({"DOI": f"10.7717/peerj.{number}", "member": "4443"}).encode()
+        for number in range(1_000)
+    ]
+
+    dictionary_path = tmp_path / "dictionary"
+
+    doiget_tdm.codec.train_zstd_dictionary(
+        samples=samples,
+        output_path=dictionary_path,
+        dictionary_size=1_024,
+    )
+
+    codec = doiget_tdm.codec.ZstdCodec(dictionary_path=dictionary_path)
+
+    compressed = codec.compress(data=samples[0])
+
+    assert codec.decompress(data=compressed) == samples[0]
+    assert len(compressed) < len(samples[0])
@@ -0,0 +1,43 @@
+import urllib.request
+
+import doiget_tdm.metrics
+import doiget_tdm.timing
+
+
+def test_serve() -> None:
+
+    metrics = doiget_tdm.metrics.METRICS
+
+    metrics.reset()
+
+    with doiget_tdm.timing.labels(publisher="PLoS", fmt="XML"):
+        metrics.add_attempt()
+        metrics.add_failure(err=ValueError())
+        metrics.add_attempt()
+        metrics.add_bytes_written(n_bytes=10)
+        metrics.add_success()
+
+        with metrics.in_flight():
+            server = doiget_tdm.metrics.serve(port=0)
+
+            try:
+                (host, port) = server.server_address[:2]
+
+                # bypass any configured proxies
+                opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+                with opener.open(f"http://{host!s}:{port}/metrics") as response:
+                    lines = response.read().decode().splitlines()
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    labels = 'publisher="PLoS",format="XML"'
+
+    assert f"doiget_tdm_sources_attempted_total{{{labels}}} 2" in lines
+    assert f"doiget_tdm_sources_succeeded_total{{{labels}}} 1" in lines
+    assert f'doiget_tdm_sources_failed_total{{{labels},error="ValueError"}} 1' in lines
+    assert f"doiget_tdm_bytes_written_total{{{labels}}} 10" in lines
+    assert 'doiget_tdm_requests_in_flight{publisher="PLoS"} 1' in lines
+
+    metrics.reset()
@@ -0,0 +1,177 @@
+import json
+import zipfile
+
+import doiget_tdm.acquire
+import doiget_tdm.config
+import doiget_tdm.doi
+import doiget_tdm.format
+import doiget_tdm.metadata
+import doiget_tdm.publisher
+import doiget_tdm.publishers._plos
+
+
+XML_A = b"<article><body><p>A</p></body></article>"
+XML_B = b"<article><body><p>B</p></body></article>"
+
+
+def configure(monkeypatch, tmp_path) -> None:
+
+    data_path = tmp_path / "allofplos.zip"
+
+    with zipfile.ZipFile(data_path, "w", compression=zipfile.ZIP_DEFLATED) as handle:
+        handle.writestr("journal.pone.0000002.xml", XML_B)
+        handle.writestr("journal.pone.0000001.xml", XML_A)
+
+    monkeypatch.setenv("DOIGET_TDM_PLOS_ALLOFPLOS_PATH", str(data_path))
+
+    # the metadata module may have been reloaded by another test, so form the member
+    # ID from its current classes
+    monkeypatch.setattr(
+        doiget_tdm.publishers._plos.PLoS,
+        "member_id",
+        doiget_tdm.metadata.MemberID(id_="340"),
+    )
+
+
+def test_read_members(monkeypatch, tmp_path) -> None:
+
+    configure(monkeypatch=monkeypatch, tmp_path=tmp_path)
+
+    plos = doiget_tdm.publishers._plos.PLoS()
+
+    assert plos.read_member(name="journal.pone.0000001.xml") == XML_A
+
+    handle = plos.get_handle()
+
+    # the handle is kept open
+    assert plos.get_handle() is handle
+
+    # in the order stored within the data file, with missing names skipped
+    assert list(
+        plos.read_members(
+            names=[
+                "journal.pone.0000001.xml",
+                "journal.pone.0000003.xml",
+                "journal.pone.0000002.xml",
+            ]
+        )
+    ) == [("journal.pone.0000002.xml", XML_B), ("journal.pone.0000001.xml", XML_A)]
+
+    plos.close()
+
+
+def test_ingest(monkeypatch, tmp_path) -> None:
+
+    configure(monkeypatch=monkeypatch, tmp_path=tmp_path)
+
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir", data_dir)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir_n_groups", None)
+
+    plos = doiget_tdm.publishers._plos.PLoS()
+
+    monkeypatch.setitem(
+        doiget_tdm.publisher.registry,
+        plos.member_id,
+        plos,
+    )
+
+    dois = [
+        doiget_tdm.doi.DOI(doi=f"10.1371/journal.pone.000000{number}")
+        for number in (1, 2, 3)
+    ]
+
+    for doi in dois:
+        metadata = doiget_tdm.metadata.Metadata(doi=doi)
+        metadata.path.parent.mkdir()
+        metadata.path.write_bytes(
+            json.dumps({"member": "340", "publisher": "PLoS"}).encode()
+        )
+
+    doiget_tdm.publishers._plos.ingest(
+        dois=dois,
+        n_workers=1,
+        show_progress_bar=False,
+    )
+
+    formats = [
+        doiget_tdm.format.Format(name=doiget_tdm.format.FormatName.XML, doi=doi)
+        for doi in dois
+    ]
+
+    # the third DOI is not in the data file
+    assert [fmt.exists for fmt in formats] == [True, True, False]
+
+    assert formats[0].local_path.read_bytes() == XML_A
+
+    plos.close()
+
+
+def test_ingest_corpus(monkeypatch, tmp_path) -> None:
+
+    configure(monkeypatch=monkeypatch, tmp_path=tmp_path)
+
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir", data_dir)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir_n_groups", None)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "crossref_lmdb_path", None)
+
+    plos = doiget_tdm.publishers._plos.PLoS()
+
+    monkeypatch.setitem(
+        doiget_tdm.publisher.registry,
+        plos.member_id,
+        plos,
+    )
+
+    # the worker processes form their own handler, from the environment
+    doiget_tdm.publishers._plos.ingest(
+        n_workers=2,
+        chunk_size=1,
+        show_progress_bar=False,
+    )
+
+    dois = [
+        doiget_tdm.doi.DOI(doi=f"10.1371/journal.pone.000000{number}")
+        for number in (1, 2)
+    ]
+
+    for doi, xml in zip(dois, (XML_A, XML_B), strict=True):
+
+        fmt = doiget_tdm.format.Format(name=doiget_tdm.format.FormatName.XML, doi=doi)
+
+        assert fmt.local_path.read_bytes() == xml
+
+        metadata = doiget_tdm.metadata.Metadata(doi=doi)
+
+        assert json.loads(metadata.read()) == {
+            "DOI": str(doi),
+            "member": "340",
+            "publisher": doiget_tdm.publishers._plos.PUBLISHER_NAME,
+            doiget_tdm.metadata.PLACEHOLDER_KEY: True,
+        }
+
+        # placeholder metadata is replaced when the DOI is next acquired
+        assert metadata.is_placeholder
+
+    def get_doi_metadata(doi):
+        return json.dumps({"DOI": str(doi), "member": "340", "title": ["A"]}).encode()
+
+    monkeypatch.setattr(
+        doiget_tdm.metadata,
+        "get_metadata_sources",
+        lambda: (get_doi_metadata,),
+    )
+
+    doiget_tdm.acquire.process_doi(doi=dois[0], only_metadata=True)
+
+    metadata = doiget_tdm.metadata.Metadata(doi=dois[0])
+
+    assert metadata.exists
+    assert metadata.title == "A"
+
+    plos.close()
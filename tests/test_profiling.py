@@ -0,0 +1,22 @@
+import time
+
+import doiget_tdm.profiling
+
+
+def busy_wait(duration_s: float) -> None:
+    end = time.perf_counter() + duration_s
+    while time.perf_counter() < end:
+        pass
+
+
+def test_profile(tmp_path) -> None:
+
+    with doiget_tdm.profiling.profile(name="test", output_dir=tmp_path):
+        busy_wait(duration_s=0.1)
+
+    (collapsed_path,) = tmp_path.glob("profile_test_*.collapsed")
+    (_,) = tmp_path.glob("profile_test_*.pstats")
+
+    stacks = collapsed_path.read_text().splitlines()
+
+    assert any("test_profiling:busy_wait" in stack for stack in stacks)
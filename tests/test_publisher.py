@@ -0,0 +1,52 @@
+import subprocess
+import sys
+
+import doiget_tdm.metadata
+import doiget_tdm.publisher
+import doiget_tdm.publishers
+
+
+def test_lazy_import() -> None:
+
+    code = (
+        "import sys; import doiget_tdm.cli; "
+        + "assert 'doiget_tdm.publishers._iop' not in sys.modules; "
+        + "assert 'pysftp' not in sys.modules; "
+        + "assert 'polars' not in sys.modules"
+    )
+
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+
+
+def test_manifest() -> None:
+
+    registry = doiget_tdm.publisher.registry
+
+    for member_id in doiget_tdm.publishers.MANIFEST:
+
+        member_id = doiget_tdm.metadata.MemberID(id_=member_id)
+
+        assert member_id in registry
+        assert registry.is_loaded(member_id=member_id)
+        assert registry[member_id].member_id == member_id
+
+    assert doiget_tdm.metadata.MemberID(id_="0") not in registry
+
+
+def test_acquire_group(monkeypatch) -> None:
+
+    import doiget_tdm.publishers._elsevier
+    import doiget_tdm.publishers._wiley
+
+    monkeypatch.delenv("DOIGET_TDM_WILEY_TDM_CLIENT_TOKEN", raising=False)
+
+    # the quota has a short window, and the handler is not configured
+    assert doiget_tdm.publishers._wiley.Wiley().get_acquire_group(fulltext=None) is None
+
+    monkeypatch.setenv("DOIGET_TDM_ELSEVIER_API_KEY", "key")
+    monkeypatch.setenv("DOIGET_TDM_ELSEVIER_INSTITUTION_TOKEN", "token")
+    monkeypatch.setenv("DOIGET_TDM_ELSEVIER_N_REQUESTS_PER_WEEK", "100")
+
+    elsevier = doiget_tdm.publishers._elsevier.Elsevier()
+
+    assert elsevier.get_acquire_group(fulltext=None) == "Elsevier"
@@ -0,0 +1,35 @@
+import pytest
+
+import doiget_tdm.errors
+import doiget_tdm.quota
+
+
+def test_ledger(tmp_path) -> None:
+
+    path = tmp_path / doiget_tdm.quota.LEDGER_FILENAME
+
+    quota = doiget_tdm.quota.Quota(name="test", limit=2, interval_s=60 * 60 * 24)
+
+    # separate ledgers, as would be used by separate processes
+    ledgers = [doiget_tdm.quota.QuotaLedger(path=path) for _ in range(2)]
+
+    for ledger in ledgers:
+        ledger.spend(quota=quota)
+
+    assert [ledger.get_n_remaining(quota=quota) for ledger in ledgers] == [0, 0]
+
+    with pytest.raises(doiget_tdm.errors.QuotaExhaustedError):
+        ledgers[0].spend(quota=quota, max_wait_s=0)
+
+    # other quotas are recorded separately
+    other_quota = doiget_tdm.quota.Quota(name="other", limit=1, interval_s=1)
+
+    ledgers[1].spend(quota=other_quota)
+
+    # waits for the next window
+    ledgers[1].spend(quota=other_quota)
+
+    assert ledgers[0].get_n_spent(quota=other_quota) == 1
+
+    for ledger in ledgers:
+        ledger.close()
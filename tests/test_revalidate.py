@@ -0,0 +1,71 @@
+import polars as pl
+import pytest
+
+import doiget_tdm.config
+import doiget_tdm.doi
+import doiget_tdm.format
+import doiget_tdm.revalidate
+
+
+EXAMPLE_VALID_DOI = "10.3758/s13414-023-02718-0"
+EXAMPLE_VALID_DOI_2 = "10.1163/22134808-bja10082"
+
+
+def _write_fulltext(doi, fmt_name, data) -> doiget_tdm.format.Format:
+
+    fmt = doiget_tdm.format.Format(name=fmt_name, doi=doiget_tdm.doi.DOI(doi=doi))
+    fmt.local_path.parent.mkdir(parents=True, exist_ok=True)
+    fmt.local_path.write_bytes(data)
+
+    return fmt
+
+
+# the settings are passed to the worker processes
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_revalidate(monkeypatch, tmp_path, n_workers) -> None:
+
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir", data_dir)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir_n_groups", None)
+
+    valid_fmt = _write_fulltext(
+        doi=EXAMPLE_VALID_DOI,
+        fmt_name=doiget_tdm.format.FormatName.XML,
+        data=b"<article><body><p>Text</p></body></article>",
+    )
+
+    invalid_fmt = _write_fulltext(
+        doi=EXAMPLE_VALID_DOI_2,
+        fmt_name=doiget_tdm.format.FormatName.XML,
+        data=b"<article><front>Abstract</front></article>",
+    )
+
+    output_path = tmp_path / "report.parquet"
+    quarantine_dir = tmp_path / "quarantine"
+
+    failures = doiget_tdm.revalidate.run(
+        output_path=output_path,
+        quarantine_dir=quarantine_dir,
+        n_workers=n_workers,
+        show_progress_bar=False,
+    )
+
+    (failure,) = failures
+
+    assert failure.doi == EXAMPLE_VALID_DOI_2
+    assert failure.fmt is doiget_tdm.format.FormatName.XML
+    assert failure.error_type == "ValidationError"
+
+    report = pl.read_parquet(output_path)
+
+    assert report["doi"].to_list() == [EXAMPLE_VALID_DOI_2]
+
+    assert valid_fmt.exists
+    assert not invalid_fmt.exists
+    assert (
+        quarantine_dir
+        / invalid_fmt.local_path.parent.name
+        / invalid_fmt.local_path.name
+    ).exists()
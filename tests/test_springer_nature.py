@@ -0,0 +1,330 @@
+import io
+import json
+
+import pytest
+
+import requests
+
+import doiget_tdm.acquire
+import doiget_tdm.config
+import doiget_tdm.doi
+import doiget_tdm.errors
+import doiget_tdm.format
+import doiget_tdm.fulltext
+import doiget_tdm.metadata
+import doiget_tdm.publisher
+import doiget_tdm.publishers._springer_nature
+import doiget_tdm.quota
+import doiget_tdm.timing
+import doiget_tdm.work
+
+
+def form_article(doi: str) -> str:
+    return (
+        "<article><front><article-meta>"
+        + f'<article-id pub-id-type="doi">{doi}</article-id>'
+        + "</article-meta></front>"
+        + f"<body><p>{doi}</p></body></article>"
+    )
+
+
+@pytest.fixture
+def springer_nature(monkeypatch, tmp_path):
+
+    monkeypatch.setenv("DOIGET_TDM_SPRINGER_NATURE_API_BASE_URL", "https://api.test")
+    monkeypatch.setenv("DOIGET_TDM_SPRINGER_NATURE_API_KEY", "key")
+    monkeypatch.setenv("DOIGET_TDM_SPRINGER_NATURE_API_SUFFIX", "suffix")
+    monkeypatch.setenv("DOIGET_TDM_SPRINGER_NATURE_N_DOIS_PER_REQUEST", "2")
+    monkeypatch.setenv("DOIGET_TDM_SPRINGER_NATURE_N_REQUESTS_PER_DAY", "1")
+
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir", tmp_path / "data")
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "cache_dir", tmp_path / "cache")
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir_n_groups", None)
+
+    # the metadata module may have been reloaded by another test, so form the member
+    # ID from its current classes
+    monkeypatch.setattr(
+        doiget_tdm.publishers._springer_nature.SpringerNature,
+        "member_id",
+        doiget_tdm.metadata.MemberID(id_="297"),
+    )
+
+    springer_nature = doiget_tdm.publishers._springer_nature.SpringerNature()
+
+    monkeypatch.setitem(
+        doiget_tdm.publisher.registry,
+        springer_nature.member_id,
+        springer_nature,
+    )
+
+    return springer_nature
+
+
+def test_prefetch(monkeypatch, springer_nature) -> None:
+
+    dois = [doiget_tdm.doi.DOI(doi=f"10.1007/S{number}") for number in (1, 2, 3)]
+
+    for doi in dois:
+        metadata = doiget_tdm.metadata.Metadata(doi=doi)
+        metadata.path.parent.mkdir(parents=True)
+        metadata.path.write_bytes(json.dumps({"member": "297"}).encode())
+
+    urls = []
+    request_labels = []
+
+    def mock_get(url, raise_error=True, stream=False):
+
+        urls.append(url)
+        request_labels.append(doiget_tdm.timing.get_labels())
+
+        response = requests.Response()
+
+        # the third DOI has no full-text content available
+        response.raw = io.BytesIO(
+            (
+                "<response><records>"
+                + "".join(form_article(doi=str(doi)) for doi in dois[:2])
+                + "</records></response>"
+            ).encode()
+        )
+
+        return response
+
+    monkeypatch.setattr(springer_nature.session, "get", mock_get)
+
+    works = [doiget_tdm.work.Work(doi=doi) for doi in dois]
+
+    assert works[0].fulltext.get_acquire_group() == "SpringerNature"
+
+    doiget_tdm.fulltext.prefetch(fulltexts=[work.fulltext for work in works])
+
+    # two DOIs per request
+    assert len(urls) == 2
+    assert "doi:10.1007/s1%20OR%20doi:10.1007/s2" in urls[0]
+
+    # the batched requests are labelled for the timing
+    assert request_labels == [("SpringerNature", "XML")] * 2
+
+    for work in works:
+        work.fulltext.acquire()
+
+    assert works[0].fulltext.load().data.decode() == form_article(doi=str(dois[0]))
+    assert not works[2].fulltext.exists
+
+    # no requests are made for the individual DOIs
+    assert len(urls) == 2
+
+
+def test_acquire_matching_article(monkeypatch, springer_nature) -> None:
+
+    doi = doiget_tdm.doi.DOI(doi="10.1007/S1")
+
+    metadata = doiget_tdm.metadata.Metadata(doi=doi)
+    metadata.path.parent.mkdir(parents=True)
+    metadata.path.write_bytes(json.dumps({"member": "297"}).encode())
+
+    other_dois = ["10.1007/s2"]
+
+    def mock_get(url, raise_error=True, stream=False):
+
+        response = requests.Response()
+
+        # the response has another article ahead of the requested one
+        response.raw = io.BytesIO(
+            (
+                "<response><records>"
+                + "".join(form_article(doi=other_doi) for other_doi in other_dois)
+                + "</records></response>"
+            ).encode()
+        )
+
+        return response
+
+    monkeypatch.setattr(springer_nature.session, "get", mock_get)
+
+    work = doiget_tdm.work.Work(doi=doi)
+
+    work.fulltext.set_sources()
+
+    (source,) = work.fulltext.formats[doiget_tdm.format.FormatName.XML].sources
+
+    with pytest.raises(doiget_tdm.errors.AcquisitionError):
+        source.acquire()
+
+    other_dois.append(str(doi))
+
+    assert source.acquire().decode() == form_article(doi=str(doi))
+
+
+def test_prefetch_failure(monkeypatch, springer_nature) -> None:
+
+    dois = [doiget_tdm.doi.DOI(doi=f"10.1007/s{number}") for number in (1, 2)]
+
+    for doi in dois:
+        metadata = doiget_tdm.metadata.Metadata(doi=doi)
+        metadata.path.parent.mkdir(parents=True)
+        metadata.path.write_bytes(json.dumps({"member": "297"}).encode())
+
+    urls = []
+
+    def mock_get(url, raise_error=True, stream=False):
+        urls.append(url)
+        raise requests.ConnectionError()
+
+    monkeypatch.setattr(springer_nature.session, "get", mock_get)
+
+    works = [doiget_tdm.work.Work(doi=doi) for doi in dois]
+
+    doiget_tdm.fulltext.prefetch(fulltexts=[work.fulltext for work in works])
+
+    # the quota only allows one request, which is not enough to acquire the two
+    # articles individually
+    assert len(urls) == 1
+
+    for work in works:
+        work.fulltext.acquire()
+        assert not work.fulltext.exists
+
+    assert len(urls) == 1
+
+
+def test_quota(monkeypatch, springer_nature) -> None:
+
+    dois = [doiget_tdm.doi.DOI(doi=f"10.1007/s{number}") for number in range(4)]
+
+    for doi in dois:
+        metadata = doiget_tdm.metadata.Metadata(doi=doi)
+        metadata.path.parent.mkdir(parents=True)
+        metadata.path.write_bytes(json.dumps({"member": "297"}).encode())
+
+    # the first DOI already has full-text content
+    doiget_tdm.format.Format(name=doiget_tdm.format.FormatName.XML, doi=dois[0]).write(
+        data=b"<article/>"
+    )
+
+    urls = []
+
+    def mock_get(url, timeout, stream):
+
+        urls.append(url)
+
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(
+            (
+                "<response><records>"
+                + "".join(form_article(doi=str(doi)) for doi in dois)
+                + "</records></response>"
+            ).encode()
+        )
+
+        return response
+
+    monkeypatch.setattr(springer_nature.session._session, "get", mock_get)
+
+    doiget_tdm.acquire.run(
+        dois=dois[:3],
+        only_metadata=False,
+        show_progress_bar=False,
+        show_timings=False,
+    )
+
+    # a single request, for the two DOIs without full-text content
+    assert len(urls) == 1
+    assert "doi:10.1007/s1%20OR%20doi:10.1007/s2" in urls[0]
+
+    assert doiget_tdm.quota.get_ledger().get_n_remaining(springer_nature.quota) == 0
+
+    # the quota is exhausted, so the remaining DOI is skipped
+    doiget_tdm.acquire.run(
+        dois=dois[3:],
+        only_metadata=False,
+        show_progress_bar=False,
+        show_timings=False,
+    )
+
+    assert len(urls) == 1
+    assert not doiget_tdm.work.Work(doi=dois[3]).fulltext.exists
+
+
+def test_acquire_batches(monkeypatch, caplog, springer_nature) -> None:
+
+    monkeypatch.setattr(doiget_tdm.acquire, "PREFETCH_BATCH_SIZE", 2)
+
+    dois = [doiget_tdm.doi.DOI(doi=f"10.1007/s{number}") for number in range(3)]
+
+    for doi in dois:
+        metadata = doiget_tdm.metadata.Metadata(doi=doi)
+        metadata.path.parent.mkdir(parents=True)
+        metadata.path.write_bytes(json.dumps({"member": "297"}).encode())
+
+    def mock_get(url, raise_error=True, stream=False):
+        response = requests.Response()
+        response.raw = io.BytesIO(
+            (
+                "<response><records>"
+                + "".join(form_article(doi=str(doi)) for doi in dois)
+                + "</records></response>"
+            ).encode()
+        )
+        return response
+
+    monkeypatch.setattr(springer_nature.session, "get", mock_get)
+
+    def iter_dois():
+        yield from dois
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        doiget_tdm.acquire.run(
+            dois=iter_dois(),
+            only_metadata=False,
+            show_progress_bar=False,
+            show_timings=False,
+        )
+
+    # the first batch is acquired before the input is interrupted
+    assert [doiget_tdm.work.Work(doi=doi).fulltext.exists for doi in dois] == [
+        True,
+        True,
+        False,
+    ]
+
+    assert "resumed by starting from DOI number 3" in caplog.text
+
+
+def test_get_articles() -> None:
+
+    article = (
+        '<article xmlns:xlink="http://www.w3.org/1999/xlink">'
+        + "<front><article-meta>"
+        + '<article-id pub-id-type="doi">10.1007/A</article-id>'
+        + "</article-meta></front>"
+        + '<body><p><ext-link xlink:href="https://a.test">A</ext-link></p></body>'
+        + "</article >"
+    )
+
+    data = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        + "<response><records>"
+        + article
+        + "<article><front><article-meta>"
+        + '<article-id pub-id-type="doi">10.1007/b</article-id>'
+        + "</article-meta></front><body/></article>"
+        + form_article(doi="10.1007/c")
+        + "</records></response>"
+    ).encode()
+
+    # the response is received in small pieces
+    articles = doiget_tdm.publishers._springer_nature.get_articles(
+        chunks=(data[i : i + 7] for i in range(0, len(data), 7))
+    )
+
+    # the second article has no body content, and the others are unchanged
+    assert articles == {
+        "10.1007/a": article.encode(),
+        "10.1007/c": form_article(doi="10.1007/c").encode(),
+    }
+
+    with pytest.raises(doiget_tdm.errors.ValidationError):
+        doiget_tdm.publishers._springer_nature.get_articles(chunks=[data[:-1]])
@@ -0,0 +1,226 @@
+import datetime
+import json
+
+import polars as pl
+
+import doiget_tdm.config
+import doiget_tdm.doi
+import doiget_tdm.metadata
+import doiget_tdm.status
+
+
+def get_cells(table) -> list[list[str]]:
+    return [list(column._cells) for column in table.columns]
+
+
+def form_lf(n_rows: int) -> pl.LazyFrame:
+
+    rows = [
+        {
+            "doi": f"10.1/{i_row}",
+            "doi_quoted": f"10.1%2F{i_row}",
+            "has_metadata": i_row != 0,
+            "member_id": str(i_row % 2),
+            "publisher_name": ["A", "B", "C"][i_row % 3],
+            "has_fulltext": i_row % 4 != 0,
+            "journal_name": None,
+            "title": None,
+            "published_date": datetime.date(year=2024, month=1, day=1),
+            "has_fulltext_XML": i_row % 4 in (1, 2),
+            "has_fulltext_PDF": i_row % 4 in (2, 3),
+            "has_fulltext_HTML": False,
+            "has_fulltext_TXT": False,
+            "has_fulltext_TIFF": False,
+        }
+        for i_row in range(n_rows)
+    ]
+
+    return pl.LazyFrame(rows, schema=doiget_tdm.status.SCHEMA)
+
+
+def test_tables() -> None:
+
+    lf = form_lf(n_rows=12)
+
+    assert get_cells(doiget_tdm.status.get_publisher_table(lf=lf)) == [
+        ["1", "0"],
+        ["A; B; C", "A; B; C"],
+        ["6", "5"],
+    ]
+
+    assert get_cells(doiget_tdm.status.get_formats_table(lf=lf)) == [
+        ["PDF", "PDF + XML", "XML"],
+        ["3", "3", "3"],
+    ]
+
+    (best_formats, best_counts) = get_cells(
+        doiget_tdm.status.get_best_format_table(lf=lf)
+    )
+
+    assert dict(zip(best_formats, best_counts, strict=True)) == {
+        "XML": "6",
+        "PDF": "3",
+        "HTML": "0",
+        "TXT": "0",
+        "TIFF": "0",
+    }
+
+
+def test_tables_empty() -> None:
+
+    lf = form_lf(n_rows=0)
+
+    for table_func in (
+        doiget_tdm.status.get_publisher_table,
+        doiget_tdm.status.get_formats_table,
+        doiget_tdm.status.get_best_format_table,
+    ):
+        table_func(lf=lf)
+
+
+def test_incremental(monkeypatch, tmp_path) -> None:
+
+    data_dir = tmp_path / "data"
+    cache_dir = tmp_path / "cache"
+
+    for path in (data_dir, cache_dir):
+        path.mkdir()
+
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir", data_dir)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "cache_dir", cache_dir)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir_n_groups", None)
+
+    scanned: list[str] = []
+
+    convert = doiget_tdm.status.convert_work_to_status_row
+
+    def mock_convert(work):
+        scanned.append(str(work.doi))
+        return convert(work=work)
+
+    monkeypatch.setattr(
+        doiget_tdm.status,
+        "convert_work_to_status_row",
+        mock_convert,
+    )
+
+    for doi in ("10.1/a", "10.1/b"):
+        (data_dir / doiget_tdm.doi.DOI(doi=doi).quoted).mkdir()
+
+    df = doiget_tdm.status.get_df(dois=None, n_workers=1)
+    assert sorted(df["doi"]) == ["10.1/a", "10.1/b"]
+    assert sorted(scanned) == ["10.1/a", "10.1/b"]
+
+    # only the new directory is scanned
+    scanned.clear()
+    (data_dir / doiget_tdm.doi.DOI(doi="10.1/c").quoted).mkdir()
+
+    df = doiget_tdm.status.get_df(dois=None, n_workers=1)
+    assert sorted(df["doi"]) == ["10.1/a", "10.1/b", "10.1/c"]
+    assert scanned == ["10.1/c"]
+
+    # a full rebuild scans everything
+    scanned.clear()
+
+    df = doiget_tdm.status.get_df(dois=None, full=True, n_workers=1)
+    assert len(df) == 3
+    assert len(scanned) == 3
+
+
+def test_refreshed_metadata(monkeypatch, tmp_path) -> None:
+
+    data_dir = tmp_path / "data"
+    cache_dir = tmp_path / "cache"
+
+    for path in (data_dir, cache_dir):
+        path.mkdir()
+
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir", data_dir)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "cache_dir", cache_dir)
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir_n_groups", None)
+
+    doi = doiget_tdm.doi.DOI(doi="10.1/a")
+
+    def form_source(title):
+        def get_doi_metadata(doi):
+            return json.dumps(
+                {"DOI": str(doi), "member": "1", "publisher": "A", "title": [title]}
+            ).encode()
+
+        return get_doi_metadata
+
+    doiget_tdm.metadata.Metadata(doi=doi).acquire(
+        metadata_sources=[form_source(title="Placeholder")]
+    )
+
+    df = doiget_tdm.status.get_df(dois=None, n_workers=1)
+    assert list(df["title"]) == ["Placeholder"]
+
+    # replacing the metadata is noticed by the status cache
+    doiget_tdm.metadata.Metadata(doi=doi).acquire(
+        metadata_sources=[form_source(title="Refreshed")]
+    )
+
+    df = doiget_tdm.status.get_df(dois=None, n_workers=1)
+    assert list(df["title"]) == ["Refreshed"]
+
+
+def test_write_batches(tmp_path) -> None:
+
+    df = form_lf(n_rows=10).collect()
+
+    output_path = tmp_path / "status.parquet"
+
+    doiget_tdm.status.write_batches(
+        batches=df.iter_slices(n_rows=3),
+        output_path=output_path,
+        schema=doiget_tdm.status.SCHEMA,
+        existing=form_lf(n_rows=2),
+    )
+
+    written = pl.read_parquet(output_path)
+
+    assert written["doi"].to_list() == df["doi"].head(2).to_list() + df["doi"].to_list()
+
+    # the intermediate files are removed
+    assert [path.name for path in tmp_path.iterdir()] == [output_path.name]
+
+
+def test_workers(monkeypatch, tmp_path) -> None:
+
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir", tmp_path / "data")
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "cache_dir", tmp_path / "cache")
+    monkeypatch.setattr(doiget_tdm.config.SETTINGS, "data_dir_n_groups", None)
+
+    dois = [doiget_tdm.doi.DOI(doi=f"10.1/{i_doi}") for i_doi in range(5)]
+
+    for doi in dois:
+        (tmp_path / "data" / doi.quoted).mkdir(parents=True)
+
+    serial = doiget_tdm.status.get_lf(dois=None, full=True, n_workers=1).collect()
+
+    parallel = doiget_tdm.status.get_lf(
+        dois=None,
+        full=True,
+        n_workers=2,
+        batch_size=2,
+    ).collect()
+
+    assert parallel.sort("doi").to_dicts() == serial.sort("doi").to_dicts()
+
+    subset = doiget_tdm.status.get_lf(
+        dois=dois[::-1],
+        n_workers=2,
+        batch_size=2,
+    ).collect()
+
+    # the order of the requested DOIs is kept
+    assert subset["doi"].to_list() == [str(doi) for doi in dois[::-1]]
+
+    # each subset is written to its own file
+    subsets = [
+        doiget_tdm.status.get_lf(dois=subset_dois, n_workers=1)
+        for subset_dois in (dois[:2], dois[2:])
+    ]
+
+    assert subsets[0].collect()["doi"].to_list() == [str(doi) for doi in dois[:2]]
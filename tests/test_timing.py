@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+import doiget_tdm.timing
+
+
+def test_span(tmp_path) -> None:
+
+    timings = doiget_tdm.timing.TIMINGS
+
+    timings.reset()
+
+    with doiget_tdm.timing.labels(publisher="PLoS"):
+        with doiget_tdm.timing.labels(fmt="XML"):
+            with doiget_tdm.timing.span(stage=doiget_tdm.timing.Stage.VALIDATE):
+                pass
+
+        with pytest.raises(ValueError):
+            with doiget_tdm.timing.span(stage=doiget_tdm.timing.Stage.VALIDATE):
+                raise ValueError()
+
+    with doiget_tdm.timing.span(stage=doiget_tdm.timing.Stage.WRITE):
+        pass
+
+    items = {
+        (key.stage, key.publisher, key.fmt): stats for key, stats in timings.items()
+    }
+
+    assert items.keys() == {
+        (doiget_tdm.timing.Stage.VALIDATE, "PLoS", "XML"),
+        (doiget_tdm.timing.Stage.VALIDATE, "PLoS", ""),
+        (doiget_tdm.timing.Stage.WRITE, "", ""),
+    }
+
+    assert items[(doiget_tdm.timing.Stage.VALIDATE, "PLoS", "")].n_errors == 1
+
+    json_path = tmp_path / "timings.json"
+    timings.write(output_path=json_path)
+    assert len(json.loads(json_path.read_text())) == 3
+
+    prom_path = tmp_path / "timings.prom"
+    timings.write(output_path=prom_path)
+    assert (
+        'doiget_tdm_stage_count{stage="validate",publisher="PLoS",format="XML"} 1'
+        in prom_path.read_text().splitlines()
+    )
+
+    timings.reset()
+
+    assert timings.items() == []